@@ -1,4 +1,3 @@
 from . import api
 from . import currency_api
-from . import database
-from . import tests
\ No newline at end of file
+from . import database
\ No newline at end of file
@@ -1,6 +1,8 @@
 from .constants import USER_CREATE_EXAMPLE, WALLET_PREFIX
-from .dependencies import get_db
-from app.api import router
+from .dependencies import get_db, get_async_db, get_read_db, get_async_read_db
+from app.api import router, async_router, metrics_router
 from .schemas import WalletDB, WalletCreate, WalletNumberType, WalletBalanceType, \
-UserCreate, UserDB, UserOut, CurrencyType, TransferMoney, TransferLogDB, AddMoney, EmailType
-from .utils import validation_user_id, validation_wallet_number, email_validation_if_exists, wallet_receiver_validation
\ No newline at end of file
+UserCreate, UserDB, UserOut, CurrencyType, TransferMoney, TransferLogDB, AddMoney, EmailType, TransferBatch, \
+TransferBatchItemResult, TransferLogPage, WalletStatement
+from .utils import validation_user_id, validation_wallet_number, email_validation_if_exists, wallet_receiver_validation, \
+validation_transfer_batch
\ No newline at end of file
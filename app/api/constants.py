@@ -8,4 +8,43 @@ WALLET_PREFIX = "DCT"
 
 DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
 
-EARLIEST_DATETIME = "2023-01-01 00:00:00"
\ No newline at end of file
+EARLIEST_DATETIME = "2023-01-01 00:00:00"
+
+LOGS_PAGE_DEFAULT_LIMIT = 50
+
+LOGS_PAGE_MAX_LIMIT = 1000
+
+STATEMENT_DATE_FORMAT = "%Y-%m-%d"
+
+STATEMENT_GRANULARITIES = ("day", "week", "month")
+
+STATEMENT_MAX_DAYS = 731
+
+USER_FIELDS = ["name", "surname", "email", "id", "created_at"]
+
+USERS_PAGE_DEFAULT_LIMIT = 100
+
+USERS_PAGE_MAX_LIMIT = 1000
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+INSUFFICIENT_FUNDS = "Insufficient funds in the account"
+
+# SQL statements each route may execute, under any balance store. ProfilingMiddleware logs requests going over.
+QUERY_BUDGETS = {
+    ("POST", "/user/"): 3,
+    ("GET", "/user/"): 1,
+    ("GET", "/user/{user_id}/"): 1,
+    ("GET", "/user/{user_id}/wallets"): 2,
+    ("POST", "/user/{user_id}/"): 5,
+    ("GET", "/user/{user_id}/wallet/{wallet_number}/balance"): 3,
+    ("POST", "/user/{user_id}/wallet/{wallet_number}/top-up"): 6,
+    ("POST", "/user/{user_id}/wallet/{wallet_number}/send"): 9,
+    ("POST", "/user/{user_id}/wallet/{wallet_number}/send-batch"): 8,
+    ("GET", "/user/{user_id}/wallet/{wallet_number}/logs"): 3,
+    ("GET", "/user/{user_id}/wallet/{wallet_number}/logs/page"): 3,
+    ("GET", "/user/{user_id}/wallet/{wallet_number}/statement"): 3,
+}
+
+# Claiming an Idempotency-Key and storing the response take statements of their own.
+IDEMPOTENCY_QUERY_ALLOWANCE = 3
\ No newline at end of file
@@ -1,11 +1,94 @@
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy.exc import DBAPIError
+
 from app.database import Session
+from app.database.async_database import AsyncSession, async_replica_engines
+from app.database.database import replica_engines, replicas
+from app.database.replicas import REPLICA_SESSION_KEY
+
+READ_METHODS = {"GET", "HEAD"}
+# asyncpg raises socket errors on connect as they are, without SQLAlchemy wrapping them in a DBAPIError.
+CONNECT_ERRORS = (DBAPIError, OSError)
+
+
+def _user_id(request: Request) -> Optional[int]:
+    try:
+        return int(request.path_params["user_id"])
+    except (KeyError, ValueError):
+        return None
+
 
+def pin_to_primary(user_id: int):
+    """Sends the user's reads to the primary for a while, so they see what they just wrote."""
+    if replicas:
+        replicas.pin(user_id)
 
-def get_db():
+
+def _pin_writer(request: Request):
+    if request.method not in READ_METHODS and (user_id := _user_id(request)) is not None:
+        pin_to_primary(user_id)
+
+
+def get_db(request: Request):
+    # Writers are pinned to the primary when the request starts and again once it is done, so the sticky window
+    # covers both a read racing the write and one right after it.
+    _pin_writer(request)
     db = Session()
     try:
         yield db
     finally:
         db.close()
+        _pin_writer(request)
+
+
+def _read_session(request: Request) -> Session:
+    replica = replicas.choose(_user_id(request)) if replicas else None
+    if replica is None:
+        return Session()
+    db = Session(bind=replica_engines[replica], info={REPLICA_SESSION_KEY: replica})
+    try:
+        # Checking the connection out here lets a replica that just went down fall back to the primary, and takes
+        # it out of rotation until a health check passes.
+        db.connection()
+    except CONNECT_ERRORS as exc:
+        db.close()
+        replicas.failed(replica, exc)
+        return Session()
+    return db
 
 
+def get_read_db(request: Request):
+    """A session for read-only routes, on a healthy replica unless the user has just written."""
+    db = _read_session(request)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db(request: Request):
+    _pin_writer(request)
+    async with AsyncSession() as db:
+        yield db
+    _pin_writer(request)
+
+
+async def _async_read_session(request: Request) -> AsyncSession:
+    replica = replicas.choose(_user_id(request)) if replicas else None
+    if replica is None:
+        return AsyncSession()
+    db = AsyncSession(bind=async_replica_engines[replica], info={REPLICA_SESSION_KEY: replica})
+    try:
+        await db.connection()
+    except CONNECT_ERRORS as exc:
+        await db.close()
+        replicas.failed(replica, exc)
+        return AsyncSession()
+    return db
+
+
+async def get_async_read_db(request: Request):
+    async with await _async_read_session(request) as db:
+        yield db
@@ -0,0 +1,100 @@
+import csv
+import io
+import json
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, Union
+
+from fastapi.responses import StreamingResponse
+
+from app.api.constants import DATETIME_FORMAT
+from app.api.schemas import TransferLogDB
+from app.database.models import TransferLog
+
+EXPORT_FIELDS = list(TransferLogDB.__fields__)
+
+
+def _log_to_row(transfer_log: TransferLog) -> list:
+    return [
+        str(transfer_log.transfer_uid),
+        transfer_log.sender,
+        transfer_log.receiver,
+        transfer_log.currency_sent,
+        transfer_log.currency_received,
+        transfer_log.money_sent,
+        transfer_log.money_received,
+        transfer_log.paid_on.strftime(DATETIME_FORMAT) if transfer_log.paid_on else None,
+    ]
+
+
+def _chunk_to_ndjson(chunk: list[TransferLog]) -> str:
+    return "".join(
+        json.dumps(dict(zip(EXPORT_FIELDS, _log_to_row(transfer_log)))) + "\n" for transfer_log in chunk
+    )
+
+
+class _CsvChunkWriter:
+    def __init__(self):
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+
+    def _flush(self) -> str:
+        text = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return text
+
+    def header(self) -> str:
+        self.writer.writerow(EXPORT_FIELDS)
+        return self._flush()
+
+    def chunk(self, chunk: list[TransferLog]) -> str:
+        self.writer.writerows(_log_to_row(transfer_log) for transfer_log in chunk)
+        return self._flush()
+
+
+def logs_to_ndjson(chunks: Iterable[list[TransferLog]]) -> Iterator[str]:
+    for chunk in chunks:
+        yield _chunk_to_ndjson(chunk)
+
+
+def logs_to_csv(chunks: Iterable[list[TransferLog]]) -> Iterator[str]:
+    csv_writer = _CsvChunkWriter()
+    yield csv_writer.header()
+    for chunk in chunks:
+        yield csv_writer.chunk(chunk)
+
+
+async def async_logs_to_ndjson(chunks: AsyncIterable[list[TransferLog]]) -> AsyncIterator[str]:
+    async for chunk in chunks:
+        yield _chunk_to_ndjson(chunk)
+
+
+async def async_logs_to_csv(chunks: AsyncIterable[list[TransferLog]]) -> AsyncIterator[str]:
+    csv_writer = _CsvChunkWriter()
+    yield csv_writer.header()
+    async for chunk in chunks:
+        yield csv_writer.chunk(chunk)
+
+
+EXPORT_FORMATS = {
+    "ndjson": (logs_to_ndjson, "application/x-ndjson"),
+    "csv": (logs_to_csv, "text/csv"),
+}
+
+ASYNC_EXPORT_FORMATS = {
+    "ndjson": (async_logs_to_ndjson, "application/x-ndjson"),
+    "csv": (async_logs_to_csv, "text/csv"),
+}
+
+
+def export_response(
+        chunks: Union[Iterable[list[TransferLog]], AsyncIterable[list[TransferLog]]],
+        wallet_number: str,
+        export_format: str,
+        formats: dict = EXPORT_FORMATS
+) -> StreamingResponse:
+    serialize, media_type = formats[export_format]
+    return StreamingResponse(
+        serialize(chunks),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{wallet_number}_logs.{export_format}"'}
+    )
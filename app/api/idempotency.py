@@ -0,0 +1,74 @@
+import hashlib
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+from starlette import status
+
+from .constants import IDEMPOTENCY_KEY_MAX_LENGTH, INSUFFICIENT_FUNDS
+from .schemas import TransferLogDB, WalletNumberType
+from app.database.idempotency import IdempotentRequest, StoredResponse, idempotency_store
+from ..database.database import Session
+from ..database.async_database import AsyncSession
+
+
+def _render(status_code: int, content: Any) -> StoredResponse:
+    return StoredResponse(status_code, JSONResponse(content=jsonable_encoder(content)).body)
+
+
+def render_balance(balance: float) -> StoredResponse:
+    return _render(status.HTTP_202_ACCEPTED, balance)
+
+
+def render_transfer(transfer_log) -> StoredResponse:
+    if transfer_log is None:
+        return _render(status.HTTP_405_METHOD_NOT_ALLOWED, {"detail": INSUFFICIENT_FUNDS})
+    return _render(status.HTTP_202_ACCEPTED, TransferLogDB.from_orm(transfer_log))
+
+
+def idempotent_request(
+        key: Optional[str],
+        user_id: int,
+        wallet_number: WalletNumberType,
+        operation: str,
+        body: BaseModel,
+        render: Callable[[Any], StoredResponse]
+) -> Optional[IdempotentRequest]:
+    if key is None:
+        return None
+    if not 0 < len(key) <= IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be 1 to {IDEMPOTENCY_KEY_MAX_LENGTH} characters long"
+        )
+    fingerprint = hashlib.sha256(f"{operation} {wallet_number} {body.json(sort_keys=True)}".encode()).hexdigest()
+    return IdempotentRequest(user_id, key, fingerprint, render)
+
+
+def replay_idempotent(request: Optional[IdempotentRequest], db: Session) -> Optional[Response]:
+    if request is None:
+        return None
+    stored = idempotency_store.lookup(db, request)
+    return stored.to_response() if stored is not None else None
+
+
+async def async_replay_idempotent(request: Optional[IdempotentRequest], db: AsyncSession) -> Optional[Response]:
+    if request is None:
+        return None
+    stored = await idempotency_store.lookup_async(db, request)
+    return stored.to_response() if stored is not None else None
+
+
+def idempotent_response(request: IdempotentRequest, stored: StoredResponse) -> Response:
+    idempotency_store.remember(request, stored)
+    return stored.to_response()
+
+
+def transfer_response(request: Optional[IdempotentRequest], transfer_log):
+    if request is not None:
+        return idempotent_response(request, transfer_log)
+    if transfer_log is None:
+        raise HTTPException(status_code=status.HTTP_405_METHOD_NOT_ALLOWED, detail=INSUFFICIENT_FUNDS)
+    return transfer_log
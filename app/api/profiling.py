@@ -0,0 +1,126 @@
+import logging
+from typing import Callable
+
+from prometheus_client import Histogram
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.api.constants import IDEMPOTENCY_QUERY_ALLOWANCE, QUERY_BUDGETS
+from app.request_profile import RequestProfile, request_profile
+from config import config
+
+logger = logging.getLogger(__name__)
+
+UNMATCHED_ROUTE = "unmatched"
+STATEMENT_LOG_LENGTH = 200
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+
+request_seconds = Histogram(
+    "http_request_duration_seconds", "Wall time of a request, until its response is sent",
+    ["method", "route"], buckets=SECONDS_BUCKETS
+)
+request_db_seconds = Histogram(
+    "http_request_db_seconds", "Time a request spent executing SQL statements",
+    ["method", "route"], buckets=SECONDS_BUCKETS
+)
+request_queries = Histogram(
+    "http_request_db_queries", "SQL statements a request executed", ["method", "route"], buckets=QUERY_BUCKETS
+)
+request_rows = Histogram(
+    "http_request_db_rows", "Rows a request's SQL statements returned or changed",
+    ["method", "route"], buckets=ROW_BUCKETS
+)
+request_currency_api_seconds = Histogram(
+    "http_request_currency_api_seconds", "Time a request spent fetching exchange rates from the currency API",
+    ["method", "route"], buckets=SECONDS_BUCKETS
+)
+
+
+def _statement_for_log(statement: str) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= STATEMENT_LOG_LENGTH else statement[:STATEMENT_LOG_LENGTH] + "..."
+
+
+class ProfilingMiddleware:
+    """Records wall time, SQL time, statement and row counts and currency API time per route template.
+
+    With ``server_timing`` the figures up to the start of the response are also sent in a Server-Timing header.
+    Requests executing more statements than ``budgets`` allow their route are logged with the statements.
+    """
+
+    def __init__(
+            self,
+            app: ASGIApp,
+            server_timing: bool = config.PROFILING_SERVER_TIMING,
+            budgets: dict[tuple[str, str], int] = QUERY_BUDGETS
+    ):
+        self.app = app
+        self.server_timing = server_timing
+        self.budgets = budgets
+        self._routes: dict[Callable, str] = {}
+        self._histograms: dict[tuple[str, str], tuple] = {}
+
+    def _route(self, scope: Scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        if endpoint not in self._routes:
+            self._routes.update(
+                (route.endpoint, route.path) for route in scope["router"].routes if hasattr(route, "endpoint")
+            )
+        return self._routes.get(endpoint, UNMATCHED_ROUTE)
+
+    def _labeled(self, method: str, route: str) -> tuple:
+        # Resolving label values takes a lock per histogram, which costs more than the observations themselves.
+        if (method, route) not in self._histograms:
+            self._histograms[method, route] = tuple(
+                histogram.labels(method=method, route=route) for histogram in (
+                    request_seconds, request_db_seconds, request_queries, request_rows, request_currency_api_seconds
+                )
+            )
+        return self._histograms[method, route]
+
+    def _check_budget(self, scope: Scope, method: str, route: str, profile: RequestProfile):
+        budget = self.budgets.get((method, route))
+        if budget is None or profile.queries <= budget:
+            return
+        if any(name == b"idempotency-key" for name, _ in scope["headers"]):
+            budget += IDEMPOTENCY_QUERY_ALLOWANCE
+            if profile.queries <= budget:
+                return
+        statements = "\n".join(
+            f"{index}. {_statement_for_log(statement)}" for index, statement in enumerate(profile.statements, 1)
+        )
+        logger.warning(
+            "%s %s executed %d SQL statements, over its budget of %d:\n%s", method, route, profile.queries, budget,
+            statements
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = request_profile.set(profile)
+
+        async def send_with_server_timing(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("Server-Timing", profile.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_server_timing if self.server_timing else send)
+        finally:
+            request_profile.reset(token)
+            method, route = scope["method"], self._route(scope)
+            self._check_budget(scope, method, route, profile)
+            seconds, db_seconds, queries, rows, currency = self._labeled(method, route)
+            seconds.observe(profile.elapsed())
+            db_seconds.observe(profile.db_seconds)
+            queries.observe(profile.queries)
+            rows.observe(profile.rows)
+            currency.observe(profile.currency_api_seconds)
@@ -1,16 +1,23 @@
 from datetime import datetime
 from typing import Annotated
 
-from email_validator import validate_email
-from fastapi import APIRouter, Body, Depends, Query
+from fastapi import APIRouter, Body, Depends, Header, Query
+from fastapi.responses import StreamingResponse
 from starlette import status
 
-from .dependencies import get_db
-from .constants import USER_CREATE_EXAMPLE, DATETIME_FORMAT, EARLIEST_DATETIME
+from .dependencies import get_db, get_read_db, pin_to_primary
+from .idempotency import idempotent_request, replay_idempotent, idempotent_response, render_balance, render_transfer, \
+    transfer_response
+from .export import export_response
+from .serialization import json_response, logs_response, logs_page_response
+from .constants import USER_CREATE_EXAMPLE, DATETIME_FORMAT, EARLIEST_DATETIME, LOGS_PAGE_DEFAULT_LIMIT, \
+    USERS_PAGE_DEFAULT_LIMIT
 from .schemas import UserCreate, WalletCreate, WalletDB, WalletNumberType, WalletBalanceType, UserDB, AddMoney, \
-    TransferMoney, TransferLogDB
-from .utils import validation_user_id, validation_wallet_number, email_validation_if_exists, \
-    wallet_receiver_validation, validation_transfer_amount, validation_operation_types, validation_date_time
+    TransferMoney, TransferLogDB, TransferBatch, TransferBatchItemResult, TransferLogPage, WalletStatement
+from .utils import validation_user_id, validation_wallet_number, validation_user_wallet, validation_email, \
+    email_validation_if_exists, validation_transfer_amount, validation_transfer, validation_operation_types, \
+    validation_date_time, validation_transfer_batch, validation_logs_page, validation_logs_export, \
+    validation_users_page, validation_statement
 
 from app.database import UserController, WalletController, LogController
 
@@ -28,31 +35,48 @@ router = APIRouter(
 
 @router.post("/", response_model=UserDB, status_code=201)
 def create_user(new_user: UserCreate = Body(example=USER_CREATE_EXAMPLE), db: Session = Depends(get_db)):
-    if validate_email(new_user.email) is False:
-         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="email is not valid")
+    validation_email(new_user.email)
     email_validation_if_exists(new_user.email, db)
     uc = UserController(db)
-    return uc.create_userdb_from_user(new_user)
+    user = uc.create_userdb_from_user(new_user)
+    pin_to_primary(user.id)
+    return user
 
 
 @router.get("/", status_code=status.HTTP_200_OK)
-def read_users(db: Session = Depends(get_db)) -> list[UserDB]:
+def read_users(
+        after_id: int|None = None,
+        limit: int = USERS_PAGE_DEFAULT_LIMIT,
+        email_prefix: str|None = None,
+        surname_prefix: str|None = None,
+        fields: Annotated[str|None, Query(examples={"all_fields": "name,surname,email,id,created_at"})] = None,
+        db: Session = Depends(get_read_db)
+) -> list[dict]:
+    fields = fields.split(",") if fields is not None else None
+    validation_users_page(limit, fields)
     uc = UserController(db)
-    return uc.get_users()
+    return json_response(uc.get_users(
+        after_id=after_id,
+        limit=limit,
+        email_prefix=email_prefix,
+        surname_prefix=surname_prefix,
+        fields=fields
+    ))
 
 
 @router.get("/{user_id}/", status_code=status.HTTP_200_OK, response_model=UserDB)
-def read_user(user_id: int, db: Session = Depends(get_db)):
+def read_user(user_id: int, db: Session = Depends(get_read_db)):
     validation_user_id(user_id, db)
     uc = UserController(db)
     return uc.get_user(user_id)
 
 
 @router.get("/{user_id}/wallets", status_code=status.HTTP_200_OK)
-def read_user_wallets(user_id: int, db: Session = Depends(get_db)) -> dict[WalletNumberType, WalletBalanceType]:
+def read_user_wallets(user_id: int, db: Session = Depends(get_read_db)) -> dict[WalletNumberType, WalletBalanceType]:
     validation_user_id(user_id, db)
     uc = UserController(db)
-    return uc.read_wallets_balance_by_user_id(user_id)
+    balances = uc.read_wallets_balance_by_user_id(user_id)
+    return json_response(balances, balances.values())
 
 
 @router.post("/{user_id}/", status_code=status.HTTP_201_CREATED, response_model=WalletDB)
@@ -75,35 +99,82 @@ def create_wallet_for_user(user_id: int, new_wallet: WalletCreate, db: Session =
     return wc.create_wallet_db_from_wallet_in_db(wallet=new_wallet, user_id=user_id)
 
 
+@router.get("/{user_id}/wallet/{wallet_number}/balance", status_code=status.HTTP_200_OK)
+def read_wallet_balance(
+        user_id: int, wallet_number: WalletNumberType, at: str|None = None, db: Session = Depends(get_db)
+) -> WalletBalanceType:
+    validation_user_id(user_id, db)
+    validation_wallet_number(wallet_number, user_id, db)
+    if at is not None:
+        validation_date_time(at)
+    uc = UserController(db)
+    if at is None:
+        balances = uc.read_wallets_balance_by_user_id(user_id)
+        if wallet_number in balances:
+            return balances[wallet_number]
+    return uc.get_wallet_balance(uc.get_wallet(wallet_number).id, at)
+
+
 @router.post("/{user_id}/wallet/{wallet_number}/top-up", status_code=status.HTTP_202_ACCEPTED)
 def top_up_wallet(
-        user_id: int, wallet_number: WalletNumberType, add_money: AddMoney, db: Session = Depends(get_db)
+        user_id: int,
+        wallet_number: WalletNumberType,
+        add_money: AddMoney,
+        idempotency_key: Annotated[str|None, Header()] = None,
+        db: Session = Depends(get_db)
 ) -> WalletBalanceType:
+    idempotency = idempotent_request(idempotency_key, user_id, wallet_number, "top-up", add_money, render_balance)
+    replay = replay_idempotent(idempotency, db)
+    if replay is not None:
+        return replay
     validation_user_id(user_id, db)
     validation_wallet_number(wallet_number,user_id, db)
     validation_transfer_amount(add_money.amount)
     wc = WalletController(db)
-    return wc.top_up_wallet_balance(add_money, user_id, wallet_number)
+    balance = wc.top_up_wallet_balance(add_money, user_id, wallet_number, idempotency)
+    if idempotency is not None:
+        return idempotent_response(idempotency, balance)
+    return balance
 
 
 @router.post(
     "/{user_id}/wallet/{wallet_number}/send", status_code=status.HTTP_202_ACCEPTED, response_model=TransferLogDB
 )
 def send_money_from_wallet_number(
-        user_id: int, wallet_number: WalletNumberType, transfer_money: TransferMoney, db: Session = Depends(get_db)
+        user_id: int,
+        wallet_number: WalletNumberType,
+        transfer_money: TransferMoney,
+        idempotency_key: Annotated[str|None, Header()] = None,
+        db: Session = Depends(get_db)
 ):
-    validation_user_id(user_id, db)
-    validation_wallet_number(wallet_number, user_id, db)
-    wallet_receiver_validation(transfer_money.receiver, db)
-    validation_transfer_amount(transfer_money.amount)
+    idempotency = idempotent_request(idempotency_key, user_id, wallet_number, "send", transfer_money, render_transfer)
+    replay = replay_idempotent(idempotency, db)
+    if replay is not None:
+        return replay
+    validation_transfer(user_id, wallet_number, transfer_money, db)
 
     wc = WalletController(db)
-    transfer_log = wc.transfer_money_between_wallets(sender_number=wallet_number, transfer_money=transfer_money)
-    if transfer_log is None:
-        raise HTTPException(
-            status_code=status.HTTP_405_METHOD_NOT_ALLOWED, detail="Insufficient funds in the account"
-        )
-    return transfer_log
+    transfer_log = wc.transfer_money_between_wallets(
+        sender_number=wallet_number, transfer_money=transfer_money, idempotency=idempotency
+    )
+    return transfer_response(idempotency, transfer_log)
+
+
+@router.post(
+    "/{user_id}/wallet/{wallet_number}/send-batch",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=list[TransferBatchItemResult]
+)
+def send_money_batch_from_wallet_number(
+        user_id: int, wallet_number: WalletNumberType, transfer_batch: TransferBatch, db: Session = Depends(get_db)
+):
+    validation_user_wallet(user_id, wallet_number, db)
+    rejected = validation_transfer_batch(transfer_batch.transfers)
+
+    wc = WalletController(db)
+    return wc.transfer_money_to_many_wallets(
+        sender_number=wallet_number, transfers=transfer_batch.transfers, rejected=rejected
+    )
 
 
 @router.get("/{user_id}/wallet/{wallet_number}/logs", response_model=list[TransferLogDB], status_code=200)
@@ -120,7 +191,7 @@ def read_logs(
         date_from: str = EARLIEST_DATETIME,
         date_to: str = datetime.strftime(datetime.now(), DATETIME_FORMAT),
         limit: int|None = None,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
     ):
     validation_user_id(user_id, db)
     validation_wallet_number(wallet_number, user_id, db)
@@ -128,10 +199,97 @@ def read_logs(
     validation_date_time(date_from)
     validation_date_time(date_to)
     lc = LogController(db)
-    return lc.get_logs_using_operation_types(
+    return logs_response(lc.get_logs_using_operation_types(
         operation_types = operation_types.split(','),
         wallet_number=wallet_number,
         date_from=date_from,
         date_to=date_to,
         data_limit=limit
+    ))
+
+
+@router.get("/{user_id}/wallet/{wallet_number}/logs/page", response_model=TransferLogPage, status_code=200)
+def read_logs_page(
+        user_id: int,
+        wallet_number: WalletNumberType,
+        operation_types: Annotated[str, Query(
+            examples={
+                "all_logs": "in,out",
+                "logs_input": "in",
+                "logs_output": "out"
+            }
+        )] = "out,in",
+        date_from: str = EARLIEST_DATETIME,
+        date_to: str|None = None,
+        limit: int = LOGS_PAGE_DEFAULT_LIMIT,
+        cursor: str|None = None,
+        db: Session = Depends(get_read_db),
+    ):
+    validation_user_id(user_id, db)
+    validation_wallet_number(wallet_number, user_id, db)
+    validation_operation_types(operation_types.split(","))
+    validation_date_time(date_from)
+    if date_to is not None:
+        validation_date_time(date_to)
+    validation_logs_page(limit, cursor)
+    lc = LogController(db)
+    logs, next_cursor = lc.get_logs_page(
+        operation_types=operation_types.split(','),
+        wallet_number=wallet_number,
+        date_from=date_from,
+        date_to=date_to,
+        data_limit=limit,
+        cursor=cursor
+    )
+    return logs_page_response(logs, next_cursor)
+
+
+@router.get("/{user_id}/wallet/{wallet_number}/statement", response_model=WalletStatement, status_code=200)
+def read_statement(
+        user_id: int,
+        wallet_number: WalletNumberType,
+        date_from: Annotated[str|None, Query(alias="from", examples={"month_start": "2023-04-01"})] = None,
+        date_to: Annotated[str|None, Query(alias="to", examples={"today": "2023-04-27"})] = None,
+        granularity: Annotated[str, Query(examples={"daily": "day", "weekly": "week", "monthly": "month"})] = "day",
+        db: Session = Depends(get_read_db),
+    ):
+    validation_user_id(user_id, db)
+    validation_wallet_number(wallet_number, user_id, db)
+    day_from, day_to = validation_statement(date_from, date_to, granularity)
+    wallet = UserController(db).get_wallet(wallet_number)
+    lc = LogController(db)
+    return lc.get_statement(
+        wallet_number=wallet_number,
+        currency=wallet.currency,
+        date_from=day_from,
+        date_to=day_to,
+        granularity=granularity
+    )
+
+
+@router.get("/{user_id}/wallet/{wallet_number}/logs/export", status_code=200, response_class=StreamingResponse)
+def export_logs(
+        user_id: int,
+        wallet_number: WalletNumberType,
+        operation_types: Annotated[str, Query(
+            examples={
+                "all_logs": "in,out",
+                "logs_input": "in",
+                "logs_output": "out"
+            }
+        )] = "out,in",
+        date_from: str = EARLIEST_DATETIME,
+        date_to: str|None = None,
+        export_format: Annotated[str, Query(alias="format")] = "ndjson",
+        db: Session = Depends(get_read_db),
+    ):
+    validation_user_wallet(user_id, wallet_number, db)
+    validation_logs_export(operation_types, date_from, date_to, export_format)
+    lc = LogController(db)
+    logs = lc.iter_logs(
+        operation_types=operation_types.split(','),
+        wallet_number=wallet_number,
+        date_from=date_from,
+        date_to=date_to
     )
+    return export_response(logs, wallet_number, export_format)
@@ -51,14 +51,60 @@ class TransferLogDB(BaseModel):
     paid_on: str
 
     @validator("paid_on", pre=True)
-    def paid_on_to_str(cls, paid_on: datetime.datetime) -> str:
-        if paid_on:
+    def paid_on_to_str(cls, paid_on: datetime.datetime|str) -> str:
+        if isinstance(paid_on, datetime.datetime):
             return paid_on.strftime(DATETIME_FORMAT)
+        return paid_on
 
     class Config:
         orm_mode = True
 
 
+class TransferLogPage(BaseModel):
+    logs: list[TransferLogDB]
+    next_cursor: Optional[str] = None
+
+
+class TransferBatch(BaseModel):
+    transfers: list[TransferMoney]
+
+
+class TransferBatchItemResult(BaseModel):
+    receiver: WalletNumberType
+    amount: float|int
+    status: str
+    detail: Optional[str] = None
+    transfer: Optional[TransferLogDB] = None
+
+
+class StatementFlows(BaseModel):
+    money_in: float = 0.0
+    money_out: float = 0.0
+    count_in: int = 0
+    count_out: int = 0
+    net_flow: float = 0.0
+
+
+class StatementCounterparty(StatementFlows):
+    currency: CurrencyType
+
+
+class StatementPeriod(StatementFlows):
+    period: datetime.date
+    top_ups: StatementFlows
+    counterparties: list[StatementCounterparty]
+
+
+class WalletStatement(BaseModel):
+    wallet_number: WalletNumberType
+    currency: CurrencyType
+    date_from: datetime.date
+    date_to: datetime.date
+    granularity: str
+    totals: StatementFlows
+    periods: list[StatementPeriod]
+
+
 class UserBase(BaseModel):
     name: str
     surname: str
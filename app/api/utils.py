@@ -1,49 +1,122 @@
-from datetime import datetime
+from datetime import date, datetime
 
+from email_validator import validate_email
 from fastapi import HTTPException
 from pydantic import EmailStr
 from starlette import status
 
-from .schemas import WalletNumberType
-from app.database import controllers, User, Wallet
+from .constants import LOGS_PAGE_MAX_LIMIT, USERS_PAGE_MAX_LIMIT, USER_FIELDS, STATEMENT_DATE_FORMAT, \
+    STATEMENT_GRANULARITIES, STATEMENT_MAX_DAYS
+from .export import EXPORT_FORMATS
+from .schemas import WalletNumberType, TransferMoney
+from app.database import Wallet, controllers
 from ..database.database import Session
+from ..database.async_database import AsyncSession
+from config import config
+
+
+def _user_not_found() -> HTTPException:
+    return HTTPException(status_code=404, detail="User not found", headers={"header": "user not found"})
+
+
+def _user_wallet_not_found(wallet_number: WalletNumberType, user_id: int) -> HTTPException:
+    return HTTPException(
+        status_code=404,
+        detail=f"User #{user_id} has not a {wallet_number} wallet",
+        headers={"header": "wallet not found"}
+    )
+
+
+def _user_wallet_forbidden(wallet_number: WalletNumberType, user_id: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail=f"Wallet '{wallet_number}' doesn't belong to user #{user_id}",
+        headers={"header": "wallet forbidden"}
+    )
+
+
+def _email_already_exists() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail="try entering a different email",
+        headers={"header": "email already exists"}
+    )
+
+
+def _wallet_not_found(wallet_number: WalletNumberType) -> HTTPException:
+    return HTTPException(
+        status_code=404,
+        detail=f"Wallet '{wallet_number}' doesn't exist",
+        headers={"header": "Wallet not found"}
+    )
 
 
 def validation_user_id(user_id: int, db: Session):
     uc = controllers.UserController(db)
-    users_ids = [user.id for user in uc.get_users()]
-    if user_id not in users_ids:
-        raise HTTPException(
-            status_code=404, detail="User not found", headers={"header": "user not found"})
+    if uc.get_user(user_id) is None:
+        raise _user_not_found()
 
 
 def validation_wallet_number(wallet_number: WalletNumberType, user_id: int, db: Session):
     uc = controllers.UserController(db)
-    if wallet_number not in uc.read_wallets_balance_by_user_id(user_id).keys():
-        raise HTTPException(
-            status_code=404,
-            detail=f"User #{user_id} has not a {wallet_number} wallet",
-            headers={"header": "wallet not found"}
-        )
+    _check_user_wallet(uc.get_wallet(wallet_number), wallet_number, user_id)
+
+
+def _check_user_wallet(wallet: Wallet|None, wallet_number: WalletNumberType, user_id: int):
+    if wallet is None:
+        raise _user_wallet_not_found(wallet_number, user_id)
+    if wallet.owner_id != user_id:
+        raise _user_wallet_forbidden(wallet_number, user_id)
 
 
 def email_validation_if_exists(email: EmailStr, db: Session):
-    if db.query(User).filter_by(email=email).first() is not None:
-        raise HTTPException(
-            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail="try entering a different email",
-            headers={"header": "email already exists"}
-        )
+    uc = controllers.UserController(db)
+    if uc.email_exists(email):
+        raise _email_already_exists()
 
 
 def wallet_receiver_validation(wallet_number: WalletNumberType, db: Session):
-    numbers = [number[0] for number in db.query(Wallet.number).all()]
-    if wallet_number not in numbers:
-        raise HTTPException(
-            status_code=404,
-            detail=f"Wallet '{wallet_number}' doesn't exist",
-            headers={"header": "Wallet not found"}
-        )
+    uc = controllers.UserController(db)
+    if uc.get_wallet(wallet_number) is None:
+        raise _wallet_not_found(wallet_number)
+
+
+def validation_user_wallet(user_id: int, wallet_number: WalletNumberType, db: Session):
+    validation_user_id(user_id, db)
+    validation_wallet_number(wallet_number, user_id, db)
+
+
+async def async_validation_user_id(user_id: int, db: AsyncSession):
+    uc = controllers.AsyncUserController(db)
+    if await uc.get_user(user_id) is None:
+        raise _user_not_found()
+
+
+async def async_validation_wallet_number(wallet_number: WalletNumberType, user_id: int, db: AsyncSession):
+    uc = controllers.AsyncUserController(db)
+    _check_user_wallet(await uc.get_wallet(wallet_number), wallet_number, user_id)
+
+
+async def async_email_validation_if_exists(email: EmailStr, db: AsyncSession):
+    uc = controllers.AsyncUserController(db)
+    if await uc.email_exists(email):
+        raise _email_already_exists()
+
+
+async def async_wallet_receiver_validation(wallet_number: WalletNumberType, db: AsyncSession):
+    uc = controllers.AsyncUserController(db)
+    if await uc.get_wallet(wallet_number) is None:
+        raise _wallet_not_found(wallet_number)
+
+
+async def async_validation_user_wallet(user_id: int, wallet_number: WalletNumberType, db: AsyncSession):
+    await async_validation_user_id(user_id, db)
+    await async_validation_wallet_number(wallet_number, user_id, db)
+
+
+def validation_email(email: EmailStr):
+    if validate_email(email, check_deliverability=config.EMAIL_CHECK_DELIVERABILITY) is False:
+         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="email is not valid")
 
 
 def validation_transfer_amount(transfer_amount: float|int):
@@ -62,6 +135,36 @@ def validation_transfer_amount(transfer_amount: float|int):
             headers={"headers": "Expectation failed"}
         )
 
+def validation_transfer(user_id: int, wallet_number: WalletNumberType, transfer_money: TransferMoney, db: Session):
+    validation_user_wallet(user_id, wallet_number, db)
+    wallet_receiver_validation(transfer_money.receiver, db)
+    validation_transfer_amount(transfer_money.amount)
+
+
+async def async_validation_transfer(
+        user_id: int, wallet_number: WalletNumberType, transfer_money: TransferMoney, db: AsyncSession
+):
+    await async_validation_user_wallet(user_id, wallet_number, db)
+    await async_wallet_receiver_validation(transfer_money.receiver, db)
+    validation_transfer_amount(transfer_money.amount)
+
+
+def validation_transfer_batch(transfers: list[TransferMoney]) -> dict[int, str]:
+    if not transfers or len(transfers) > config.TRANSFER_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_417_EXPECTATION_FAILED,
+            detail=f"A batch must contain from 1 to {config.TRANSFER_BATCH_MAX_SIZE} transfers",
+            headers={"headers": "Expectation failed"}
+        )
+    rejected = {}
+    for index, transfer in enumerate(transfers):
+        try:
+            validation_transfer_amount(transfer.amount)
+        except HTTPException as exc:
+            rejected[index] = exc.detail
+    return rejected
+
+
 def validation_operation_types(operation_types: list):
     if len(operation_types) > 2:
         raise HTTPException(
@@ -86,3 +189,81 @@ def validation_date_time(date_time: str):
             detail=f"Time data {date_time} does not match format '%Y-%m-%d %H:%M:%S'",
             headers={"headers": "Expectation failed"}
         )
+
+
+def validation_logs_page(limit: int, cursor: str|None):
+    if not 0 < limit <= LOGS_PAGE_MAX_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_417_EXPECTATION_FAILED,
+            detail=f"Limit must be between 1 and {LOGS_PAGE_MAX_LIMIT}",
+            headers={"headers": "Expectation failed"}
+        )
+    if cursor is None:
+        return
+    try:
+        controllers.LogController.decode_cursor(cursor)
+    except (ValueError, TypeError, AttributeError):
+        raise HTTPException(
+            status_code=status.HTTP_417_EXPECTATION_FAILED,
+            detail="Invalid cursor",
+            headers={"headers": "Expectation failed"}
+        )
+
+
+def validation_export_format(export_format: str):
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_417_EXPECTATION_FAILED,
+            detail=f"Export format must be one of: {', '.join(EXPORT_FORMATS)}",
+            headers={"headers": "Expectation failed"}
+        )
+
+
+def validation_logs_export(operation_types: str, date_from: str, date_to: str|None, export_format: str):
+    validation_operation_types(operation_types.split(","))
+    validation_date_time(date_from)
+    if date_to is not None:
+        validation_date_time(date_to)
+    validation_export_format(export_format)
+
+
+def validation_users_page(limit: int, fields: list[str]|None):
+    if not 0 < limit <= USERS_PAGE_MAX_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_417_EXPECTATION_FAILED,
+            detail=f"Limit must be between 1 and {USERS_PAGE_MAX_LIMIT}",
+            headers={"headers": "Expectation failed"}
+        )
+    if fields is not None and (not fields or not set(fields) <= set(USER_FIELDS)):
+        raise HTTPException(
+            status_code=status.HTTP_417_EXPECTATION_FAILED,
+            detail=f"Fields must be some of: {', '.join(USER_FIELDS)}",
+            headers={"headers": "Expectation failed"}
+        )
+
+
+def validation_statement(date_from: str|None, date_to: str|None, granularity: str) -> tuple[date, date]:
+    """Returns the first and last day of the statement, by default the current month up to today."""
+    if granularity not in STATEMENT_GRANULARITIES:
+        raise HTTPException(
+            status_code=status.HTTP_417_EXPECTATION_FAILED,
+            detail=f"Granularity must be one of: {', '.join(STATEMENT_GRANULARITIES)}",
+            headers={"headers": "Expectation failed"}
+        )
+    try:
+        day_to = datetime.strptime(date_to, STATEMENT_DATE_FORMAT).date() if date_to is not None else date.today()
+        day_from = datetime.strptime(date_from, STATEMENT_DATE_FORMAT).date() if date_from is not None \
+            else day_to.replace(day=1)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_417_EXPECTATION_FAILED,
+            detail=f"Dates must match format '{STATEMENT_DATE_FORMAT}'",
+            headers={"headers": "Expectation failed"}
+        )
+    if not 0 <= (day_to - day_from).days < STATEMENT_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_417_EXPECTATION_FAILED,
+            detail=f"'from' must be on or before 'to' and cover at most {STATEMENT_MAX_DAYS} days",
+            headers={"headers": "Expectation failed"}
+        )
+    return day_from, day_to
@@ -1,2 +1,4 @@
-from .client import Client
+from .client import Client, AsyncClient, CircuitBreaker, CurrencyApiError, CircuitOpenError
 from .controller import Controller
+from .rate_matrix import RateMatrix
+from .rates_store import RatesStore, RatesUnavailableError, rates_store
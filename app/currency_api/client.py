@@ -1,14 +1,165 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Optional
+
+import httpx
 import requests
-from requests.structures import CaseInsensitiveDict
+from requests.adapters import HTTPAdapter
+
+from config import config
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class CurrencyApiError(Exception):
+    pass
+
+
+class CircuitOpenError(CurrencyApiError):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None and time.monotonic() - self._opened_at < self.reset_timeout
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
 
-class Client:
-    def __init__(self, currency_exchange_api_key: str):
+def backoff_delay(attempt: int, base: float, maximum: float) -> float:
+    return random.uniform(0, min(maximum, base * 2 ** attempt))
+
+
+class BaseClient:
+    def __init__(
+            self,
+            currency_exchange_api_key: str,
+            connect_timeout: float = config.CURRENCY_API_CONNECT_TIMEOUT,
+            read_timeout: float = config.CURRENCY_API_READ_TIMEOUT,
+            retries: int = config.CURRENCY_API_RETRIES,
+            backoff_base: float = config.CURRENCY_API_BACKOFF_BASE,
+            backoff_max: float = config.CURRENCY_API_BACKOFF_MAX,
+            pool_size: int = config.CURRENCY_API_POOL_SIZE,
+            circuit_breaker: Optional[CircuitBreaker] = None
+    ):
         self.currency_exchange_api_key = currency_exchange_api_key
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pool_size = pool_size
+        if circuit_breaker is None:
+            circuit_breaker = CircuitBreaker(
+                failure_threshold=config.CURRENCY_API_BREAKER_THRESHOLD,
+                reset_timeout=config.CURRENCY_API_BREAKER_RESET_TIMEOUT
+            )
+        self.circuit_breaker = circuit_breaker
         self.latest_currency_rates = None
 
+    def _check_circuit(self):
+        if not self.circuit_breaker.allow_request():
+            raise CircuitOpenError("currency exchange API is unavailable, circuit is open")
+
+    def _delay(self, attempt: int) -> float:
+        return backoff_delay(attempt, base=self.backoff_base, maximum=self.backoff_max)
+
+
+class Client(BaseClient):
+    def __init__(self, currency_exchange_api_key: str, **kwargs):
+        super().__init__(currency_exchange_api_key, **kwargs)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["apikey"] = self.currency_exchange_api_key
+
     def get_latest_currency_rates(self, api_url: str):
         if self.latest_currency_rates is None:
-            headers = CaseInsensitiveDict()
-            headers["apikey"] = self.currency_exchange_api_key
-            resp = requests.get(api_url, headers=headers)
-            self.latest_currency_rates = resp.json()
\ No newline at end of file
+            self.fetch_latest_currency_rates(api_url)
+
+    def fetch_latest_currency_rates(self, api_url: str) -> dict:
+        self._check_circuit()
+        for attempt in range(self.retries + 1):
+            try:
+                resp = self.session.get(api_url, timeout=(self.connect_timeout, self.read_timeout))
+                if resp.status_code in RETRY_STATUS_CODES:
+                    raise CurrencyApiError(f"currency exchange API responded with {resp.status_code}")
+                resp.raise_for_status()
+                self.latest_currency_rates = resp.json()
+            except (requests.RequestException, ValueError, CurrencyApiError) as exc:
+                self.circuit_breaker.record_failure()
+                retryable = not isinstance(exc, requests.HTTPError)
+                if not retryable or attempt == self.retries or self.circuit_breaker.is_open:
+                    raise CurrencyApiError(f"failed to fetch currency rates: {exc}") from exc
+                time.sleep(self._delay(attempt))
+            else:
+                self.circuit_breaker.record_success()
+                return self.latest_currency_rates
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncClient(BaseClient):
+    def __init__(self, currency_exchange_api_key: str, **kwargs):
+        super().__init__(currency_exchange_api_key, **kwargs)
+        self.session = httpx.AsyncClient(
+            headers={"apikey": self.currency_exchange_api_key},
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+        )
+
+    async def get_latest_currency_rates(self, api_url: str):
+        if self.latest_currency_rates is None:
+            await self.fetch_latest_currency_rates(api_url)
+
+    async def fetch_latest_currency_rates(self, api_url: str) -> dict:
+        self._check_circuit()
+        for attempt in range(self.retries + 1):
+            try:
+                resp = await self.session.get(api_url)
+                if resp.status_code in RETRY_STATUS_CODES:
+                    raise CurrencyApiError(f"currency exchange API responded with {resp.status_code}")
+                resp.raise_for_status()
+                self.latest_currency_rates = resp.json()
+            except (httpx.HTTPError, ValueError, CurrencyApiError) as exc:
+                self.circuit_breaker.record_failure()
+                retryable = not isinstance(exc, httpx.HTTPStatusError)
+                if not retryable or attempt == self.retries or self.circuit_breaker.is_open:
+                    raise CurrencyApiError(f"failed to fetch currency rates: {exc}") from exc
+                await asyncio.sleep(self._delay(attempt))
+            else:
+                self.circuit_breaker.record_success()
+                return self.latest_currency_rates
+
+    async def close(self):
+        await self.session.aclose()
\ No newline at end of file
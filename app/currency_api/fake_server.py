@@ -0,0 +1,93 @@
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+DEFAULT_RATES = {
+    "USD": 1.0,
+    "EUR": 0.92,
+    "PLN": 4.12,
+    "GBP": 0.79,
+    "CHF": 0.89,
+    "JPY": 139.5,
+}
+
+
+class FakeRatesServer:
+    def __init__(self, rates: Optional[dict] = None, host: str = "127.0.0.1", port: int = 0):
+        self.rates = dict(DEFAULT_RATES if rates is None else rates)
+        self.delay = 0.0
+        self.status_codes: list[int] = []
+        self.requests_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1/latest"
+
+    def fail_next(self, *status_codes: int):
+        with self._lock:
+            self.status_codes.extend(status_codes)
+
+    def _next_response(self) -> tuple[int, dict]:
+        with self._lock:
+            self.requests_count += 1
+            status_code = self.status_codes.pop(0) if self.status_codes else 200
+        if status_code != 200:
+            return status_code, {"message": "fake upstream error"}
+        return status_code, self.rates
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                status_code, payload = server._next_response()
+                if server.delay:
+                    time.sleep(server.delay)
+                body = json.dumps(payload).encode()
+                self.send_response(status_code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FakeRatesServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-rates-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeRatesServer":
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve fake currency exchange rates for offline development")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    fake_server = FakeRatesServer(host=args.host, port=args.port)
+    print(f"Serving fake currency rates on {fake_server.url}")
+    fake_server.serve_forever()
@@ -0,0 +1,60 @@
+from typing import Iterable, Union
+
+import numpy as np
+
+CurrencyCodes = Union[Iterable[str], np.ndarray]
+
+MINOR_UNITS = 100
+
+
+class RateMatrix:
+    def __init__(self, rates: dict):
+        self.rates = rates
+        self.currencies = np.array(
+            sorted(code for code, rate in rates.items() if isinstance(rate, (int, float)) and rate > 0)
+        )
+        self.indices = {str(code): index for index, code in enumerate(self.currencies)}
+        rates_by_dollar = np.array([rates[code] for code in self.currencies], dtype=np.float64)
+        cross_rates = rates_by_dollar[np.newaxis, :] / rates_by_dollar[:, np.newaxis]
+        self.matrix = np.round(cross_rates, 2)
+        self.minor_matrix = np.rint(self.matrix * MINOR_UNITS).astype(np.int64)
+
+    def __contains__(self, currency: str) -> bool:
+        return currency in self.indices
+
+    def index_of(self, currency: str) -> int:
+        return self.indices[currency]
+
+    def indices_of(self, currencies: CurrencyCodes) -> np.ndarray:
+        currencies = np.asarray(currencies)
+        indices = np.searchsorted(self.currencies, currencies)
+        found = indices < len(self.currencies)
+        found[found] = self.currencies[indices[found]] == currencies[found]
+        if not found.all():
+            unknown = sorted(set(currencies[~found].tolist()))
+            raise KeyError(f"Unknown currencies: {', '.join(unknown)}")
+        return indices
+
+    def rate(self, currency_sender: str, currency_receiver: str) -> float:
+        return float(self.matrix[self.indices[currency_sender], self.indices[currency_receiver]])
+
+    def convert(self, currency_sender: str, currency_receiver: str, amount: float) -> float:
+        return float(self.convert_indices(self.indices[currency_sender], self.indices[currency_receiver], amount))
+
+    def convert_indices(
+            self, sender_indices: np.ndarray, receiver_indices: np.ndarray, amounts: np.ndarray
+    ) -> np.ndarray:
+        # Amounts and rates have two decimals, so their product in minor units squared is exact; it is rounded half
+        # to even to minor units.
+        amounts = np.rint(np.asarray(amounts, dtype=np.float64) * MINOR_UNITS).astype(np.int64)
+        converted, remainder = np.divmod(amounts * self.minor_matrix[sender_indices, receiver_indices], MINOR_UNITS)
+        half = MINOR_UNITS // 2
+        converted = converted + ((remainder > half) | ((remainder == half) & (converted % 2 == 1)))
+        return converted / MINOR_UNITS
+
+    def convert_batch(
+            self, currencies_sender: CurrencyCodes, currencies_receiver: CurrencyCodes, amounts: np.ndarray
+    ) -> np.ndarray:
+        return self.convert_indices(
+            self.indices_of(currencies_sender), self.indices_of(currencies_receiver), amounts
+        )
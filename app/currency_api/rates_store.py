@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Awaitable, Callable, Optional
+
+from app.currency_api.client import AsyncClient, Client
+from app.currency_api.rate_matrix import RateMatrix
+from app.request_profile import currency_api_call
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+class RatesUnavailableError(Exception):
+    pass
+
+
+class RatesStore:
+    def __init__(
+            self,
+            fetch_rates: Callable[[], dict],
+            ttl: float,
+            refresh_ahead: float = 0.0,
+            max_stale: Optional[float] = None,
+            retry_interval: float = 5.0,
+            fetch_rates_async: Optional[Callable[[], Awaitable[dict]]] = None
+    ):
+        self._fetch_rates = fetch_rates
+        self._fetch_rates_async = fetch_rates_async
+        self.ttl = ttl
+        self.refresh_ahead = min(refresh_ahead, ttl)
+        self.max_stale = max_stale
+        self.retry_interval = retry_interval
+        self._rates: Optional[dict] = None
+        self._fetched_at = 0.0
+        self._version = 0
+        self._matrix: Optional[RateMatrix] = None
+        self._refresh_lock = threading.Lock()
+        self._async_refresh_lock: Optional[asyncio.Lock] = None
+        self._refresher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def age(self) -> float:
+        return time.monotonic() - self._fetched_at
+
+    def get_rates(self) -> dict:
+        rates = self._rates
+        if rates is None:
+            return self._refresh()
+
+        age = self.age()
+        if self.max_stale is not None and age >= self.ttl + self.max_stale:
+            try:
+                return self._refresh()
+            except RatesUnavailableError:
+                return rates
+        if age >= self.ttl - self.refresh_ahead:
+            self._refresh_in_background()
+        return rates
+
+    async def get_rates_async(self) -> dict:
+        """Like get_rates, but a missing or too stale snapshot is fetched without blocking the event loop."""
+        rates = self._rates
+        if rates is None:
+            return await self._refresh_async()
+
+        age = self.age()
+        if self.max_stale is not None and age >= self.ttl + self.max_stale:
+            try:
+                return await self._refresh_async()
+            except RatesUnavailableError:
+                return rates
+        if age >= self.ttl - self.refresh_ahead:
+            self._refresh_in_background()
+        return rates
+
+    def get_rate_matrix(self) -> RateMatrix:
+        return self._matrix_of(self.get_rates())
+
+    async def get_rate_matrix_async(self) -> RateMatrix:
+        return self._matrix_of(await self.get_rates_async())
+
+    def _matrix_of(self, rates: dict) -> RateMatrix:
+        matrix = self._matrix
+        if matrix is None or matrix.rates is not rates:
+            matrix = RateMatrix(rates)
+            self._matrix = matrix
+        return matrix
+
+    def invalidate(self):
+        self._fetched_at = 0.0
+
+    def _refresh(self) -> dict:
+        version = self._version
+        with self._refresh_lock:
+            if self._version != version and self._rates is not None:
+                return self._rates
+            with currency_api_call():
+                return self._fetch()
+
+    async def _refresh_async(self) -> dict:
+        if self._fetch_rates_async is None:
+            return await asyncio.to_thread(self._refresh)
+        if self._async_refresh_lock is None:
+            self._async_refresh_lock = asyncio.Lock()
+        version = self._version
+        async with self._async_refresh_lock:
+            if self._version != version and self._rates is not None:
+                return self._rates
+            try:
+                with currency_api_call():
+                    rates = await self._fetch_rates_async()
+            except Exception as exc:
+                raise self._unavailable(exc) from exc
+            return self._store(rates)
+
+    def _refresh_in_background(self):
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+
+        def refresh():
+            try:
+                self._fetch()
+            except RatesUnavailableError:
+                pass
+            finally:
+                self._refresh_lock.release()
+
+        threading.Thread(target=refresh, name="rates-refresh", daemon=True).start()
+
+    def _fetch(self) -> dict:
+        try:
+            rates = self._fetch_rates()
+        except Exception as exc:
+            raise self._unavailable(exc) from exc
+        return self._store(rates)
+
+    def _unavailable(self, exc: Exception) -> RatesUnavailableError:
+        logger.warning("Exchange rates refresh failed: %s", exc)
+        if self._rates is not None:
+            return RatesUnavailableError("serving stale exchange rates")
+        return RatesUnavailableError("exchange rates are unavailable")
+
+    def _store(self, rates: dict) -> dict:
+        if not rates:
+            raise RatesUnavailableError("exchange rates API returned no rates")
+        self._rates = rates
+        self._fetched_at = time.monotonic()
+        self._version += 1
+        return rates
+
+    def start_background_refresh(self):
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.is_set():
+                if self._rates is None or self.age() >= self.ttl - self.refresh_ahead:
+                    with self._refresh_lock:
+                        try:
+                            self._fetch()
+                        except RatesUnavailableError:
+                            pass
+                delay = self.ttl - self.refresh_ahead - self.age()
+                self._stop.wait(delay if delay > 0 else self.retry_interval)
+
+        self._refresher = threading.Thread(target=run, name="rates-refresher", daemon=True)
+        self._refresher.start()
+
+    def stop_background_refresh(self):
+        self._stop.set()
+
+
+client = Client(currency_exchange_api_key=config.CURRENCY_EXCHANGE_API_KEY)
+# Created on first use and closed at shutdown, its connections belong to the event loop serving the app.
+async_client: Optional[AsyncClient] = None
+
+
+def fetch_latest_rates() -> dict:
+    return client.fetch_latest_currency_rates(config.CURRENCY_EXCHANGE_API_URL)
+
+
+async def fetch_latest_rates_async() -> dict:
+    global async_client
+    if async_client is None:
+        async_client = AsyncClient(
+            currency_exchange_api_key=config.CURRENCY_EXCHANGE_API_KEY, circuit_breaker=client.circuit_breaker
+        )
+    return await async_client.fetch_latest_currency_rates(config.CURRENCY_EXCHANGE_API_URL)
+
+
+async def close_async_client():
+    global async_client
+    if async_client is not None:
+        closing, async_client = async_client, None
+        await closing.close()
+
+
+rates_store = RatesStore(
+    fetch_rates=fetch_latest_rates,
+    ttl=config.CURRENCY_RATES_TTL,
+    refresh_ahead=config.CURRENCY_RATES_REFRESH_AHEAD,
+    max_stale=config.CURRENCY_RATES_MAX_STALE,
+    fetch_rates_async=fetch_latest_rates_async,
+)
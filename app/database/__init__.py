@@ -1,3 +1,5 @@
 from .controllers import *
 from .models import *
 from .database import Session
+from .async_database import AsyncSession
+from .request_cache import RequestCache, get_request_cache
@@ -0,0 +1,32 @@
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.database.database import url_object, pool_options, replica_urls, replicas
+from app.request_profile import profile_queries
+from app.database.pool_metrics import InstrumentedAsyncAdaptedQueuePool, instrument_engine
+from config import config
+
+async_engine = create_async_engine(
+    url_object.set(drivername="postgresql+asyncpg"),
+    poolclass=InstrumentedAsyncAdaptedQueuePool,
+    pool_logging_name="primary_async",
+    **pool_options()
+)
+instrument_engine(async_engine.sync_engine, "primary_async")
+profile_queries(async_engine.sync_engine)
+
+# Indexed like ``replica_engines``, whose health checks also decide which of these take reads.
+async_replica_engines = []
+for index, replica_url in enumerate(replica_urls):
+    async_replica_engine = create_async_engine(
+        replica_url.set(drivername="postgresql+asyncpg"),
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        pool_logging_name=f"replica{index}_async",
+        connect_args={"timeout": config.DB_REPLICA_CONNECT_TIMEOUT},
+        **pool_options()
+    )
+    instrument_engine(async_replica_engine.sync_engine, f"replica{index}_async")
+    profile_queries(async_replica_engine.sync_engine)
+    replicas.watch_errors(index, async_replica_engine.sync_engine)
+    async_replica_engines.append(async_replica_engine)
+
+AsyncSession = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
@@ -0,0 +1,157 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Iterable, NamedTuple, Optional
+
+from prometheus_client import Counter
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession
+
+from app.api.schemas import WalletNumberType, WalletBalanceType
+from app.database.database import Session
+from app.database.replicas import on_replica
+from config import config
+
+PENDING_INVALIDATIONS_KEY = "balance_cache_invalidations"
+STRIPES = 4096
+WALLET_STRIPE = 0
+USER_STRIPE = 1
+
+lookups = Counter("balance_cache_lookups", "Reads of a user's wallet balances by outcome", ["result"])
+
+
+class CachedBalances(NamedTuple):
+    balances: dict[WalletNumberType, WalletBalanceType]
+    wallet_ids: tuple[int, ...]
+    expires_at: float
+
+
+class PendingInvalidations(NamedTuple):
+    wallet_ids: set[int]
+    user_ids: set[int]
+
+
+class BalanceCache:
+    """Keeps the wallet balances of up to ``size`` users in an LRU for at most ``ttl`` seconds.
+
+    Writers record the wallets and users they touch with ``invalidate_on_commit`` and the entries are dropped
+    once the session commits. A read that raced the commit could still store balances from before it, so each
+    invalidation stamps a stripe per wallet and user with a sequence number and a read only stores its result if
+    none of its stripes moved past the sequence number it started at. ``ttl`` bounds staleness from writes this
+    process does not see, such as jobs or other workers.
+    """
+
+    def __init__(self, size: int = config.BALANCE_CACHE_SIZE, ttl: float = config.BALANCE_CACHE_TTL):
+        self.size = size
+        self.ttl = ttl
+        self._users: OrderedDict[int, CachedBalances] = OrderedDict()
+        self._owners: dict[int, int] = {}
+        self._stamps = [0] * STRIPES
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def balances(
+            self, db: Session, user_id: int, load: Callable[[], Iterable]
+    ) -> dict[WalletNumberType, WalletBalanceType]:
+        """Returns the user's balances from memory, or from ``load`` rows of id, number and balance."""
+        balances, since = self._lookup(user_id)
+        if balances is not None:
+            return balances
+        return self._loaded(db, user_id, since, list(load()))
+
+    async def balances_async(
+            self, db: Session, user_id: int, load: Callable[[], Awaitable[Iterable]]
+    ) -> dict[WalletNumberType, WalletBalanceType]:
+        """Like ``balances``, with rows awaited from ``load``; ``db`` is the AsyncSession's sync_session."""
+        balances, since = self._lookup(user_id)
+        if balances is not None:
+            return balances
+        return self._loaded(db, user_id, since, list(await load()))
+
+    def _lookup(self, user_id: int) -> tuple[Optional[dict[WalletNumberType, WalletBalanceType]], int]:
+        with self._lock:
+            since = self._sequence
+            cached = self._users.get(user_id)
+            if cached is not None and cached.expires_at > time.monotonic():
+                self._users.move_to_end(user_id)
+                lookups.labels(result="hit").inc()
+                return dict(cached.balances), since
+        lookups.labels(result="miss").inc()
+        return None, since
+
+    def _loaded(
+            self, db: Session, user_id: int, since: int, wallets: list
+    ) -> dict[WalletNumberType, WalletBalanceType]:
+        balances = {wallet.number: wallet.balance for wallet in wallets}
+        # Balances written earlier in this transaction are not committed yet, so they must not be shared; balances
+        # read on a replica may be up to DB_REPLICA_MAX_LAG old, and the cache also serves reads of the primary.
+        if self.size > 0 and PENDING_INVALIDATIONS_KEY not in db.info and not on_replica(db):
+            self._store(user_id, since, balances, tuple(wallet.id for wallet in wallets))
+        return balances
+
+    def invalidate_on_commit(self, db: Session, wallet_ids: Iterable[int] = (), user_ids: Iterable[int] = ()):
+        pending = db.info.setdefault(PENDING_INVALIDATIONS_KEY, {}).get(self)
+        if pending is None:
+            pending = db.info[PENDING_INVALIDATIONS_KEY][self] = PendingInvalidations(set(), set())
+        pending.wallet_ids.update(wallet_ids)
+        pending.user_ids.update(user_ids)
+
+    def invalidate(self, wallet_ids: Iterable[int] = (), user_ids: Iterable[int] = ()):
+        with self._lock:
+            self._sequence += 1
+            user_ids = set(user_ids)
+            for wallet_id in wallet_ids:
+                self._stamps[self._stripe(WALLET_STRIPE, wallet_id)] = self._sequence
+                if wallet_id in self._owners:
+                    user_ids.add(self._owners[wallet_id])
+            for user_id in user_ids:
+                self._stamps[self._stripe(USER_STRIPE, user_id)] = self._sequence
+                self._evict(user_id)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+            self._owners.clear()
+
+    def _store(
+            self,
+            user_id: int,
+            since: int,
+            balances: dict[WalletNumberType, WalletBalanceType],
+            wallet_ids: tuple[int, ...]
+    ):
+        with self._lock:
+            stripes = [
+                self._stripe(USER_STRIPE, user_id), *[self._stripe(WALLET_STRIPE, wallet_id) for wallet_id in wallet_ids]
+            ]
+            if any(self._stamps[stripe] > since for stripe in stripes):
+                return
+            self._evict(user_id)
+            self._users[user_id] = CachedBalances(balances, wallet_ids, time.monotonic() + self.ttl)
+            self._owners.update((wallet_id, user_id) for wallet_id in wallet_ids)
+            while len(self._users) > self.size:
+                self._evict(next(iter(self._users)))
+
+    def _evict(self, user_id: int):
+        cached = self._users.pop(user_id, None)
+        if cached is not None:
+            for wallet_id in cached.wallet_ids:
+                self._owners.pop(wallet_id, None)
+
+    @staticmethod
+    def _stripe(kind: int, key: int) -> int:
+        return (key * 2 + kind) % STRIPES
+
+
+balance_cache = BalanceCache()
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _invalidate_committed(db: OrmSession):
+    for cache, pending in db.info.pop(PENDING_INVALIDATIONS_KEY, {}).items():
+        cache.invalidate(pending.wallet_ids, pending.user_ids)
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _discard_rolled_back(db: OrmSession):
+    db.info.pop(PENDING_INVALIDATIONS_KEY, None)
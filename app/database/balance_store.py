@@ -0,0 +1,282 @@
+import random
+from abc import ABC, abstractmethod
+from typing import NamedTuple, Optional
+
+from sqlalchemy import Select, select, update, insert, delete, values, column, cast, case, func, or_, tuple_, \
+    Integer, Float, Numeric
+
+from app.api.schemas import WalletNumberType
+from app.database.database import Session
+from app.database.ledger import select_ledger_balances
+from app.database.models import Wallet, WalletBalanceSlot
+from config import config
+
+
+class WalletBalance(NamedTuple):
+    id: int
+    number: WalletNumberType
+    currency: str
+    balance: Optional[float]
+    balance_slots: Optional[int] = None
+    slots: tuple[tuple[int, float], ...] = ()
+
+
+class BalanceStore(ABC):
+    @abstractmethod
+    def select_balances(self) -> Select:
+        """Selects id, number, currency and balance of wallets; callers filter it on ``Wallet`` columns."""
+
+    @abstractmethod
+    def lock_wallets(
+            self, db: Session, numbers: list[WalletNumberType], debit_numbers: set[WalletNumberType]
+    ) -> dict[WalletNumberType, WalletBalance]:
+        """Loads the wallets and locks what debits of ``debit_numbers`` serialise on; only their balances are exact."""
+
+    @abstractmethod
+    def apply_deltas(self, db: Session, deltas: dict[int, float], wallets: dict[WalletNumberType, WalletBalance]):
+        """Applies per wallet id balance deltas to the ``wallets`` returned by ``lock_wallets``."""
+
+    @abstractmethod
+    def top_up(self, db: Session, wallet_id: int, amount: float) -> float:
+        ...
+
+    def get_balances(self, db: Session, wallet_ids: list[int]) -> dict[int, float]:
+        rows = db.execute(self.select_balances().where(Wallet.id.in_(wallet_ids)))
+        return {row.id: row.balance for row in rows}
+
+
+class ColumnBalanceStore(BalanceStore):
+    """Keeps balances in ``wallets.balance``; every debit and credit locks and rewrites the wallet rows."""
+
+    def select_balances(self) -> Select:
+        return select(Wallet.id, Wallet.number, Wallet.currency, Wallet.balance)
+
+    def lock_wallets(
+            self, db: Session, numbers: list[WalletNumberType], debit_numbers: set[WalletNumberType]
+    ) -> dict[WalletNumberType, WalletBalance]:
+        wallets = db.execute(
+            self.select_balances().where(Wallet.number.in_(numbers)).order_by(Wallet.id).with_for_update()
+        ).all()
+        return {wallet.number: WalletBalance(*wallet) for wallet in wallets}
+
+    def apply_deltas(self, db: Session, deltas: dict[int, float], wallets: dict[WalletNumberType, WalletBalance]):
+        balance_deltas = values(
+            column("id", Integer), column("delta", Float), name="balance_deltas"
+        ).data(list(deltas.items()))
+        db.execute(
+            update(Wallet).where(
+                Wallet.id == balance_deltas.c.id
+            ).values(
+                balance=func.round(cast(Wallet.balance + balance_deltas.c.delta, Numeric), 2)
+            ).execution_options(synchronize_session=False)
+        )
+
+    def top_up(self, db: Session, wallet_id: int, amount: float) -> float:
+        return db.execute(
+            update(Wallet).where(
+                Wallet.id == wallet_id
+            ).values(
+                balance=Wallet.balance + amount
+            ).returning(Wallet.balance)
+        ).scalar_one()
+
+
+class LedgerBalanceStore(BalanceStore):
+    """Derives balances from the last ledger snapshot plus the entries since; ``wallets.balance`` goes stale."""
+
+    def select_balances(self) -> Select:
+        return select_ledger_balances()
+
+    def lock_wallets(
+            self, db: Session, numbers: list[WalletNumberType], debit_numbers: set[WalletNumberType]
+    ) -> dict[WalletNumberType, WalletBalance]:
+        wallets = db.execute(
+            select(Wallet.id, Wallet.number, Wallet.currency).where(Wallet.number.in_(numbers))
+        ).all()
+        debit_ids = sorted(wallet.id for wallet in wallets if wallet.number in debit_numbers)
+        balances = {}
+        if debit_ids:
+            # Only debits serialise, on the debited wallet rows; FOR NO KEY UPDATE lets credits' FK checks through.
+            db.execute(select(Wallet.id).where(Wallet.id.in_(debit_ids)).order_by(Wallet.id).with_for_update(
+                key_share=True
+            ))
+            balances = self.get_balances(db, debit_ids)
+        return {
+            wallet.number: WalletBalance(wallet.id, wallet.number, wallet.currency, balances.get(wallet.id))
+            for wallet in wallets
+        }
+
+    def apply_deltas(self, db: Session, deltas: dict[int, float], wallets: dict[WalletNumberType, WalletBalance]):
+        pass
+
+    def top_up(self, db: Session, wallet_id: int, amount: float) -> float:
+        return self.get_balances(db, [wallet_id])[wallet_id]
+
+
+def plan_slot_debits(slots: tuple[tuple[int, float], ...], amount: float) -> list[tuple[int, float]]:
+    """Splits a debit of ``amount`` into ``(slot, taken)`` pairs, from one random slot holding it all if any."""
+    funded = [slot for slot, balance in slots if balance >= amount]
+    if funded:
+        return [(random.choice(funded), amount)]
+    taken = []
+    for slot, balance in sorted(slots, key=lambda slot_balance: slot_balance[1], reverse=True):
+        if amount <= 0:
+            break
+        if balance > 0:
+            taken.append((slot, min(balance, amount)))
+            amount = round(amount - balance, 2)
+    return taken
+
+
+class ShardedBalanceStore(ColumnBalanceStore):
+    """The column store, except for wallets split by ``shard_wallet`` into slots that credits lock one at a time."""
+
+    def select_balances(self) -> Select:
+        slots_balance = select(func.sum(WalletBalanceSlot.balance)).where(
+            WalletBalanceSlot.wallet_id == Wallet.id
+        ).scalar_subquery()
+        balance = case(
+            (Wallet.balance_slots.is_(None), Wallet.balance),
+            else_=cast(func.round(cast(func.coalesce(slots_balance, 0.0), Numeric), 2), Float)
+        )
+        return select(Wallet.id, Wallet.number, Wallet.currency, balance.label("balance"), Wallet.balance_slots)
+
+    def lock_wallets(
+            self, db: Session, numbers: list[WalletNumberType], debit_numbers: set[WalletNumberType]
+    ) -> dict[WalletNumberType, WalletBalance]:
+        wallets = {
+            wallet.number: WalletBalance(*wallet)
+            for wallet in db.execute(
+                select(Wallet.id, Wallet.number, Wallet.currency, Wallet.balance).where(
+                    Wallet.number.in_(numbers), Wallet.balance_slots.is_(None)
+                ).order_by(Wallet.id).with_for_update()
+            )
+        }
+        remaining = set(numbers) - wallets.keys()
+        if not remaining:
+            return wallets
+
+        sharded = db.execute(
+            select(Wallet.id, Wallet.number, Wallet.currency, Wallet.balance, Wallet.balance_slots).where(
+                Wallet.number.in_(remaining)
+            ).order_by(Wallet.id).with_for_update(read=True, key_share=True)
+        ).all()
+        # A wallet merged back by shard_wallet between the two reads is only share locked so far. Upgrading the lock
+        # can deadlock with another transfer doing the same, which run_in_transaction retries.
+        merged = [wallet.number for wallet in sharded if wallet.balance_slots is None]
+        if merged:
+            wallets.update(super().lock_wallets(db, merged, debit_numbers))
+        sharded = [wallet for wallet in sharded if wallet.balance_slots is not None]
+        if not sharded:
+            return wallets
+
+        # Credit slots are picked here rather than when applying deltas, so that every transaction locks slots
+        # in (wallet_id, slot) order after the plain wallet rows and two opposite transfers cannot deadlock.
+        debit_ids = [wallet.id for wallet in sharded if wallet.number in debit_numbers]
+        credit_slots = [
+            (wallet.id, random.randrange(wallet.balance_slots))
+            for wallet in sharded if wallet.number not in debit_numbers
+        ]
+        locked_slots = []
+        if debit_ids:
+            locked_slots.append(WalletBalanceSlot.wallet_id.in_(debit_ids))
+        if credit_slots:
+            locked_slots.append(tuple_(WalletBalanceSlot.wallet_id, WalletBalanceSlot.slot).in_(credit_slots))
+        slots = {}
+        for slot in db.execute(
+            select(WalletBalanceSlot.wallet_id, WalletBalanceSlot.slot, WalletBalanceSlot.balance).where(
+                or_(*locked_slots)
+            ).order_by(WalletBalanceSlot.wallet_id, WalletBalanceSlot.slot).with_for_update()
+        ):
+            slots.setdefault(slot.wallet_id, []).append((slot.slot, slot.balance))
+        for wallet in sharded:
+            wallet_slots = tuple(slots.get(wallet.id, ()))
+            wallets[wallet.number] = WalletBalance(
+                wallet.id,
+                wallet.number,
+                wallet.currency,
+                round(sum(balance for _, balance in wallet_slots), 2) if wallet.id in debit_ids else None,
+                wallet.balance_slots,
+                wallet_slots
+            )
+        return wallets
+
+    def apply_deltas(self, db: Session, deltas: dict[int, float], wallets: dict[WalletNumberType, WalletBalance]):
+        sharded = {wallet.id: wallet for wallet in wallets.values() if wallet.balance_slots is not None}
+        plain_deltas = {wallet_id: delta for wallet_id, delta in deltas.items() if wallet_id not in sharded}
+        if plain_deltas:
+            super().apply_deltas(db, plain_deltas, wallets)
+
+        slot_deltas = []
+        for wallet_id, delta in deltas.items():
+            wallet = sharded.get(wallet_id)
+            if wallet is None or not delta:
+                continue
+            if delta > 0:
+                slot_deltas.append((wallet_id, random.choice(wallet.slots)[0], delta))
+            else:
+                slot_deltas.extend(
+                    (wallet_id, slot, -taken) for slot, taken in plan_slot_debits(wallet.slots, -delta)
+                )
+        if slot_deltas:
+            balance_deltas = values(
+                column("wallet_id", Integer), column("slot", Integer), column("delta", Float), name="balance_deltas"
+            ).data(slot_deltas)
+            db.execute(
+                update(WalletBalanceSlot).where(
+                    WalletBalanceSlot.wallet_id == balance_deltas.c.wallet_id,
+                    WalletBalanceSlot.slot == balance_deltas.c.slot
+                ).values(
+                    balance=func.round(cast(WalletBalanceSlot.balance + balance_deltas.c.delta, Numeric), 2)
+                ).execution_options(synchronize_session=False)
+            )
+
+    def top_up(self, db: Session, wallet_id: int, amount: float) -> float:
+        balance_slots = db.execute(
+            select(Wallet.balance_slots).where(Wallet.id == wallet_id).with_for_update(read=True, key_share=True)
+        ).scalar_one()
+        if balance_slots is None:
+            return super().top_up(db, wallet_id, amount)
+        db.execute(
+            update(WalletBalanceSlot).where(
+                WalletBalanceSlot.wallet_id == wallet_id, WalletBalanceSlot.slot == random.randrange(balance_slots)
+            ).values(
+                balance=func.round(cast(WalletBalanceSlot.balance + amount, Numeric), 2)
+            )
+        )
+        return self.get_balances(db, [wallet_id])[wallet_id]
+
+    def shard_wallet(self, db: Session, wallet_id: int, slots: int) -> float:
+        """Splits the balance over ``slots`` slots, or merges them back for 1 or less; returns the balance moved."""
+        wallet = db.execute(
+            select(Wallet.balance, Wallet.balance_slots).where(Wallet.id == wallet_id).with_for_update()
+        ).one()
+        balance = wallet.balance or 0.0
+        if wallet.balance_slots is not None:
+            balance = round(sum(db.scalars(
+                delete(WalletBalanceSlot).where(WalletBalanceSlot.wallet_id == wallet_id).returning(
+                    WalletBalanceSlot.balance
+                )
+            )), 2)
+        if slots > 1:
+            db.execute(insert(WalletBalanceSlot), [
+                {"wallet_id": wallet_id, "slot": slot, "balance": balance if slot == 0 else 0.0}
+                for slot in range(slots)
+            ])
+            db.execute(update(Wallet).where(Wallet.id == wallet_id).values(balance=0.0, balance_slots=slots))
+        else:
+            db.execute(update(Wallet).where(Wallet.id == wallet_id).values(balance=balance, balance_slots=None))
+        return balance
+
+
+def create_balance_store(kind: str = config.WALLET_BALANCE_STORE) -> BalanceStore:
+    if kind == "column":
+        return ColumnBalanceStore()
+    if kind == "ledger":
+        return LedgerBalanceStore()
+    if kind == "sharded":
+        return ShardedBalanceStore()
+    raise ValueError(f"Unknown balance store: {kind}")
+
+
+balance_store = create_balance_store()
@@ -1,3 +1,4 @@
 from .user_controller import UserController
 from .wallet_controller import WalletController
-from .log_controller import LogController
\ No newline at end of file
+from .log_controller import LogController
+from .async_controllers import AsyncUserController, AsyncWalletController, AsyncLogController
\ No newline at end of file
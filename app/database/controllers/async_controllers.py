@@ -0,0 +1,219 @@
+import asyncio
+from datetime import date
+from typing import AsyncIterator, Callable, Optional, TypeVar, Union
+
+from sqlalchemy import Row
+
+from app.api.schemas import UserCreate, WalletNumberType, WalletBalanceType, CurrencyType, WalletCreate, AddMoney, \
+    TransferMoney, TransferBatchItemResult, WalletStatement
+from app.currency_api import Controller
+from app.database.async_database import AsyncSession
+from app.database.balance_cache import balance_cache
+from app.database.idempotency import IdempotentRequest, StoredResponse
+from app.database.request_cache import get_request_cache
+from app.database.transactions import run_in_transaction_async
+from app.database.transfer_writer import transfer_writer
+from app.database.models import TransferLog, User, Wallet
+from app.database.wallet_stats import select_statement_rows
+from config import config
+from .log_controller import LogController
+from .user_controller import UserController
+from .wallet_controller import WalletController
+
+T = TypeVar("T")
+
+
+class AsyncUserController:
+    """Awaits UserController's statements on the asyncpg engine.
+
+    Users and wallets are cached in the same RequestCache as UserController's, so either finds what the other
+    loaded in one session.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_user(self, user_id: int) -> Optional[User]:
+        cache = get_request_cache(self.db.sync_session)
+        if user_id not in cache.users:
+            cache.users[user_id] = await self.db.get(User, user_id)
+        return cache.users[user_id]
+
+    async def email_exists(self, email: str) -> bool:
+        return await self.db.scalar(UserController._email_exists_statement(email))
+
+    async def get_wallet(self, wallet_number: WalletNumberType) -> Optional[Wallet]:
+        cache = get_request_cache(self.db.sync_session)
+        if wallet_number not in cache.wallets:
+            cache.wallets[wallet_number] = (
+                await self.db.scalars(UserController._get_wallet_statement(wallet_number))
+            ).first()
+        return cache.wallets[wallet_number]
+
+    async def get_user_wallet(self, user_id: int, wallet_number: WalletNumberType) -> Optional[Wallet]:
+        wallet = await self.get_wallet(wallet_number)
+        if wallet is None or wallet.owner_id != user_id:
+            return None
+        return wallet
+
+    async def create_userdb_from_user(self, user: UserCreate) -> User:
+        db_user = User(name=user.name, surname=user.surname, email=user.email)
+        self.db.add(db_user)
+        await self.db.commit()
+        await self.db.refresh(db_user)
+        return db_user
+
+    async def read_wallets_balance_by_user_id(self, user_id: int) -> dict[WalletNumberType, WalletBalanceType]:
+        return await balance_cache.balances_async(
+            self.db.sync_session, user_id, lambda: self.db.execute(UserController._get_balances_statement(user_id))
+        )
+
+    async def get_wallet_balance(self, wallet_id: int, at: Optional[str] = None) -> WalletBalanceType:
+        return (await self.db.execute(UserController._get_wallet_balance_statement(wallet_id, at))).one().balance
+
+    async def get_currencies_by_user(self, user_id: int) -> list[CurrencyType]:
+        return list(await self.db.scalars(UserController._get_currencies_statement(user_id)))
+
+    async def get_users(
+            self,
+            after_id: Optional[int] = None,
+            limit: Optional[int] = None,
+            email_prefix: Optional[str] = None,
+            surname_prefix: Optional[str] = None,
+            fields: Optional[list[str]] = None
+    ) -> list[dict]:
+        return [row._asdict() for row in await self.db.execute(UserController._get_users_statement(
+            after_id=after_id, limit=limit, email_prefix=email_prefix, surname_prefix=surname_prefix, fields=fields
+        ))]
+
+
+class AsyncWalletController:
+    """Runs WalletController writes on the asyncpg engine, each operation in one AsyncSession.run_sync.
+
+    Exchange rates are loaded with the async client before the operation, so a cold or expired rates cache never
+    blocks the event loop. Transfers retry serialization failures and deadlocks with an awaited backoff, outside
+    run_sync. With TRANSFER_GROUP_COMMIT, transfers are awaited on the group commit writer instead of this session.
+    """
+
+    def __init__(self, db: AsyncSession, currency_controller: Optional[Controller] = None):
+        self.db = db
+        self._c = currency_controller
+
+    async def _controller(self) -> Controller:
+        if self._c is None:
+            self._c = await Controller.load()
+        return self._c
+
+    async def _run(self, operation: Callable[[WalletController], T]) -> T:
+        c = await self._controller()
+        return await self.db.run_sync(lambda session: operation(WalletController(session, c)))
+
+    async def _run_in_transaction(self, operation: Callable[[WalletController], T]) -> T:
+        c = await self._controller()
+        return await run_in_transaction_async(self.db, lambda session: operation(WalletController(session, c)))
+
+    async def create_wallet_db_from_wallet_in_db(self, wallet: WalletCreate, user_id: int) -> Wallet:
+        return await self._run(lambda wc: wc.create_wallet_db_from_wallet_in_db(wallet=wallet, user_id=user_id))
+
+    async def top_up_wallet_balance(
+            self,
+            add_money: AddMoney,
+            user_id: int,
+            wallet_number: WalletNumberType,
+            idempotency: Optional[IdempotentRequest] = None
+    ) -> Union[WalletBalanceType, StoredResponse]:
+        return await self._run(lambda wc: wc.top_up_wallet_balance(add_money, user_id, wallet_number, idempotency))
+
+    async def transfer_money_between_wallets(
+            self,
+            sender_number: WalletNumberType,
+            transfer_money: TransferMoney,
+            idempotency: Optional[IdempotentRequest] = None
+    ) -> Union[Optional[TransferLog], StoredResponse]:
+        if config.TRANSFER_GROUP_COMMIT:
+            wc = WalletController(self.db.sync_session, await self._controller())
+            return await asyncio.wrap_future(
+                transfer_writer.submit(wc._transfer_operation(sender_number, transfer_money, idempotency))
+            )
+        return await self._run_in_transaction(
+            lambda wc: wc._idempotent_transfer(sender_number, transfer_money, idempotency)
+        )
+
+    async def transfer_money_to_many_wallets(
+            self, sender_number: WalletNumberType, transfers: list[TransferMoney], rejected: dict[int, str]
+    ) -> list[TransferBatchItemResult]:
+        return await self._run_in_transaction(lambda wc: wc._transfer_batch(sender_number, transfers, rejected))
+
+
+class AsyncLogController:
+    """Awaits LogController's statements on the asyncpg engine; exports stream through a server-side cursor."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self._lc = LogController(db.sync_session)
+
+    async def get_logs_using_operation_types(
+            self,
+            operation_types: list[str],
+            wallet_number: WalletNumberType,
+            date_from: str,
+            date_to: str,
+            data_limit: int|None = None
+    ) -> list[Row]:
+        return (await self.db.execute(self._lc._get_logs_statement(
+            operation_types=operation_types,
+            wallet_number=wallet_number,
+            date_from=date_from,
+            date_to=date_to,
+            data_limit=data_limit,
+            rows=True
+        ))).all()
+
+    async def get_logs_page(
+            self,
+            operation_types: list[str],
+            wallet_number: WalletNumberType,
+            date_from: str,
+            date_to: Optional[str],
+            data_limit: int,
+            cursor: Optional[str] = None
+    ) -> tuple[list[Row], Optional[str]]:
+        logs = (await self.db.execute(self._lc._get_logs_statement(
+            operation_types=operation_types,
+            wallet_number=wallet_number,
+            date_from=date_from,
+            date_to=date_to,
+            data_limit=data_limit + 1,
+            after=LogController.decode_cursor(cursor) if cursor else None,
+            rows=True
+        ))).all()
+        return LogController._logs_page(logs, data_limit)
+
+    async def get_statement(
+            self,
+            wallet_number: WalletNumberType,
+            currency: CurrencyType,
+            date_from: date,
+            date_to: date,
+            granularity: str
+    ) -> WalletStatement:
+        rows = await self.db.execute(select_statement_rows(wallet_number, date_from, date_to, granularity))
+        return LogController._statement(rows, wallet_number, currency, date_from, date_to, granularity)
+
+    async def iter_logs(
+            self,
+            operation_types: list[str],
+            wallet_number: WalletNumberType,
+            date_from: str,
+            date_to: Optional[str],
+            chunk_size: int = config.LOGS_EXPORT_CHUNK_SIZE
+    ) -> AsyncIterator[list[TransferLog]]:
+        statement = self._lc._get_logs_statement(
+            operation_types=operation_types,
+            wallet_number=wallet_number,
+            date_from=date_from,
+            date_to=date_to
+        ).execution_options(yield_per=chunk_size)
+        result = await self.db.stream_scalars(statement)
+        async for chunk in result.partitions():
+            yield chunk
\ No newline at end of file
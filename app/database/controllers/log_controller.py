@@ -1,16 +1,50 @@
-from datetime import datetime
+import base64
+import json
 import re
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Iterable, Iterator, Optional
 
 from fastapi import HTTPException
 from starlette import status
 
-from app.api.schemas import WalletNumberType
+from app.api.schemas import TransferLogDB, WalletNumberType, CurrencyType, StatementFlows, StatementCounterparty, \
+    StatementPeriod, WalletStatement
 from app.api.constants import DATETIME_FORMAT
 from app.database.database import Session
+from app.database.ledger import from_minor_units
 from app.database.models import TransferLog
+from app.database.wallet_stats import TOP_UP_COUNTERPARTY, STATS_COLUMNS, select_statement_rows
+from config import config
 
+from sqlalchemy import BigInteger, Row, Select, String, and_, cast, func, select, tuple_, union_all
+from sqlalchemy.orm import aliased
 from sqlalchemy.sql import false as sql_false
 
+LogsCursor = tuple[datetime, uuid.UUID]
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def _statement_flows(totals: list[int]) -> dict:
+    money_in, money_out, count_in, count_out = totals
+    return {
+        "money_in": from_minor_units(money_in),
+        "money_out": from_minor_units(money_out),
+        "count_in": count_in,
+        "count_out": count_out,
+        "net_flow": from_minor_units(money_in - money_out),
+    }
+
+
+def _log_row_columns(logs) -> list:
+    # Rows carry the uuid as text and paid_on as microseconds since the epoch, so the driver builds neither
+    # a uuid.UUID nor a datetime per row and the serializer formats the whole paid_on column at once.
+    columns = {field: getattr(logs, field) for field in TransferLogDB.__fields__}
+    columns["transfer_uid"] = cast(logs.transfer_uid, String)
+    columns["paid_on"] = cast(func.extract("epoch", logs.paid_on) * 1000000, BigInteger)
+    return [column.label(field) for field, column in columns.items()]
+
 
 class LogController:
     def __init__(self, db: Session):
@@ -120,6 +154,54 @@ class LogController:
         )
 
 
+    def _get_logs_statement(
+            self,
+            operation_types: list[str],
+            wallet_number: WalletNumberType,
+            date_from: str,
+            date_to: Optional[str],
+            data_limit: int|None = None,
+            after: Optional[LogsCursor] = None,
+            rows: bool = False
+    ) -> Select:
+        """Selects TransferLog objects, or with ``rows`` plain rows of the TransferLogDB fields, newest first."""
+        wallet_filters = []
+        if "out" in operation_types:
+            wallet_filters.append(TransferLog.sender == wallet_number)
+        if "in" in operation_types:
+            receiver_filter = TransferLog.receiver == wallet_number
+            if "out" in operation_types:
+                receiver_filter = and_(receiver_filter, TransferLog.sender != wallet_number)
+            wallet_filters.append(receiver_filter)
+
+        time_filters = [LogController._get_date_time_object(date_from) < TransferLog.paid_on]
+        if date_to is not None:
+            time_filters.append(TransferLog.paid_on < LogController._get_date_time_object(date_to))
+        if after is not None:
+            # The row comparison alone doesn't prune TransferLog partitions, the bound on paid_on does.
+            time_filters.append(TransferLog.paid_on <= after[0])
+            time_filters.append(tuple_(TransferLog.paid_on, TransferLog.transfer_uid) < tuple_(*after))
+
+        branches = []
+        for wallet_filter in wallet_filters:
+            branch = select(TransferLog).where(wallet_filter, *time_filters).order_by(
+                TransferLog.paid_on.desc(), TransferLog.transfer_uid.desc()
+            )
+            if data_limit:
+                branch = branch.limit(data_limit)
+            branches.append(branch)
+
+        if len(branches) == 1:
+            logs, statement = TransferLog, branches[0]
+        else:
+            logs = aliased(TransferLog, union_all(*branches).subquery())
+            statement = select(logs).order_by(logs.paid_on.desc(), logs.transfer_uid.desc())
+            if data_limit:
+                statement = statement.limit(data_limit)
+        if rows:
+            statement = statement.with_only_columns(*_log_row_columns(logs))
+        return statement
+
     def get_logs_using_operation_types(
             self,
             operation_types: list[str],
@@ -127,19 +209,126 @@ class LogController:
             date_from: str,
             date_to: str,
             data_limit: int|None = None
-    ) -> list[TransferLog]:
+    ) -> list[Row]:
+        return self.db.execute(self._get_logs_statement(
+            operation_types=operation_types,
+            wallet_number=wallet_number,
+            date_from=date_from,
+            date_to=date_to,
+            data_limit=data_limit,
+            rows=True
+        )).all()
 
-        transfer_logs_filter = sql_false()
-        if "in" in operation_types:
-            transfer_logs_filter |= TransferLog.receiver == wallet_number
-        if "out" in operation_types:
-            transfer_logs_filter |= TransferLog.sender == wallet_number
+    def iter_logs(
+            self,
+            operation_types: list[str],
+            wallet_number: WalletNumberType,
+            date_from: str,
+            date_to: Optional[str],
+            chunk_size: int = config.LOGS_EXPORT_CHUNK_SIZE
+    ) -> Iterator[list[TransferLog]]:
+        statement = self._get_logs_statement(
+            operation_types=operation_types,
+            wallet_number=wallet_number,
+            date_from=date_from,
+            date_to=date_to
+        ).execution_options(yield_per=chunk_size)
+        for chunk in self.db.scalars(statement).partitions():
+            yield chunk
 
-        logs = self._get_logs_from_to_time(date_from=date_from, date_to=date_to)
-        filtered_logs = logs.filter(transfer_logs_filter).order_by(
-            TransferLog.paid_on.desc()
-        )
-        if data_limit:
-            filtered_logs = filtered_logs.limit(data_limit)
-        return filtered_logs.all()
+    @staticmethod
+    def encode_cursor(paid_on: datetime, transfer_uid: uuid.UUID|str) -> str:
+        cursor = json.dumps([paid_on.isoformat(), str(transfer_uid)])
+        return base64.urlsafe_b64encode(cursor.encode()).decode().rstrip("=")
 
+    @staticmethod
+    def decode_cursor(cursor: str) -> LogsCursor:
+        paid_on, transfer_uid = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(paid_on), uuid.UUID(transfer_uid)
+
+    def get_logs_page(
+            self,
+            operation_types: list[str],
+            wallet_number: WalletNumberType,
+            date_from: str,
+            date_to: Optional[str],
+            data_limit: int,
+            cursor: Optional[str] = None
+    ) -> tuple[list[Row], Optional[str]]:
+        logs = self.db.execute(self._get_logs_statement(
+            operation_types=operation_types,
+            wallet_number=wallet_number,
+            date_from=date_from,
+            date_to=date_to,
+            data_limit=data_limit + 1,
+            after=LogController.decode_cursor(cursor) if cursor else None,
+            rows=True
+        )).all()
+        return LogController._logs_page(logs, data_limit)
+
+    @staticmethod
+    def _logs_page(logs: list[Row], data_limit: int) -> tuple[list[Row], Optional[str]]:
+        """Cuts the ``data_limit + 1`` rows fetched for a page down to the page and the cursor of the next one."""
+        if len(logs) <= data_limit:
+            return logs, None
+        logs = logs[:data_limit]
+        last = logs[-1]
+        return logs, LogController.encode_cursor(EPOCH + timedelta(microseconds=last.paid_on), last.transfer_uid)
+
+    def get_statement(
+            self,
+            wallet_number: WalletNumberType,
+            currency: CurrencyType,
+            date_from: date,
+            date_to: date,
+            granularity: str
+    ) -> WalletStatement:
+        """Sums the wallet's daily rollups, never TransferLog, so the cost depends on the days covered only.
+
+        Periods without transfers or top-ups are left out; the first and last may be cut short by the dates.
+        """
+        rows = self.db.execute(select_statement_rows(wallet_number, date_from, date_to, granularity))
+        return LogController._statement(rows, wallet_number, currency, date_from, date_to, granularity)
+
+    @staticmethod
+    def _statement(
+            rows: Iterable[Row],
+            wallet_number: WalletNumberType,
+            currency: CurrencyType,
+            date_from: date,
+            date_to: date,
+            granularity: str
+    ) -> WalletStatement:
+        statement_totals = [0] * len(STATS_COLUMNS)
+        periods = {}
+        for row in rows:
+            totals = [int(row._mapping[name]) for name in STATS_COLUMNS]
+            period = periods.setdefault(row.period, {
+                "totals": [0] * len(STATS_COLUMNS), "top_ups": StatementFlows(), "counterparties": []
+            })
+            for index, value in enumerate(totals):
+                period["totals"][index] += value
+                statement_totals[index] += value
+            if row.counterparty_currency == TOP_UP_COUNTERPARTY:
+                period["top_ups"] = StatementFlows(**_statement_flows(totals))
+            else:
+                period["counterparties"].append(
+                    StatementCounterparty(currency=row.counterparty_currency, **_statement_flows(totals))
+                )
+        return WalletStatement(
+            wallet_number=wallet_number,
+            currency=currency,
+            date_from=date_from,
+            date_to=date_to,
+            granularity=granularity,
+            totals=StatementFlows(**_statement_flows(statement_totals)),
+            periods=[
+                StatementPeriod(
+                    period=period_start,
+                    top_ups=period["top_ups"],
+                    counterparties=period["counterparties"],
+                    **_statement_flows(period["totals"])
+                )
+                for period_start, period in periods.items()
+            ]
+        )
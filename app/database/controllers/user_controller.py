@@ -1,16 +1,52 @@
+import datetime
+from typing import Optional
+
+from sqlalchemy import Select, exists, select
+
 from ..database import Session
 
+from app.api.constants import USER_FIELDS, DATETIME_FORMAT
 from app.api.schemas import UserCreate, WalletNumberType, WalletBalanceType, CurrencyType
+from app.database.balance_cache import balance_cache
+from app.database.balance_store import balance_store
+from app.database.ledger import select_ledger_balances
 from app.database.models.wallet import Wallet
 from app.database.models.user import User
+from app.database.request_cache import get_request_cache
 
 
 class UserController:
     def __init__(self, db: Session):
         self.db = db
 
-    def get_user(self, user_id: int) -> User:
-        return self.db.query(User).filter(User.id == user_id).first()
+    def get_user(self, user_id: int) -> Optional[User]:
+        cache = get_request_cache(self.db)
+        if user_id not in cache.users:
+            cache.users[user_id] = self.db.get(User, user_id)
+        return cache.users[user_id]
+
+    def email_exists(self, email: str) -> bool:
+        return self.db.scalar(self._email_exists_statement(email))
+
+    @staticmethod
+    def _email_exists_statement(email: str) -> Select:
+        return select(exists().where(User.email == email))
+
+    def get_wallet(self, wallet_number: WalletNumberType) -> Optional[Wallet]:
+        cache = get_request_cache(self.db)
+        if wallet_number not in cache.wallets:
+            cache.wallets[wallet_number] = self.db.scalars(self._get_wallet_statement(wallet_number)).first()
+        return cache.wallets[wallet_number]
+
+    @staticmethod
+    def _get_wallet_statement(wallet_number: WalletNumberType) -> Select:
+        return select(Wallet).where(Wallet.number == wallet_number)
+
+    def get_user_wallet(self, user_id: int, wallet_number: WalletNumberType) -> Optional[Wallet]:
+        wallet = self.get_wallet(wallet_number)
+        if wallet is None or wallet.owner_id != user_id:
+            return None
+        return wallet
 
     def create_userdb_from_user(self, user: UserCreate) -> User:
         db_user = User(name=user.name,surname=user.surname,email=user.email)
@@ -20,12 +56,56 @@ class UserController:
         return db_user
 
     def read_wallets_balance_by_user_id(self, user_id: int) -> dict[WalletNumberType, WalletBalanceType]:
-        numbers = [number[0] for number in self.db.query(Wallet.number).filter_by(owner_id=user_id).all()]
-        balances = [balance[0] for balance in self.db.query(Wallet.balance).filter_by(owner_id=user_id).all()]
-        return dict(zip(numbers, balances))
+        return balance_cache.balances(self.db, user_id, lambda: self.db.execute(self._get_balances_statement(user_id)))
+
+    @staticmethod
+    def _get_balances_statement(user_id: int) -> Select:
+        return balance_store.select_balances().where(Wallet.owner_id == user_id).order_by(Wallet.id)
+
+    def get_wallet_balance(self, wallet_id: int, at: Optional[str] = None) -> WalletBalanceType:
+        return self.db.execute(self._get_wallet_balance_statement(wallet_id, at)).one().balance
+
+    @staticmethod
+    def _get_wallet_balance_statement(wallet_id: int, at: Optional[str] = None) -> Select:
+        if at is None:
+            return balance_store.select_balances().where(Wallet.id == wallet_id)
+        return select_ledger_balances(datetime.datetime.strptime(at, DATETIME_FORMAT)).where(Wallet.id == wallet_id)
 
     def get_currencies_by_user(self, user_id: int) -> list[CurrencyType]:
-        return [currency[0] for currency in self.db.query(Wallet.currency).filter_by(owner_id=user_id)]
+        return list(self.db.scalars(self._get_currencies_statement(user_id)))
+
+    @staticmethod
+    def _get_currencies_statement(user_id: int) -> Select:
+        return select(Wallet.currency).where(Wallet.owner_id == user_id)
+
+    def get_users(
+            self,
+            after_id: Optional[int] = None,
+            limit: Optional[int] = None,
+            email_prefix: Optional[str] = None,
+            surname_prefix: Optional[str] = None,
+            fields: Optional[list[str]] = None
+    ) -> list[dict]:
+        return [row._asdict() for row in self.db.execute(self._get_users_statement(
+            after_id=after_id, limit=limit, email_prefix=email_prefix, surname_prefix=surname_prefix, fields=fields
+        ))]
 
-    def get_users(self) -> list[User]:
-        return list(self.db.query(User).all())
\ No newline at end of file
+    @staticmethod
+    def _get_users_statement(
+            after_id: Optional[int] = None,
+            limit: Optional[int] = None,
+            email_prefix: Optional[str] = None,
+            surname_prefix: Optional[str] = None,
+            fields: Optional[list[str]] = None
+    ) -> Select:
+        fields = fields or USER_FIELDS
+        statement = select(*[getattr(User, field) for field in fields]).order_by(User.id)
+        if after_id is not None:
+            statement = statement.where(User.id > after_id)
+        if email_prefix:
+            statement = statement.where(User.email.startswith(email_prefix, autoescape=True))
+        if surname_prefix:
+            statement = statement.where(User.surname.startswith(surname_prefix, autoescape=True))
+        if limit is not None:
+            statement = statement.limit(limit)
+        return statement
\ No newline at end of file
@@ -1,98 +1,258 @@
 import datetime
-import random
 import uuid
-from typing import Optional
+from typing import Optional, Union
 
-from app.api.constants import WALLET_PREFIX
-from app.api.schemas import WalletNumberType, WalletCreate, AddMoney, TransferMoney
+from fastapi import HTTPException
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from starlette import status
+
+from app.api.schemas import WalletNumberType, WalletCreate, AddMoney, TransferMoney, TransferBatchItemResult, \
+    TransferLogDB
+from app.database.balance_cache import balance_cache
+from app.database.balance_store import balance_store
 from app.database.database import Session
+from app.database.idempotency import IdempotentRequest, StoredResponse, idempotency_store
+from app.database.ledger import TOP_UP, TRANSFER, ledger_entry, post_ledger_entries
 from app.database.models.transfer_log import TransferLog
 from app.database.models.wallet import Wallet
+from app.database.transactions import run_in_transaction
+from app.database.transfer_writer import TransferOperation, transfer_writer
+from app.database.wallet_stats import post_wallet_stats, top_up_stats, transfer_stats
+from app.database.wallet_number_allocator import wallet_number_allocator
 from app.currency_api import Controller
+from config import config
+from .user_controller import UserController
+
+WALLET_NUMBER_CONSTRAINT = "wallets_number_key"
+WALLET_NUMBER_ATTEMPTS = 3
+
+
+def _constraint_name(exc: IntegrityError) -> Optional[str]:
+    diag = getattr(exc.orig, "diag", None)
+    if diag is not None:
+        return diag.constraint_name
+    return getattr(exc.orig.__cause__, "constraint_name", None)
+
+
+def _transfer_log_row(transfer_log: TransferLog) -> dict:
+    return {column.key: getattr(transfer_log, column.key) for column in TransferLog.__table__.columns}
 
 
 class WalletController:
 
-    def __init__(self, db: Session):
-        self._c = Controller()
+    def __init__(self, db: Session, currency_controller: Optional[Controller] = None):
+        self._c = currency_controller if currency_controller is not None else Controller()
         self.db = db
 
     @staticmethod
     def _create_wallet_number(currency: str, db: Session) -> WalletNumberType:
-        numbers = db.query(Wallet.number).all()
-        wallet_number = WALLET_PREFIX + "".join([str(random.randint(0, 9)) for _ in range(10)]) + currency
-        while True:
-            try:
-                numbers.index(wallet_number)
-            except ValueError:
-                return wallet_number
-            else:
-                wallet_number = WALLET_PREFIX + "".join([str(random.randint(0, 9)) for _ in range(10)]) + currency
-
+        return wallet_number_allocator.allocate(db, currency)
 
     def create_wallet_db_from_wallet_in_db(self, wallet: WalletCreate, user_id: int) -> Wallet:
         currency = wallet.currency
-        wallet_db = Wallet(
-            currency=currency,
-            number=WalletController._create_wallet_number(currency=currency, db=self.db),
-            owner_id=user_id,
-            updated_at=datetime.date.today()
-        )
-        self.db.add(wallet_db)
-        self.db.commit()
-        self.db.refresh(wallet_db)
-        return wallet_db
+        for attempt in range(WALLET_NUMBER_ATTEMPTS):
+            wallet_db = Wallet(
+                currency=currency,
+                number=WalletController._create_wallet_number(currency=currency, db=self.db),
+                owner_id=user_id,
+                updated_at=datetime.date.today()
+            )
+            self.db.add(wallet_db)
+            balance_cache.invalidate_on_commit(self.db, user_ids=[user_id])
+            try:
+                self.db.commit()
+            except IntegrityError as exc:
+                self.db.rollback()
+                if _constraint_name(exc) != WALLET_NUMBER_CONSTRAINT or attempt == WALLET_NUMBER_ATTEMPTS - 1:
+                    raise
+            else:
+                self.db.refresh(wallet_db)
+                return wallet_db
+
+    def _top_up(self, add_money: AddMoney, user_id: int, wallet_number: WalletNumberType) -> float:
+        wallet = UserController(self.db).get_user_wallet(user_id, wallet_number)
+        if wallet is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wallet not found")
+        post_ledger_entries(self.db, [ledger_entry(wallet.id, add_money.amount, TOP_UP)])
+        post_wallet_stats(self.db, top_up_stats(wallet.number, add_money.amount, datetime.date.today()))
+        balance_cache.invalidate_on_commit(self.db, wallet_ids=[wallet.id])
+        return balance_store.top_up(self.db, wallet.id, add_money.amount)
 
     def top_up_wallet_balance(
-            self, add_money: AddMoney, user_id: int, wallet_number: WalletNumberType
-    ) -> Wallet:
-        wallet_query = self.db.query(Wallet).filter_by(owner_id=user_id, number=wallet_number)
+            self,
+            add_money: AddMoney,
+            user_id: int,
+            wallet_number: WalletNumberType,
+            idempotency: Optional[IdempotentRequest] = None
+    ) -> Union[float, StoredResponse]:
         if isinstance(add_money.amount, int) is True:
             add_money.amount = float(add_money.amount)
-        wallet_query.update({Wallet.balance: Wallet.balance + add_money.amount})
+        balance = idempotency_store.run_once(
+            self.db, idempotency, lambda: self._top_up(add_money, user_id, wallet_number)
+        )
         self.db.commit()
-        return wallet_query.first().balance
+        return balance
 
-    def transfer_money_between_wallets(
-            self, sender_number: WalletNumberType, transfer_money: TransferMoney
+    def _apply_transfer(
+            self, sender_number: WalletNumberType, transfer_money: TransferMoney, transfer_logs: list[dict]
     ) -> Optional[TransferLog]:
-        wallet_sender_query = self.db.query(Wallet).filter_by(number=sender_number)
+        wallets = balance_store.lock_wallets(self.db, [sender_number, transfer_money.receiver], {sender_number})
+        if sender_number not in wallets or transfer_money.receiver not in wallets:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wallet not found")
+        sender = wallets[sender_number]
+        receiver = wallets[transfer_money.receiver]
 
-        if wallet_sender_query.first().balance < transfer_money.amount:
+        if sender.balance < transfer_money.amount:
             return None
 
-        if isinstance(transfer_money.amount, int) is True:
-            transfer_money.amount = float(transfer_money.amount)
-
-        sender_balance = wallet_sender_query.first().balance
-        wallet_sender_query.update({Wallet.balance: round(sender_balance + transfer_money.amount, 2)})
-        currency_sender = wallet_sender_query.first().currency
-
-        wallet_receiver_query = self.db.query(Wallet).filter_by(number=transfer_money.receiver)
-
-        currency_receiver = wallet_receiver_query.first().currency
-
         money_received = self._c.convent_money_from_sender_to_receiver(
-            currency_sender=currency_sender, currency_receiver=currency_receiver, amount_sent=transfer_money.amount
+            currency_sender=sender.currency, currency_receiver=receiver.currency, amount_sent=transfer_money.amount
         )
+        deltas = {sender.id: -transfer_money.amount}
+        deltas[receiver.id] = deltas.get(receiver.id, 0.0) + money_received
+        balance_store.apply_deltas(self.db, deltas, wallets)
+        balance_cache.invalidate_on_commit(self.db, wallet_ids=deltas)
 
-        receiver_balance = wallet_receiver_query.first().balance
-        wallet_receiver_query.update({Wallet.balance: round(receiver_balance + money_received, 2)})
-
-
+        transfer_uid = uuid.uuid4()
+        post_ledger_entries(self.db, [
+            ledger_entry(sender.id, -transfer_money.amount, TRANSFER, transfer_uid),
+            ledger_entry(receiver.id, money_received, TRANSFER, transfer_uid),
+        ])
         transfer_log = TransferLog(
-            transfer_uid=uuid.uuid4(),
+            transfer_uid=transfer_uid,
             sender=sender_number,
             receiver=transfer_money.receiver,
-            currency_sent=currency_sender,
-            currency_received=currency_receiver,
+            currency_sent=sender.currency,
+            currency_received=receiver.currency,
             money_sent=transfer_money.amount,
             money_received=money_received,
+            paid_on=datetime.datetime.now(),
         )
-        self.db.add(transfer_log)
-        self.db.commit()
-        self.db.refresh(transfer_log)
+        transfer_logs.append(_transfer_log_row(transfer_log))
         return transfer_log
 
+    def _transfer(self, sender_number: WalletNumberType, transfer_money: TransferMoney) -> Optional[TransferLog]:
+        transfer_logs = []
+        transfer_log = self._apply_transfer(sender_number, transfer_money, transfer_logs)
+        if transfer_logs:
+            self.db.execute(insert(TransferLog), transfer_logs)
+            post_wallet_stats(self.db, transfer_stats(transfer_logs))
+        return transfer_log
+
+    def _transfer_operation(
+            self,
+            sender_number: WalletNumberType,
+            transfer_money: TransferMoney,
+            idempotency: Optional[IdempotentRequest] = None
+    ) -> TransferOperation:
+        if isinstance(transfer_money.amount, int) is True:
+            transfer_money.amount = float(transfer_money.amount)
+        return lambda db, transfer_logs: idempotency_store.run_once(
+            db, idempotency, lambda: WalletController(db, self._c)._apply_transfer(
+                sender_number, transfer_money, transfer_logs
+            )
+        )
+
+    def _idempotent_transfer(
+            self,
+            sender_number: WalletNumberType,
+            transfer_money: TransferMoney,
+            idempotency: Optional[IdempotentRequest] = None
+    ) -> Union[Optional[TransferLog], StoredResponse]:
+        if isinstance(transfer_money.amount, int) is True:
+            transfer_money.amount = float(transfer_money.amount)
+        return idempotency_store.run_once(
+            self.db, idempotency, lambda: self._transfer(sender_number, transfer_money)
+        )
+
+    def transfer_money_between_wallets(
+            self,
+            sender_number: WalletNumberType,
+            transfer_money: TransferMoney,
+            idempotency: Optional[IdempotentRequest] = None
+    ) -> Union[Optional[TransferLog], StoredResponse]:
+        if config.TRANSFER_GROUP_COMMIT:
+            return transfer_writer.run(self._transfer_operation(sender_number, transfer_money, idempotency))
+        return run_in_transaction(
+            self.db, lambda: self._idempotent_transfer(sender_number, transfer_money, idempotency)
+        )
+
+    def _transfer_batch(
+            self, sender_number: WalletNumberType, transfers: list[TransferMoney], rejected: dict[int, str]
+    ) -> list[TransferBatchItemResult]:
+        wallets = balance_store.lock_wallets(
+            self.db, [sender_number, *{transfer.receiver for transfer in transfers}], {sender_number}
+        )
+        if sender_number not in wallets:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wallet not found")
+        sender = wallets[sender_number]
+
+        rejected = dict(rejected)
+        for index, transfer in enumerate(transfers):
+            if index not in rejected and transfer.receiver not in wallets:
+                rejected[index] = f"Wallet '{transfer.receiver}' doesn't exist"
+        accepted = [index for index in range(len(transfers)) if index not in rejected]
+
+        money_received = self._c.convert_money_batch(
+            [sender.currency] * len(accepted),
+            [wallets[transfers[index].receiver].currency for index in accepted],
+            np.array([transfers[index].amount for index in accepted], dtype=np.float64),
+        ).tolist()
+
+        balance = sender.balance
+        deltas = {sender.id: 0.0}
+        transfer_logs = {}
+        entries = []
+        paid_on = datetime.datetime.now()
+        for index, received in zip(accepted, money_received):
+            transfer = transfers[index]
+            if balance < transfer.amount:
+                rejected[index] = "Insufficient funds in the account"
+                continue
+            balance = round(balance - transfer.amount, 2)
+            receiver = wallets[transfer.receiver]
+            deltas[sender.id] -= transfer.amount
+            deltas[receiver.id] = deltas.get(receiver.id, 0.0) + received
+            transfer_uid = uuid.uuid4()
+            entries.append(ledger_entry(sender.id, -transfer.amount, TRANSFER, transfer_uid))
+            entries.append(ledger_entry(receiver.id, received, TRANSFER, transfer_uid))
+            transfer_logs[index] = TransferLog(
+                transfer_uid=transfer_uid,
+                sender=sender_number,
+                receiver=transfer.receiver,
+                currency_sent=sender.currency,
+                currency_received=receiver.currency,
+                money_sent=float(transfer.amount),
+                money_received=received,
+                paid_on=paid_on,
+            )
+
+        if transfer_logs:
+            balance_store.apply_deltas(self.db, deltas, wallets)
+            balance_cache.invalidate_on_commit(self.db, wallet_ids=deltas)
+            post_ledger_entries(self.db, entries)
+            rows = [_transfer_log_row(transfer_log) for transfer_log in transfer_logs.values()]
+            self.db.execute(insert(TransferLog), rows)
+            post_wallet_stats(self.db, transfer_stats(rows))
 
+        return [
+            TransferBatchItemResult(
+                receiver=transfer.receiver,
+                amount=transfer.amount,
+                status="sent",
+                transfer=TransferLogDB.from_orm(transfer_logs[index])
+            ) if index in transfer_logs else TransferBatchItemResult(
+                receiver=transfer.receiver,
+                amount=transfer.amount,
+                status="failed",
+                detail=rejected[index]
+            )
+            for index, transfer in enumerate(transfers)
+        ]
 
+    def transfer_money_to_many_wallets(
+            self, sender_number: WalletNumberType, transfers: list[TransferMoney], rejected: dict[int, str]
+    ) -> list[TransferBatchItemResult]:
+        return run_in_transaction(self.db, lambda: self._transfer_batch(sender_number, transfers, rejected))
@@ -1,6 +1,9 @@
-from sqlalchemy import URL, create_engine, MetaData
+from sqlalchemy import URL, create_engine, make_url, MetaData
 from sqlalchemy.orm import declarative_base, sessionmaker
 
+from app.request_profile import profile_queries
+from app.database.pool_metrics import InstrumentedQueuePool, instrument_engine
+from app.database.replicas import ReplicaSet
 from config import config
 
 url_object = URL.create(
@@ -12,7 +15,36 @@ url_object = URL.create(
     database=config.DB_NAME
 )
 
-engine = create_engine(url_object)
+
+def pool_options() -> dict:
+    return dict(
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_recycle=config.DB_POOL_RECYCLE,
+        pool_pre_ping=config.DB_POOL_PRE_PING,
+        pool_use_lifo=config.DB_POOL_USE_LIFO,
+    )
+
+
+engine = create_engine(url_object, poolclass=InstrumentedQueuePool, pool_logging_name="primary", **pool_options())
+instrument_engine(engine, "primary")
+profile_queries(engine)
+
+replica_urls = [make_url(url.strip()) for url in config.DB_REPLICA_URLS.split(",") if url.strip()]
+replica_engines = []
+for index, replica_url in enumerate(replica_urls):
+    replica_engine = create_engine(
+        replica_url,
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name=f"replica{index}",
+        connect_args={"connect_timeout": config.DB_REPLICA_CONNECT_TIMEOUT},
+        **pool_options()
+    )
+    instrument_engine(replica_engine, f"replica{index}")
+    profile_queries(replica_engine)
+    replica_engines.append(replica_engine)
+replicas = ReplicaSet(replica_engines)
 
 metadata = MetaData()
 Base = declarative_base(metadata=metadata)
@@ -0,0 +1,183 @@
+import datetime
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, NamedTuple, Optional, TypeVar, Union
+
+from fastapi import HTTPException
+from fastapi.responses import Response
+from prometheus_client import Counter
+from sqlalchemy import Row, Select, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from starlette import status
+
+from app.database.async_database import AsyncSession
+from app.database.database import Session
+from app.database.models import IdempotencyKey
+from config import config
+
+T = TypeVar("T")
+
+IDEMPOTENT_REPLAYED_HEADER = "Idempotent-Replayed"
+
+replays = Counter("idempotency_replays", "Duplicate requests answered with a stored response", ["source"])
+
+
+class StoredResponse(NamedTuple):
+    status_code: int
+    body: bytes
+    replayed: bool = False
+
+    def to_response(self) -> Response:
+        return Response(
+            content=self.body,
+            status_code=self.status_code,
+            media_type="application/json",
+            headers={IDEMPOTENT_REPLAYED_HEADER: "true"} if self.replayed else None
+        )
+
+
+class IdempotentRequest(NamedTuple):
+    user_id: int
+    key: str
+    fingerprint: str
+    render: Callable[[object], StoredResponse]
+
+
+class IdempotencyStore:
+    """Remembers the responses to requests sent with an ``Idempotency-Key`` for ``retention`` seconds.
+
+    A key is claimed in ``idempotency_keys`` inside the transaction doing the work and its response is stored
+    there before the commit, so money moves and the response is recorded together or not at all. A concurrent
+    duplicate blocks on the claim until it commits, then replays it. Up to ``cache_size`` responses are kept
+    in an in-process LRU, so retries usually never reach the database.
+    """
+
+    def __init__(
+            self,
+            retention: float = config.IDEMPOTENCY_KEY_RETENTION,
+            cache_size: int = config.IDEMPOTENCY_CACHE_SIZE
+    ):
+        self.retention = retention
+        self.cache_size = cache_size
+        self._cache: OrderedDict[tuple[int, str], tuple[str, StoredResponse, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def cached(self, request: IdempotentRequest) -> Optional[StoredResponse]:
+        with self._lock:
+            entry = self._cache.get((request.user_id, request.key))
+            if entry is None:
+                return None
+            if entry[2] <= time.monotonic():
+                del self._cache[(request.user_id, request.key)]
+                return None
+            self._cache.move_to_end((request.user_id, request.key))
+        replays.labels(source="memory").inc()
+        return self._replay(request, entry[0], entry[1])
+
+    def remember(self, request: IdempotentRequest, stored: StoredResponse, age: float = 0.0):
+        with self._lock:
+            self._cache[(request.user_id, request.key)] = (
+                request.fingerprint, stored._replace(replayed=False), time.monotonic() + self.retention - age
+            )
+            self._cache.move_to_end((request.user_id, request.key))
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def lookup(self, db: Session, request: IdempotentRequest, remember: bool = True) -> Optional[StoredResponse]:
+        stored = self.cached(request)
+        if stored is not None:
+            return stored
+        return self._stored(request, db.execute(self._select_stored(request)).one_or_none(), remember)
+
+    async def lookup_async(self, db: AsyncSession, request: IdempotentRequest) -> Optional[StoredResponse]:
+        stored = self.cached(request)
+        if stored is not None:
+            return stored
+        return self._stored(request, (await db.execute(self._select_stored(request))).one_or_none())
+
+    def _select_stored(self, request: IdempotentRequest) -> Select:
+        return select(
+            IdempotencyKey.fingerprint,
+            IdempotencyKey.status_code,
+            IdempotencyKey.response,
+            (func.now() - IdempotencyKey.created_at).label("age")
+        ).where(
+            IdempotencyKey.user_id == request.user_id,
+            IdempotencyKey.key == request.key,
+            IdempotencyKey.created_at >= self._expired_before()
+        )
+
+    def _stored(
+            self, request: IdempotentRequest, row: Optional[Row], remember: bool = True
+    ) -> Optional[StoredResponse]:
+        if row is None or row.status_code is None:
+            return None
+        stored = StoredResponse(row.status_code, row.response)
+        if remember:
+            self.remember(request, stored, row.age.total_seconds())
+        replays.labels(source="database").inc()
+        return self._replay(request, row.fingerprint, stored)
+
+    def claim(self, db: Session, request: IdempotentRequest) -> Optional[StoredResponse]:
+        """Claims the key in the current transaction, or returns the response stored for it."""
+        statement = insert(IdempotencyKey).values(
+            user_id=request.user_id, key=request.key, fingerprint=request.fingerprint
+        )
+        claimed = db.execute(statement.on_conflict_do_update(
+            index_elements=[IdempotencyKey.user_id, IdempotencyKey.key],
+            set_={
+                "fingerprint": statement.excluded.fingerprint,
+                "status_code": None,
+                "response": None,
+                "created_at": func.now(),
+            },
+            where=IdempotencyKey.created_at < self._expired_before()
+        ).returning(IdempotencyKey.key)).scalar_one_or_none()
+        if claimed is not None:
+            return None
+        # The claim may have been made earlier in this very transaction, which can still roll back.
+        stored = self.lookup(db, request, remember=False)
+        if stored is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT, detail="A request with this Idempotency-Key is in progress"
+            )
+        return stored
+
+    def run_once(
+            self, db: Session, request: Optional[IdempotentRequest], operation: Callable[[], T]
+    ) -> Union[T, StoredResponse]:
+        """Runs ``operation`` in the caller's transaction unless the request was already answered.
+
+        Without a request this is just ``operation()``; with one, the rendered response is returned instead.
+        """
+        if request is None:
+            return operation()
+        stored = self.claim(db, request)
+        if stored is not None:
+            return stored
+        stored = request.render(operation())
+        db.execute(update(IdempotencyKey).where(
+            IdempotencyKey.user_id == request.user_id, IdempotencyKey.key == request.key
+        ).values(status_code=stored.status_code, response=stored.body))
+        return stored
+
+    def purge_expired(self, db: Session) -> int:
+        return db.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.created_at < self._expired_before())
+        ).rowcount
+
+    def _expired_before(self):
+        return func.now() - datetime.timedelta(seconds=self.retention)
+
+    @staticmethod
+    def _replay(request: IdempotentRequest, fingerprint: str, stored: StoredResponse) -> StoredResponse:
+        if fingerprint != request.fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request"
+            )
+        return stored._replace(replayed=True)
+
+
+idempotency_store = IdempotencyStore()
@@ -0,0 +1,126 @@
+import datetime
+import uuid
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Optional
+
+from sqlalchemy import ColumnElement, DateTime, Float, Select, and_, cast, func, insert, literal, select, true
+
+from app.database.database import Session
+from app.database.models import BalanceSnapshot, LedgerEntry, Wallet
+
+MINOR_UNITS = 100
+
+OPENING = "opening"
+TOP_UP = "top_up"
+TRANSFER = "transfer"
+
+NO_SNAPSHOT = datetime.datetime(1, 1, 1)
+
+
+def to_minor_units(amount: float) -> int:
+    return int((Decimal(str(amount)) * MINOR_UNITS).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_minor_units(amount: int) -> float:
+    return float(Decimal(amount) / MINOR_UNITS)
+
+
+def ledger_entry(
+        wallet_id: int, amount: float, entry_type: str, transfer_uid: Optional[uuid.UUID] = None
+) -> dict:
+    return {
+        "wallet_id": wallet_id,
+        "amount": to_minor_units(amount),
+        "entry_type": entry_type,
+        "transfer_uid": transfer_uid,
+    }
+
+
+def post_ledger_entries(db: Session, entries: list[dict]):
+    if entries:
+        db.execute(insert(LedgerEntry), entries)
+
+
+def _latest_snapshot(wallet_id: ColumnElement, at: Optional[datetime.datetime] = None):
+    statement = select(BalanceSnapshot.balance, BalanceSnapshot.taken_at).where(BalanceSnapshot.wallet_id == wallet_id)
+    if at is not None:
+        statement = statement.where(BalanceSnapshot.taken_at <= at)
+    return statement.order_by(BalanceSnapshot.taken_at.desc()).limit(1).lateral("snapshot")
+
+
+def select_ledger_balances(at: Optional[datetime.datetime] = None) -> Select:
+    """Selects id, number, currency and balance of wallets, as of ``at`` if given, from their latest snapshot on."""
+    snapshot = _latest_snapshot(Wallet.id, at)
+    since = and_(
+        LedgerEntry.wallet_id == Wallet.id,
+        LedgerEntry.created_at >= func.coalesce(snapshot.c.taken_at, NO_SNAPSHOT)
+    )
+    if at is not None:
+        since = and_(since, LedgerEntry.created_at < at)
+    deltas = select(func.sum(LedgerEntry.amount).label("amount")).where(since).lateral("deltas")
+    balance = cast(func.coalesce(snapshot.c.balance, 0) + func.coalesce(deltas.c.amount, 0), Float) / MINOR_UNITS
+    return select(
+        Wallet.id, Wallet.number, Wallet.currency, balance.label("balance")
+    ).select_from(Wallet).outerjoin(snapshot, true()).outerjoin(deltas, true())
+
+
+def get_ledger_balance_at(db: Session, wallet_id: int, at: datetime.datetime) -> float:
+    return db.execute(select_ledger_balances(at).where(Wallet.id == wallet_id)).one().balance
+
+
+def snapshot_cutoff(db: Session, lag: float) -> datetime.datetime:
+    return db.scalar(select(cast(func.clock_timestamp(), DateTime) - datetime.timedelta(seconds=lag)))
+
+
+def take_balance_snapshots(
+        db: Session, cutoff: datetime.datetime, after_wallet_id: int = 0, batch_size: Optional[int] = None
+) -> tuple[int, Optional[int]]:
+    """Snapshots wallets after ``after_wallet_id``; returns the count written and the last id, None when done."""
+    wallets = select(Wallet.id).where(Wallet.id > after_wallet_id).order_by(Wallet.id)
+    if batch_size is not None:
+        wallets = wallets.limit(batch_size)
+    wallet_ids = list(db.scalars(wallets))
+    if not wallet_ids:
+        return 0, None
+
+    snapshot = _latest_snapshot(Wallet.id)
+    new_snapshots = select(
+        Wallet.id,
+        literal(cutoff, DateTime),
+        func.coalesce(snapshot.c.balance, 0) + func.sum(LedgerEntry.amount)
+    ).select_from(Wallet).outerjoin(snapshot, true()).join(LedgerEntry, and_(
+        LedgerEntry.wallet_id == Wallet.id,
+        LedgerEntry.created_at >= func.coalesce(snapshot.c.taken_at, NO_SNAPSHOT),
+        LedgerEntry.created_at < cutoff
+    )).where(
+        Wallet.id.between(wallet_ids[0], wallet_ids[-1])
+    ).group_by(Wallet.id, snapshot.c.balance)
+    written = db.execute(insert(BalanceSnapshot).from_select(
+        ["wallet_id", "taken_at", "balance"], new_snapshots
+    )).rowcount
+    return written, wallet_ids[-1]
+
+
+def post_opening_entries(db: Session) -> int:
+    """Posts an opening entry from ``wallets.balance`` for every wallet without one, before switching to the ledger."""
+    has_opening = select(LedgerEntry.id).where(LedgerEntry.wallet_id == Wallet.id, LedgerEntry.entry_type == OPENING)
+    wallets = db.execute(
+        select(Wallet.id, Wallet.balance).where(~has_opening.exists()).order_by(Wallet.id).with_for_update()
+    ).all()
+    if not wallets:
+        return 0
+    posted = dict(db.execute(
+        select(LedgerEntry.wallet_id, func.sum(LedgerEntry.amount)).where(
+            LedgerEntry.wallet_id.in_([wallet.id for wallet in wallets])
+        ).group_by(LedgerEntry.wallet_id)
+    ).all())
+    post_ledger_entries(db, [
+        {
+            "wallet_id": wallet.id,
+            "amount": to_minor_units(wallet.balance or 0.0) - posted.get(wallet.id, 0),
+            "entry_type": OPENING,
+            "transfer_uid": None,
+        }
+        for wallet in wallets
+    ])
+    return len(wallets)
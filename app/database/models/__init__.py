@@ -1,3 +1,8 @@
 from .user import User
 from .wallet import Wallet
 from .transfer_log import TransferLog
+from .ledger_entry import LedgerEntry
+from .balance_snapshot import BalanceSnapshot
+from .wallet_balance_slot import WalletBalanceSlot
+from .idempotency_key import IdempotencyKey
+from .wallet_daily_stats import WalletDailyStats
\ No newline at end of file
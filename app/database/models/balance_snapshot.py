@@ -0,0 +1,16 @@
+import datetime
+
+from sqlalchemy import BigInteger, Integer, DateTime, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database.database import Base
+
+
+class BalanceSnapshot(Base):
+    __tablename__ = "balance_snapshots"
+
+    wallet_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("wallets.id", ondelete="CASCADE"), primary_key=True
+    )
+    taken_at: Mapped[datetime.datetime] = mapped_column(DateTime, primary_key=True)
+    balance: Mapped[int] = mapped_column(BigInteger, nullable=False)
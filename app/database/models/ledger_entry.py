@@ -0,0 +1,24 @@
+import uuid
+import datetime
+from typing import Optional
+
+from sqlalchemy import BigInteger, Integer, String, UUID, DateTime, ForeignKey, Index, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database.database import Base
+
+
+class LedgerEntry(Base):
+    __tablename__ = "ledger_entries"
+    __table_args__ = (
+        Index("ledger_entries_wallet_created_at_idx", "wallet_id", "created_at", postgresql_include=["amount"]),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    wallet_id: Mapped[int] = mapped_column(Integer, ForeignKey("wallets.id", ondelete="CASCADE"), nullable=False)
+    amount: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    entry_type: Mapped[str] = mapped_column(String(16), nullable=False)
+    transfer_uid: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True)
+    created_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime, server_default=func.clock_timestamp(), nullable=False
+    )
@@ -1,13 +1,18 @@
 import uuid
 import datetime
-from sqlalchemy import UUID, String, Float, Date
+from sqlalchemy import DDL, UUID, String, Float, DateTime, Index, event
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database.database import Base
 
 
 class TransferLog(Base):
-    __tablename__ = "wallets"
+    __tablename__ = "TransferLog"
+    __table_args__ = (
+        Index("transfer_log_sender_paid_on_idx", "sender", "paid_on", "transfer_uid"),
+        Index("transfer_log_receiver_paid_on_idx", "receiver", "paid_on", "transfer_uid"),
+        {"postgresql_partition_by": "RANGE (paid_on)"},
+    )
 
     transfer_uid: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     sender: Mapped[str] = mapped_column(String(16), nullable=False)
@@ -15,4 +20,11 @@ class TransferLog(Base):
     currency_sent: Mapped[str] = mapped_column(String(4), nullable=False)
     currency_received: Mapped[str] = mapped_column(String(4), nullable=False)
     money_sent: Mapped[float] = mapped_column(Float(2), default=0.0)
-    paid_on: Mapped[datetime.date] = mapped_column(Date, default=datetime.date.today())
+    money_received: Mapped[float] = mapped_column(Float, nullable=False)
+    paid_on: Mapped[datetime.datetime] = mapped_column(DateTime, primary_key=True, default=datetime.datetime.now)
+
+
+# Monthly partitions come from app.jobs.transfer_log_partitions, until then transfers land in the default one.
+event.listen(TransferLog.__table__, "after_create", DDL(
+    'CREATE TABLE "TransferLog_default" PARTITION OF "TransferLog" DEFAULT'
+))
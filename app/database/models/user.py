@@ -1,14 +1,18 @@
 import datetime
 
-from sqlalchemy import Integer, String, DateTime
+from sqlalchemy import Integer, String, DateTime, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.database import Wallet
+from app.database.models.wallet import Wallet
 from app.database.database import Base
 
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("users_email_pattern_idx", "email", postgresql_ops={"email": "varchar_pattern_ops"}),
+        Index("users_surname_pattern_idx", "surname", postgresql_ops={"surname": "varchar_pattern_ops"}),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String, nullable=False)
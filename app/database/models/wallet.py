@@ -1,4 +1,5 @@
 import datetime
+from typing import Optional
 
 from sqlalchemy import Integer, String, ForeignKey, Float, Boolean, Date, func
 from sqlalchemy.orm import Mapped, mapped_column
@@ -13,6 +14,7 @@ class Wallet(Base):
     number: Mapped[str] = mapped_column(String(16), unique=True, nullable=False)
     currency: Mapped[str] = mapped_column(String(4), nullable=False)
     balance: Mapped[float] = mapped_column(Float(2), default=0.0)
+    balance_slots: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     created_at: Mapped[datetime.date] = mapped_column(Date, default=datetime.date.today())
     updated_at: Mapped[datetime.date] = mapped_column(Date, onupdate=func.now())
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
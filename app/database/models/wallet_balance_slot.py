@@ -0,0 +1,14 @@
+from sqlalchemy import Integer, Float, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database.database import Base
+
+
+class WalletBalanceSlot(Base):
+    __tablename__ = "wallet_balance_slots"
+
+    wallet_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("wallets.id", ondelete="CASCADE"), primary_key=True
+    )
+    slot: Mapped[int] = mapped_column(Integer, primary_key=True)
+    balance: Mapped[float] = mapped_column(Float(2), nullable=False, default=0.0)
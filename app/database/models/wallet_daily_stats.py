@@ -0,0 +1,20 @@
+import datetime
+
+from sqlalchemy import BigInteger, Integer, String, Date, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database.database import Base
+
+
+class WalletDailyStats(Base):
+    __tablename__ = "wallet_daily_stats"
+
+    wallet_number: Mapped[str] = mapped_column(
+        String(16), ForeignKey("wallets.number", ondelete="CASCADE"), primary_key=True
+    )
+    day: Mapped[datetime.date] = mapped_column(Date, primary_key=True)
+    counterparty_currency: Mapped[str] = mapped_column(String(4), primary_key=True)
+    money_in: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    money_out: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    count_in: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    count_out: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -0,0 +1,157 @@
+import datetime
+import re
+from typing import NamedTuple, Optional
+
+from sqlalchemy import text
+
+from app.database.database import Session
+from app.database.models import TransferLog
+
+PARENT = TransferLog.__tablename__
+DEFAULT_PARTITION = f"{PARENT}_default"
+LEGACY_PARTITION = f"{PARENT}_legacy"
+
+PARTITION_BOUNDS = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+class Partition(NamedTuple):
+    name: str
+    start: Optional[datetime.date]
+    end: Optional[datetime.date]
+
+    @property
+    def is_default(self) -> bool:
+        return self.start is None
+
+
+def month_start(day: datetime.date) -> datetime.date:
+    return datetime.date(day.year, day.month, 1)
+
+
+def add_months(month: datetime.date, months: int) -> datetime.date:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime.date) -> str:
+    return f"{PARENT}_{month:%Y_%m}"
+
+
+def is_partitioned(db: Session) -> bool:
+    return db.scalar(text(
+        "SELECT EXISTS (SELECT FROM pg_partitioned_table WHERE partrelid = to_regclass(:parent))"
+    ), {"parent": f'"{PARENT}"'})
+
+
+def list_partitions(db: Session) -> list[Partition]:
+    """Partitions of TransferLog in bound order, the default partition first."""
+    partitions = []
+    for name, bounds in db.execute(text(
+        "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid WHERE pg_inherits.inhparent = to_regclass(:parent)"
+    ), {"parent": f'"{PARENT}"'}):
+        match = PARTITION_BOUNDS.search(bounds)
+        if match is None:
+            partitions.append(Partition(name, None, None))
+        else:
+            start, end = (datetime.datetime.fromisoformat(bound).date() for bound in match.groups())
+            partitions.append(Partition(name, start, end))
+    return sorted(partitions, key=lambda partition: (not partition.is_default, partition.start))
+
+
+def _bounds(start: datetime.date, end: datetime.date) -> str:
+    return f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+
+
+def create_partition(db: Session, month: datetime.date) -> str:
+    """Creates the partition of ``month``, moving into it the rows the default partition holds for that month."""
+    name, start, end = partition_name(month), month, add_months(month, 1)
+    in_default = f'"{DEFAULT_PARTITION}" WHERE paid_on >= :start AND paid_on < :end'
+    bounds = {"start": start, "end": end}
+    if not db.scalar(text(f"SELECT EXISTS (SELECT FROM {in_default})"), bounds):
+        db.execute(text(f'CREATE TABLE "{name}" PARTITION OF "{PARENT}" {_bounds(start, end)}'))
+        return name
+    # A partition can't be added over rows of the default partition, so they are moved out before attaching it.
+    db.execute(text(f'CREATE TABLE "{name}" (LIKE "{PARENT}" INCLUDING DEFAULTS)'))
+    db.execute(text(
+        f'WITH moved AS (DELETE FROM {in_default} RETURNING *) INSERT INTO "{name}" SELECT * FROM moved'
+    ), bounds)
+    db.execute(text(f'ALTER TABLE "{PARENT}" ATTACH PARTITION "{name}" {_bounds(start, end)}'))
+    return name
+
+
+def create_partitions(db: Session, first_month: datetime.date, last_month: datetime.date) -> list[str]:
+    """Creates the monthly partitions from ``first_month`` to ``last_month`` not covered by an existing partition."""
+    covered = [partition for partition in list_partitions(db) if not partition.is_default]
+    created = []
+    month = month_start(first_month)
+    while month <= last_month:
+        if not any(partition.start < add_months(month, 1) and month < partition.end for partition in covered):
+            created.append(create_partition(db, month))
+        month = add_months(month, 1)
+    return created
+
+
+def default_partition_months(db: Session) -> list[datetime.date]:
+    return [month.date() for month in db.scalars(text(
+        f"SELECT DISTINCT date_trunc('month', paid_on) FROM \"{DEFAULT_PARTITION}\" ORDER BY 1"
+    ))]
+
+
+def retained_since(today: datetime.date, retention_months: int) -> Optional[datetime.date]:
+    """First day of the history kept with ``retention_months`` full months before the current one, None for all."""
+    return add_months(month_start(today), -retention_months) if retention_months else None
+
+
+def expire_partitions(db: Session, before: datetime.date, drop: bool = False) -> list[str]:
+    """Detaches, or with ``drop`` drops, the partitions ending by ``before``; detached ones are left to be archived."""
+    expired = [
+        partition.name for partition in list_partitions(db) if not partition.is_default and partition.end <= before
+    ]
+    for name in expired:
+        db.execute(text(f'ALTER TABLE "{PARENT}" DETACH PARTITION "{name}"'))
+        if drop:
+            db.execute(text(f'DROP TABLE "{name}"'))
+    return expired
+
+
+def maintain_partitions(
+        db: Session, today: datetime.date, months_ahead: int, retention_months: int, drop: bool = False
+) -> tuple[list[str], list[str]]:
+    """Creates the partitions due and those of months in the default partition, then expires the ones past retention."""
+    this_month = month_start(today)
+    created = create_partitions(db, this_month, add_months(this_month, months_ahead))
+    for month in default_partition_months(db):
+        created += create_partitions(db, month, month)
+    since = retained_since(today, retention_months)
+    expired = expire_partitions(db, since, drop) if since is not None else []
+    return created, expired
+
+
+def partition_transfer_log(db: Session) -> Optional[Partition]:
+    """Turns an unpartitioned TransferLog into a partitioned one, its rows kept as a single legacy partition."""
+    # The legacy rows are read twice with TransferLog locked: to rebuild the primary key on (transfer_uid, paid_on)
+    # and to check them against the bounds of the legacy partition, which expires with its last month.
+    db.execute(text(f'ALTER TABLE "{PARENT}" RENAME TO "{LEGACY_PARTITION}"'))
+    db.execute(text(
+        f'ALTER TABLE "{LEGACY_PARTITION}" DROP CONSTRAINT "{PARENT}_pkey", '
+        f'ADD CONSTRAINT "{LEGACY_PARTITION}_pkey" PRIMARY KEY (transfer_uid, paid_on)'
+    ))
+    for index in TransferLog.__table__.indexes:
+        db.execute(text(f"ALTER INDEX IF EXISTS {index.name} RENAME TO {index.name}_legacy"))
+
+    db.execute(text(
+        f'CREATE TABLE "{PARENT}" (LIKE "{LEGACY_PARTITION}" INCLUDING DEFAULTS) PARTITION BY RANGE (paid_on)'
+    ))
+    db.execute(text(f'ALTER TABLE "{PARENT}" ADD PRIMARY KEY (transfer_uid, paid_on)'))
+    for index in TransferLog.__table__.indexes:
+        index.create(db.connection())
+    db.execute(text(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{PARENT}" DEFAULT'))
+
+    first, last = db.execute(text(f'SELECT min(paid_on), max(paid_on) FROM "{LEGACY_PARTITION}"')).one()
+    if first is None:
+        db.execute(text(f'DROP TABLE "{LEGACY_PARTITION}"'))
+        return None
+    start, end = month_start(first.date()), add_months(month_start(last.date()), 1)
+    db.execute(text(f'ALTER TABLE "{PARENT}" ATTACH PARTITION "{LEGACY_PARTITION}" {_bounds(start, end)}'))
+    return Partition(LEGACY_PARTITION, start, end)
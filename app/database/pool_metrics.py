@@ -0,0 +1,74 @@
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import Engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+CHECKOUT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+pool_checkout_seconds = Histogram(
+    "db_pool_checkout_seconds",
+    "Time a request waited to check a connection out of the pool",
+    ["pool"],
+    buckets=CHECKOUT_BUCKETS
+)
+pool_checkout_timeouts = Counter(
+    "db_pool_checkout_timeouts", "Checkouts that gave up after DB_POOL_TIMEOUT", ["pool"]
+)
+pool_connections_opened = Counter(
+    "db_pool_connections_opened", "New DBAPI connections opened by the pool", ["pool"]
+)
+pool_invalidations = Counter(
+    "db_pool_invalidations", "Pooled connections invalidated, hard or soft (e.g. failed pre-ping)", ["pool", "kind"]
+)
+pool_size = Gauge("db_pool_size", "Configured number of persistent connections", ["pool"])
+pool_max_overflow = Gauge("db_pool_max_overflow", "Configured number of overflow connections", ["pool"])
+pool_checked_out = Gauge("db_pool_checked_out", "Connections currently checked out", ["pool"])
+pool_checked_in = Gauge("db_pool_checked_in", "Idle connections waiting in the pool", ["pool"])
+pool_overflow = Gauge("db_pool_overflow", "Overflow connections currently open", ["pool"])
+
+
+class CheckoutTimingMixin:
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            pool_checkout_timeouts.labels(pool=self.logging_name).inc()
+            raise
+        finally:
+            pool_checkout_seconds.labels(pool=self.logging_name).observe(time.perf_counter() - started)
+
+
+class InstrumentedQueuePool(CheckoutTimingMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_engine(engine: Engine, name: str):
+    """Exports pool gauges and connection lifecycle counters for the engine under the ``pool`` label ``name``.
+
+    The engine must be created with ``pool_logging_name=name`` and one of the instrumented pool classes,
+    which time each checkout. Gauges read ``engine.pool`` on every scrape, so they follow ``engine.dispose()``.
+    """
+    pool_size.labels(pool=name).set_function(lambda: engine.pool.size())
+    pool_max_overflow.labels(pool=name).set_function(lambda: engine.pool._max_overflow)
+    pool_checked_out.labels(pool=name).set_function(lambda: engine.pool.checkedout())
+    pool_checked_in.labels(pool=name).set_function(lambda: engine.pool.checkedin())
+    pool_overflow.labels(pool=name).set_function(lambda: max(engine.pool.overflow(), 0))
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        pool_connections_opened.labels(pool=name).inc()
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        pool_invalidations.labels(pool=name, kind="hard").inc()
+
+    @event.listens_for(engine, "soft_invalidate")
+    def on_soft_invalidate(dbapi_connection, connection_record, exception):
+        pool_invalidations.labels(pool=name, kind="soft").inc()
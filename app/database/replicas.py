@@ -0,0 +1,144 @@
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from prometheus_client import Counter, Gauge
+from sqlalchemy import Engine, event, text
+from sqlalchemy.orm import Session
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# A replica that has replayed everything it received is caught up, however long ago the last write was.
+REPLICA_LAG = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+replica_healthy = Gauge(
+    "db_replica_healthy", "1 while the replica takes reads, 0 while they go to the primary", ["replica"]
+)
+replica_lag_seconds = Gauge("db_replica_lag_seconds", "Replication lag found by the last health check", ["replica"])
+reads_routed = Counter("db_reads_routed", "Read-only requests by the database serving them", ["target"])
+
+# Set in Session.info to the index of the replica a session reads from.
+REPLICA_SESSION_KEY = "replica"
+
+
+def on_replica(db: Session) -> bool:
+    return REPLICA_SESSION_KEY in db.info
+
+
+def replica_lag(engine: Engine) -> float:
+    with engine.connect() as connection:
+        return float(connection.execute(REPLICA_LAG).scalar_one() or 0.0)
+
+
+class ReplicaSet:
+    """Picks a replica for read-only requests, round-robin over the ones found healthy by the last check.
+
+    A replica is healthy while its lag is at most ``max_lag``; failing a check or a statement takes it out until
+    the next check passes. ``choose()`` returns None, meaning the primary, when none is healthy and for users who
+    wrote in the last ``sticky_seconds``, so they read their own writes.
+    """
+
+    def __init__(
+            self,
+            engines: list[Engine],
+            max_lag: float = config.DB_REPLICA_MAX_LAG,
+            check_interval: float = config.DB_REPLICA_CHECK_INTERVAL,
+            sticky_seconds: float = config.DB_REPLICA_STICKY_SECONDS,
+            lag: Callable[[Engine], float] = replica_lag
+    ):
+        self.engines = engines
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.sticky_seconds = sticky_seconds
+        self._lag = lag
+        self._healthy: list[int] = []
+        self._states: dict[int, bool] = {}
+        self._next = itertools.count()
+        self._pinned: OrderedDict[int, float] = OrderedDict()
+        self._lock = threading.Lock()
+        self._checker: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        for index, engine in enumerate(engines):
+            replica_healthy.labels(replica=str(index)).set(0)
+            self.watch_errors(index, engine)
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def watch_errors(self, index: int, engine: Engine):
+        """Takes replica ``index`` out of rotation when a connection to it through ``engine`` fails."""
+        @event.listens_for(engine, "handle_error")
+        def on_error(context):
+            if context.is_disconnect or context.connection is None:
+                self.failed(index, context.original_exception)
+
+    def failed(self, index: int, exc: BaseException):
+        self._mark(index, healthy=False, reason=f"connection failed, {exc.__class__.__name__}: {exc}")
+
+    def _mark(self, index: int, healthy: bool, reason: str = "") -> bool:
+        with self._lock:
+            changed = self._states.get(index) != healthy
+            self._states[index] = healthy
+            if changed and healthy:
+                self._healthy = sorted(self._healthy + [index])
+            elif changed:
+                self._healthy = [healthy_index for healthy_index in self._healthy if healthy_index != index]
+        replica_healthy.labels(replica=str(index)).set(int(healthy))
+        if changed and healthy:
+            logger.info("Replica %d is in rotation", index)
+        elif changed:
+            logger.warning("Replica %d is out of rotation: %s", index, reason)
+        return changed
+
+    def check(self):
+        for index, engine in enumerate(self.engines):
+            try:
+                lag = self._lag(engine)
+            except Exception as exc:
+                self._mark(index, healthy=False, reason=f"health check failed, {exc.__class__.__name__}")
+                continue
+            replica_lag_seconds.labels(replica=str(index)).set(lag)
+            self._mark(index, healthy=lag <= self.max_lag, reason=f"{lag:.1f}s behind the primary")
+
+    def pin(self, user_id: int):
+        with self._lock:
+            self._pinned.pop(user_id, None)
+            self._pinned[user_id] = time.monotonic() + self.sticky_seconds
+            # Pins are added in expiry order, so the expired ones are at the front.
+            while self._pinned and next(iter(self._pinned.values())) <= time.monotonic():
+                self._pinned.popitem(last=False)
+
+    def is_pinned(self, user_id: Optional[int]) -> bool:
+        return user_id is not None and self._pinned.get(user_id, 0.0) > time.monotonic()
+
+    def choose(self, user_id: Optional[int] = None) -> Optional[int]:
+        healthy = self._healthy
+        if not healthy or self.is_pinned(user_id):
+            reads_routed.labels(target="primary").inc()
+            return None
+        reads_routed.labels(target="replica").inc()
+        return healthy[next(self._next) % len(healthy)]
+
+    def start_health_checks(self):
+        if not self.engines or (self._checker is not None and self._checker.is_alive()):
+            return
+        self._stop.clear()
+        self.check()
+
+        def run():
+            while not self._stop.wait(self.check_interval):
+                self.check()
+
+        self._checker = threading.Thread(target=run, name="replica-health", daemon=True)
+        self._checker.start()
+
+    def stop_health_checks(self):
+        self._stop.set()
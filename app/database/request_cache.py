@@ -0,0 +1,20 @@
+from typing import Optional
+
+from app.database.database import Session
+from app.database.models.user import User
+from app.database.models.wallet import Wallet
+
+REQUEST_CACHE_KEY = "request_cache"
+
+
+class RequestCache:
+    def __init__(self):
+        self.users: dict[int, Optional[User]] = {}
+        self.wallets: dict[str, Optional[Wallet]] = {}
+
+
+def get_request_cache(db: Session) -> RequestCache:
+    cache = db.info.get(REQUEST_CACHE_KEY)
+    if cache is None:
+        cache = db.info[REQUEST_CACHE_KEY] = RequestCache()
+    return cache
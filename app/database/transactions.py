@@ -0,0 +1,67 @@
+import asyncio
+import random
+import time
+from typing import Callable, TypeVar
+
+from sqlalchemy.exc import DBAPIError
+
+from app.database.async_database import AsyncSession
+from app.database.database import Session
+from config import config
+
+T = TypeVar("T")
+
+SERIALIZATION_FAILURE = "40001"
+DEADLOCK_DETECTED = "40P01"
+RETRYABLE_ERROR_CODES = {SERIALIZATION_FAILURE, DEADLOCK_DETECTED}
+
+
+def is_retryable_error(exc: DBAPIError) -> bool:
+    return getattr(exc.orig, "pgcode", None) in RETRYABLE_ERROR_CODES
+
+
+def backoff_delay(attempt: int, backoff_base: float) -> float:
+    return random.uniform(0, backoff_base * 2 ** attempt)
+
+
+def run_in_transaction(
+        db: Session,
+        operation: Callable[[], T],
+        retries: int = config.DB_TRANSACTION_RETRIES,
+        backoff_base: float = config.DB_TRANSACTION_BACKOFF_BASE
+) -> T:
+    for attempt in range(retries + 1):
+        try:
+            result = operation()
+            db.commit()
+            return result
+        except DBAPIError as exc:
+            db.rollback()
+            if not is_retryable_error(exc) or attempt == retries:
+                raise
+            time.sleep(backoff_delay(attempt, backoff_base))
+        except Exception:
+            db.rollback()
+            raise
+
+
+async def run_in_transaction_async(
+        db: AsyncSession,
+        operation: Callable[[Session], T],
+        retries: int = config.DB_TRANSACTION_RETRIES,
+        backoff_base: float = config.DB_TRANSACTION_BACKOFF_BASE
+) -> T:
+    # Only the operation runs in run_sync; the backoff is awaited so other requests proceed meanwhile.
+    for attempt in range(retries + 1):
+        try:
+            result = await db.run_sync(operation)
+            await db.commit()
+            return result
+        except DBAPIError as exc:
+            await db.rollback()
+            if not is_retryable_error(exc) or attempt == retries:
+                raise
+            await asyncio.sleep(backoff_delay(attempt, backoff_base))
+        except Exception:
+            await db.rollback()
+            raise
@@ -0,0 +1,152 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException
+from prometheus_client import Histogram
+from sqlalchemy import insert
+
+from app.database.database import Session
+from app.database.models import TransferLog
+from app.database.transactions import run_in_transaction
+from app.database.wallet_stats import post_wallet_stats, transfer_stats
+from config import config
+
+logger = logging.getLogger(__name__)
+
+TransferOperation = Callable[[Session, list[dict]], Any]
+
+group_size = Histogram(
+    "transfer_writer_group_size",
+    "Transfers committed together by the group commit writer",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+
+
+class GroupCommitWriter:
+    """Runs transfers from concurrent requests on one thread and commits them in groups.
+
+    A group is whatever was submitted within ``max_delay`` seconds of its first transfer, up to ``max_size``.
+    Its operations run in order in one transaction and append their TransferLog rows to a shared list,
+    inserted in one multi-row statement and added to the wallet rollups in another before the commit,
+    so concurrent transfers share a commit and its fsync.
+    Futures resolve only once the group is committed.
+
+    Each operation runs in a savepoint: one raising HTTPException is rolled back alone, TransferLog rows
+    included, and the rest of its group carries on. When a group fails in any other way, its operations are
+    retried one transaction each.
+    """
+
+    def __init__(
+            self,
+            session_factory: Callable[[], Session] = Session,
+            max_size: int = config.TRANSFER_GROUP_COMMIT_MAX_SIZE,
+            max_delay: float = config.TRANSFER_GROUP_COMMIT_MAX_DELAY
+    ):
+        self._session_factory = session_factory
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self._closed = False
+
+    def submit(self, operation: TransferOperation) -> Future:
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("transfer writer is closed")
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name="transfer-writer", daemon=True)
+                self._writer.start()
+            self._queue.put((operation, future))
+        return future
+
+    def run(self, operation: TransferOperation) -> Any:
+        return self.submit(operation).result()
+
+    def close(self):
+        """Commits the transfers already submitted and stops the writer thread."""
+        with self._lock:
+            self._closed = True
+            writer = self._writer
+            if writer is not None:
+                self._queue.put(None)
+        if writer is not None:
+            writer.join()
+
+    def _run(self):
+        db = self._session_factory()
+        try:
+            while True:
+                group = self._next_group()
+                if group is None:
+                    break
+                group_size.observe(len(group))
+                self._commit_group(db, group)
+        finally:
+            db.close()
+
+    def _next_group(self) -> Optional[list]:
+        first = self._queue.get()
+        if first is None:
+            return None
+        group = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(group) < self.max_size:
+            timeout = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            group.append(item)
+        return group
+
+    def _commit_group(self, db: Session, group: list):
+        group = [(operation, future) for operation, future in group if future.set_running_or_notify_cancel()]
+        try:
+            outcomes = run_in_transaction(db, lambda: self._execute(db, [operation for operation, _ in group]))
+        except Exception as exc:
+            if len(group) == 1:
+                outcomes = [exc]
+            else:
+                logger.warning("Group commit of %d transfers failed, retrying them one by one: %s", len(group), exc)
+                outcomes = [self._commit_alone(db, operation) for operation, _ in group]
+        for (_, future), outcome in zip(group, outcomes):
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+    def _commit_alone(self, db: Session, operation: TransferOperation):
+        try:
+            [outcome] = run_in_transaction(db, lambda: self._execute(db, [operation]))
+        except Exception as exc:
+            return exc
+        return outcome
+
+    @staticmethod
+    def _execute(db: Session, operations: list[TransferOperation]) -> list:
+        transfer_logs = []
+        outcomes = []
+        for operation in operations:
+            appended = len(transfer_logs)
+            try:
+                with db.begin_nested():
+                    outcomes.append(operation(db, transfer_logs))
+            except HTTPException as exc:
+                del transfer_logs[appended:]
+                outcomes.append(exc)
+        if transfer_logs:
+            db.execute(insert(TransferLog), transfer_logs)
+            post_wallet_stats(db, transfer_stats(transfer_logs))
+        return outcomes
+
+
+transfer_writer = GroupCommitWriter()
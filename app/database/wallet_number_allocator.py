@@ -0,0 +1,93 @@
+import threading
+from abc import ABC, abstractmethod
+
+from sqlalchemy import Sequence, func, select
+
+from app.api.constants import WALLET_PREFIX
+from app.api.schemas import WalletNumberType
+from app.database.database import Base, Session
+from config import config
+
+WALLET_NUMBER_DIGITS = 9
+WALLET_NUMBER_SPACE = 10 ** WALLET_NUMBER_DIGITS
+WALLET_NUMBER_MULTIPLIER = 387420489
+WALLET_NUMBER_OFFSET = 104729
+
+wallet_number_seq = Sequence(
+    "wallet_number_seq", start=0, minvalue=0, maxvalue=WALLET_NUMBER_SPACE - 1, metadata=Base.metadata
+)
+
+
+class WalletNumberSpaceExhausted(Exception):
+    pass
+
+
+def luhn_check_digit(digits: str) -> int:
+    total = 0
+    for position, digit in enumerate(reversed(digits)):
+        value = int(digit)
+        if position % 2 == 0:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return (10 - total % 10) % 10
+
+
+def is_valid_wallet_number(wallet_number: WalletNumberType) -> bool:
+    digits = wallet_number[len(WALLET_PREFIX):len(WALLET_PREFIX) + WALLET_NUMBER_DIGITS + 1]
+    return digits.isdigit() and luhn_check_digit(digits[:-1]) == int(digits[-1])
+
+
+def encode_wallet_number(sequence_value: int, currency: str) -> WalletNumberType:
+    if not 0 <= sequence_value < WALLET_NUMBER_SPACE:
+        raise WalletNumberSpaceExhausted(f"Wallet number sequence value {sequence_value} is out of range")
+    permuted = (sequence_value * WALLET_NUMBER_MULTIPLIER + WALLET_NUMBER_OFFSET) % WALLET_NUMBER_SPACE
+    digits = f"{permuted:0{WALLET_NUMBER_DIGITS}d}"
+    return WALLET_PREFIX + digits + str(luhn_check_digit(digits)) + currency
+
+
+class WalletNumberAllocator(ABC):
+    @abstractmethod
+    def allocate(self, db: Session, currency: str) -> WalletNumberType:
+        ...
+
+
+class SequenceWalletNumberAllocator(WalletNumberAllocator):
+    def allocate(self, db: Session, currency: str) -> WalletNumberType:
+        return encode_wallet_number(db.scalar(select(wallet_number_seq.next_value())), currency)
+
+
+class BlockWalletNumberAllocator(WalletNumberAllocator):
+    def __init__(self, block_size: int):
+        self.block_size = block_size
+        self._reserved: list[int] = []
+        self._lock = threading.Lock()
+
+    def _reserve_block(self, db: Session) -> list[int]:
+        return list(db.scalars(
+            select(wallet_number_seq.next_value()).select_from(func.generate_series(1, self.block_size))
+        ))
+
+    def allocate(self, db: Session, currency: str) -> WalletNumberType:
+        # The block is fetched outside the lock: under the async engine the query yields to the event loop,
+        # and another request on the same thread would otherwise block on the lock forever.
+        while True:
+            with self._lock:
+                if self._reserved:
+                    return encode_wallet_number(self._reserved.pop(), currency)
+            block = self._reserve_block(db)
+            block.reverse()
+            with self._lock:
+                self._reserved.extend(block)
+
+
+def create_wallet_number_allocator(kind: str = config.WALLET_NUMBER_ALLOCATOR) -> WalletNumberAllocator:
+    if kind == "sequence":
+        return SequenceWalletNumberAllocator()
+    if kind == "block":
+        return BlockWalletNumberAllocator(block_size=config.WALLET_NUMBER_BLOCK_SIZE)
+    raise ValueError(f"Unknown wallet number allocator: {kind}")
+
+
+wallet_number_allocator = create_wallet_number_allocator()
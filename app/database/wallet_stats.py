@@ -0,0 +1,127 @@
+import datetime
+from typing import Iterable
+
+from sqlalchemy import BigInteger, Date, Numeric, Select, String, cast, delete, func, literal, select, text, \
+    union_all
+from sqlalchemy.dialects.postgresql import insert
+
+from app.database.database import Session
+from app.database.ledger import MINOR_UNITS, TOP_UP, to_minor_units
+from app.database.models import LedgerEntry, TransferLog, Wallet, WalletDailyStats
+
+# Top-ups have no counterparty, their rollups are kept under this instead of a currency.
+TOP_UP_COUNTERPARTY = ""
+
+STATS_COLUMNS = ("money_in", "money_out", "count_in", "count_out")
+
+StatsKey = tuple[str, datetime.date, str]
+
+
+def _add(stats: dict[StatsKey, list[int]], key: StatsKey, amount: int, incoming: bool):
+    totals = stats.setdefault(key, [0, 0, 0, 0])
+    totals[0 if incoming else 1] += amount
+    totals[2 if incoming else 3] += 1
+
+
+def transfer_stats(transfer_logs: Iterable[dict]) -> dict[StatsKey, list[int]]:
+    """Sums TransferLog rows in minor units per wallet, day and counterparty currency; self-transfers count twice."""
+    stats = {}
+    for log in transfer_logs:
+        day = log["paid_on"].date()
+        _add(stats, (log["sender"], day, log["currency_received"]), to_minor_units(log["money_sent"]), False)
+        _add(stats, (log["receiver"], day, log["currency_sent"]), to_minor_units(log["money_received"]), True)
+    return stats
+
+
+def top_up_stats(wallet_number: str, amount: float, day: datetime.date) -> dict[StatsKey, list[int]]:
+    stats = {}
+    _add(stats, (wallet_number, day, TOP_UP_COUNTERPARTY), to_minor_units(amount), True)
+    return stats
+
+
+def post_wallet_stats(db: Session, stats: dict[StatsKey, list[int]]):
+    """Adds ``stats`` to the rollups in one upsert, in key order, so concurrent writers lock rows in the same order."""
+    if not stats:
+        return
+    statement = insert(WalletDailyStats).values([
+        {
+            "wallet_number": wallet_number,
+            "day": day,
+            "counterparty_currency": counterparty_currency,
+            **dict(zip(STATS_COLUMNS, totals)),
+        }
+        for (wallet_number, day, counterparty_currency), totals in sorted(stats.items())
+    ])
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[
+            WalletDailyStats.wallet_number, WalletDailyStats.day, WalletDailyStats.counterparty_currency
+        ],
+        set_={
+            name: getattr(WalletDailyStats, name) + getattr(statement.excluded, name) for name in STATS_COLUMNS
+        }
+    ))
+
+
+def _minor_units(column):
+    return cast(func.round(cast(column, Numeric) * MINOR_UNITS), BigInteger)
+
+
+def select_stats_from_history(start: datetime.datetime, end: datetime.datetime) -> Select:
+    """Selects rollup rows of the transfers and top-ups made in [start, end) from TransferLog and the ledger."""
+    paid_on = (TransferLog.paid_on >= start, TransferLog.paid_on < end)
+    day = cast(TransferLog.paid_on, Date)
+    legs = union_all(
+        select(
+            TransferLog.sender, day, TransferLog.currency_received,
+            literal(0, BigInteger), _minor_units(TransferLog.money_sent), literal(0), literal(1)
+        ).where(*paid_on),
+        select(
+            TransferLog.receiver, day, TransferLog.currency_sent,
+            _minor_units(TransferLog.money_received), literal(0, BigInteger), literal(1), literal(0)
+        ).where(*paid_on),
+        select(
+            Wallet.number, cast(LedgerEntry.created_at, Date), literal(TOP_UP_COUNTERPARTY, String),
+            LedgerEntry.amount, literal(0, BigInteger), literal(1), literal(0)
+        ).join(Wallet, Wallet.id == LedgerEntry.wallet_id).where(
+            LedgerEntry.entry_type == TOP_UP, LedgerEntry.created_at >= start, LedgerEntry.created_at < end
+        ),
+    ).subquery("legs")
+    keys = list(legs.c)[:3]
+    return select(*keys, *(func.sum(column) for column in list(legs.c)[3:])).group_by(*keys)
+
+
+def rebuild_wallet_stats(db: Session, day_from: datetime.date, day_to: datetime.date) -> int:
+    """Recomputes the rollups of the days from ``day_from`` to ``day_to`` inclusive; returns the rows written."""
+    # Waits for transfers and top-ups that already wrote rollups; those writing meanwhile stall until this
+    # transaction commits, then add themselves to the rebuilt rows.
+    db.execute(text(f"LOCK TABLE {WalletDailyStats.__tablename__} IN SHARE ROW EXCLUSIVE MODE"))
+    db.execute(delete(WalletDailyStats).where(WalletDailyStats.day.between(day_from, day_to)))
+    start = datetime.datetime.combine(day_from, datetime.time())
+    end = datetime.datetime.combine(day_to + datetime.timedelta(days=1), datetime.time())
+    return db.execute(insert(WalletDailyStats).from_select(
+        ["wallet_number", "day", "counterparty_currency", *STATS_COLUMNS], select_stats_from_history(start, end)
+    )).rowcount
+
+
+def history_start(db: Session) -> datetime.date:
+    """Day of the earliest transfer or top-up, today when there is none."""
+    first_transfer = select(func.min(TransferLog.paid_on)).scalar_subquery()
+    first_top_up = select(func.min(LedgerEntry.created_at)).where(
+        LedgerEntry.entry_type == TOP_UP
+    ).scalar_subquery()
+    first = db.scalar(select(func.least(first_transfer, first_top_up)))
+    return first.date() if first is not None else datetime.date.today()
+
+
+def select_statement_rows(
+        wallet_number: str, day_from: datetime.date, day_to: datetime.date, granularity: str
+) -> Select:
+    """Selects the rollups of a wallet summed per period, labelled by the day it starts on, and counterparty."""
+    period = cast(func.date_trunc(granularity, WalletDailyStats.day), Date).label("period")
+    return select(
+        period,
+        WalletDailyStats.counterparty_currency,
+        *(func.sum(getattr(WalletDailyStats, name)).label(name) for name in STATS_COLUMNS)
+    ).where(
+        WalletDailyStats.wallet_number == wallet_number, WalletDailyStats.day.between(day_from, day_to)
+    ).group_by(period, WalletDailyStats.counterparty_currency).order_by(period, WalletDailyStats.counterparty_currency)
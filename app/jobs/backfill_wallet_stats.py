@@ -0,0 +1,79 @@
+import argparse
+import datetime
+import logging
+import time
+from typing import Iterator, Optional
+
+from app.database import Session
+from app.database.partitions import retained_since
+from app.database.wallet_stats import history_start, rebuild_wallet_stats
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+def month_batches(
+        day_from: datetime.date, day_to: datetime.date, months: int = 1
+) -> Iterator[tuple[datetime.date, datetime.date]]:
+    """Splits the days from ``day_from`` to ``day_to`` inclusive into runs of ``months`` calendar months."""
+    while day_from <= day_to:
+        month = day_from.year * 12 + day_from.month - 1 + months
+        batch_end = datetime.date(month // 12, month % 12 + 1, 1) - datetime.timedelta(days=1)
+        yield day_from, min(batch_end, day_to)
+        day_from = batch_end + datetime.timedelta(days=1)
+
+
+def backfill_wallet_stats(
+        day_from: Optional[datetime.date] = None, day_to: Optional[datetime.date] = None, months: int = 1
+) -> int:
+    # A transaction per batch holds the rollups lock, which stalls transfers and top-ups, only while a batch is
+    # rebuilt. Nothing indexes TransferLog on paid_on alone, so each batch reads the whole partitions it spans, or the
+    # whole table if it isn't partitioned; there wider batches mean fewer reads but longer stalls.
+    db = Session()
+    try:
+        if day_from is None:
+            day_from = history_start(db)
+            since = retained_since(datetime.date.today(), config.TRANSFER_LOG_RETENTION_MONTHS)
+            if since is not None:
+                day_from = max(day_from, since)
+        day_to = day_to if day_to is not None else datetime.date.today()
+        total = 0
+        for first, last in month_batches(day_from, day_to, months):
+            started = time.perf_counter()
+            written = rebuild_wallet_stats(db, first, last)
+            db.commit()
+            logger.info(
+                "Rebuilt %d rollups from %s to %s in %.2fs", written, first, last, time.perf_counter() - started
+            )
+            total += written
+        return total
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Rebuild wallet_daily_stats, which statements read, from TransferLog and the top-up ledger "
+                    "entries. Transfers and top-ups keep the rollups up to date themselves; run this after loading "
+                    "history by other means or to repair them."
+    )
+    parser.add_argument("--from", dest="day_from", type=datetime.date.fromisoformat,
+                        help="first day to rebuild, the day of the earliest transfer or top-up still retained "
+                             "by default")
+    parser.add_argument("--to", dest="day_to", type=datetime.date.fromisoformat,
+                        help="last day to rebuild, today by default")
+    parser.add_argument("--batch-months", type=int, default=1, help="calendar months rebuilt per transaction")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.batch_months < 1:
+        parser.error("--batch-months must be at least 1")
+    if args.day_from is not None and args.day_to is not None and args.day_to < args.day_from:
+        parser.error("--to must not be before --from")
+    retained = retained_since(datetime.date.today(), config.TRANSFER_LOG_RETENTION_MONTHS)
+    if args.day_from is not None and retained is not None and args.day_from < retained:
+        # Rebuilding would replace the rollups of transfers whose partitions have expired with nothing.
+        parser.error(f"--from must not be before {retained}, the first day TransferLog retains")
+    started = time.perf_counter()
+    total = backfill_wallet_stats(args.day_from, args.day_to, args.batch_months)
+    logger.info("Rebuilt %d wallet rollups in %.1fs", total, time.perf_counter() - started)
@@ -0,0 +1,34 @@
+import argparse
+import logging
+import time
+
+from app.database import Session
+from app.database.idempotency import idempotency_store
+
+logger = logging.getLogger(__name__)
+
+
+def purge_idempotency_keys() -> int:
+    db = Session()
+    try:
+        purged = idempotency_store.purge_expired(db)
+        db.commit()
+        return purged
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Delete idempotency keys older than IDEMPOTENCY_KEY_RETENTION. Expired keys are already "
+                    "ignored and reclaimed by requests, this only keeps the table small."
+    )
+    parser.add_argument("--interval", type=float, default=0, help="seconds between runs, 0 runs once")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    while True:
+        logger.info("Purged %d expired idempotency keys", purge_idempotency_keys())
+        if not args.interval:
+            break
+        time.sleep(args.interval)
@@ -0,0 +1,428 @@
+import argparse
+import datetime
+import io
+import logging
+import multiprocessing
+import re
+import secrets
+import time
+from typing import Callable, NamedTuple, Optional, Sequence
+
+import numpy as np
+from faker import Faker
+from sqlalchemy import text
+
+from app.api.constants import EARLIEST_DATETIME, WALLET_PREFIX
+from app.currency_api.rate_matrix import RateMatrix
+from app.database import Session
+from app.database.database import engine
+from app.database.partitions import create_partitions, is_partitioned
+from app.database.wallet_number_allocator import (
+    WALLET_NUMBER_DIGITS, WALLET_NUMBER_MULTIPLIER, WALLET_NUMBER_OFFSET, WALLET_NUMBER_SPACE, wallet_number_seq
+)
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Approximate units per dollar. Seeding must not depend on the exchange-rate API, and the history only needs
+# plausible converted amounts, not the rates of any particular day.
+SEED_RATES = {"CHF": 0.89, "EUR": 0.92, "GBP": 0.79, "JPY": 141.0, "PLN": 4.02, "UAH": 36.9, "USD": 1.0}
+
+DEFAULT_WALLETS_PER_USER = "1=60,2=25,3=10,4=5"
+DEFAULT_CURRENCIES = "PLN=40,EUR=25,USD=25,GBP=7,CHF=3"
+
+MICROSECONDS_PER_DAY = 86400 * 10 ** 6
+NAME_POOL_SIZE = 1000
+CURRENCY_DRAW_CHUNK = 1000000
+EMAIL_PART_LENGTH = 20
+
+TRANSFER_LOG_INDEXES = ("transfer_log_sender_paid_on_idx", "transfer_log_receiver_paid_on_idx")
+
+COPY_USERS = "COPY users (id, name, surname, email, created_at) FROM STDIN"
+COPY_WALLETS = "COPY wallets (id, number, currency, balance, created_at, updated_at, owner_id) FROM STDIN"
+COPY_TRANSFER_LOG = (
+    'COPY "TransferLog" (transfer_uid, sender, receiver, currency_sent, currency_received, money_sent, '
+    'money_received, paid_on) FROM STDIN'
+)
+
+
+class SeedPlan(NamedTuple):
+    """Everything drawn up front, by index from the reserved ranges, so workers can generate any chunk alone."""
+    seed: int
+    start: datetime.date
+    days: int
+    currencies: list[str]
+    user_days: np.ndarray
+    wallet_offsets: np.ndarray
+    wallet_currencies: np.ndarray
+    wallet_days: np.ndarray
+    activity: np.ndarray
+    user_id_start: int = 0
+    wallet_id_start: int = 0
+    number_start: int = 0
+
+    @property
+    def users(self) -> int:
+        return len(self.user_days)
+
+    @property
+    def wallets(self) -> int:
+        return len(self.wallet_currencies)
+
+
+def parse_weights(spec: str, key: Callable = str) -> dict:
+    weights = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        try:
+            weights[key(name.strip())] = float(weight or 1)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid weight {part!r}, expected name=weight")
+    if not weights or min(weights.values()) < 0 or sum(weights.values()) <= 0:
+        raise argparse.ArgumentTypeError(f"weights {spec!r} must be non-negative and not all zero")
+    return weights
+
+
+def _probabilities(weights: dict) -> np.ndarray:
+    values = np.array(list(weights.values()), dtype=np.float64)
+    return values / values.sum()
+
+
+def _wallet_currencies(rng: np.random.Generator, counts: np.ndarray, probabilities: np.ndarray) -> np.ndarray:
+    """Currencies of each user's wallets, drawn without replacement: the app allows one wallet per currency."""
+    chunks = []
+    for first in range(0, len(counts), CURRENCY_DRAW_CHUNK):
+        block = counts[first:first + CURRENCY_DRAW_CHUNK]
+        # Exponential variates divided by the weights, sorted, put the currencies in a weighted random order.
+        with np.errstate(divide="ignore"):
+            keys = rng.standard_exponential((len(block), len(probabilities)), dtype=np.float32) / probabilities
+        order = np.argsort(keys, axis=1)
+        chunks.append(order[np.arange(len(probabilities)) < block[:, None]])
+    return np.concatenate(chunks).astype(np.uint8)
+
+
+def draw_plan(
+        users: int,
+        wallets_per_user: dict[int, float],
+        currencies: dict[str, float],
+        activity_exponent: float,
+        start: datetime.date,
+        end: datetime.date,
+        seed: int,
+) -> SeedPlan:
+    rng = np.random.default_rng(seed)
+    days = (end - start).days
+    currency_probabilities = _probabilities(currencies).astype(np.float32)
+    counts = rng.choice(np.array(list(wallets_per_user), dtype=np.int64), users, p=_probabilities(wallets_per_user))
+    counts = np.minimum(counts, np.count_nonzero(currency_probabilities))
+    user_days = rng.integers(0, days, users)
+    wallets = int(counts.sum())
+    # A wallet opens on or after the day its owner signed up.
+    owner_days = np.repeat(user_days, counts)
+    wallet_days = owner_days + (rng.random(wallets) * (days - owner_days)).astype(np.int64)
+    # Pareto weights give a power law of transfer counts: most wallets send and receive a handful of transfers,
+    # a few hot ones account for a large share of the history.
+    activity = np.cumsum(rng.pareto(activity_exponent, wallets) + 1)
+    return SeedPlan(
+        seed=seed,
+        start=start,
+        days=days,
+        currencies=list(currencies),
+        user_days=user_days.astype(np.int32),
+        wallet_offsets=np.concatenate(([0], np.cumsum(counts))),
+        wallet_currencies=_wallet_currencies(rng, counts, currency_probabilities),
+        wallet_days=wallet_days.astype(np.int32),
+        activity=activity,
+    )
+
+
+def wallet_numbers(sequence_values: np.ndarray, currencies: Sequence[str]) -> list[str]:
+    """encode_wallet_number() for many sequence values at once."""
+    permuted = (np.asarray(sequence_values, dtype=np.int64) * WALLET_NUMBER_MULTIPLIER + WALLET_NUMBER_OFFSET)
+    permuted %= WALLET_NUMBER_SPACE
+    total = np.zeros_like(permuted)
+    for position in range(WALLET_NUMBER_DIGITS):
+        digit = permuted // 10 ** position % 10
+        if position % 2 == 0:
+            digit *= 2
+            digit -= 9 * (digit > 9)
+        total += digit
+    digits = (permuted * 10 + (10 - total % 10) % 10).tolist()
+    width = WALLET_NUMBER_DIGITS + 1
+    return [f"{WALLET_PREFIX}{value:0{width}d}{currency}" for value, currency in zip(digits, currencies)]
+
+
+def _copy_text(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _email_part(value: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", value.lower())[:EMAIL_PART_LENGTH] or "user"
+
+
+def _dates(start: datetime.date, days: np.ndarray) -> list[str]:
+    return np.datetime_as_string(np.datetime64(start, "D") + days.astype("timedelta64[D]")).tolist()
+
+
+def user_rows(plan: SeedPlan, fake: Faker, first: int, last: int) -> tuple[str, str]:
+    """COPY text for users ``first`` to ``last`` (exclusive) and their wallets."""
+    rng = np.random.default_rng([plan.seed, 0, first])
+    fake.seed_instance(f"{plan.seed}-{first}")
+    names = [fake.first_name() for _ in range(NAME_POOL_SIZE)]
+    surnames = [fake.last_name() for _ in range(NAME_POOL_SIZE)]
+    domains = sorted({fake.free_email_domain() for _ in range(NAME_POOL_SIZE // 10)})
+    picked = rng.integers(0, NAME_POOL_SIZE, (2, last - first)).tolist()
+    picked_domains = rng.integers(0, len(domains), last - first).tolist()
+    created_at = _dates(plan.start, plan.user_days[first:last])
+
+    users = io.StringIO()
+    for index, name, surname, domain, created in zip(range(first, last), *picked, picked_domains, created_at):
+        user_id = plan.user_id_start + index
+        email = f"{_email_part(names[name])}.{_email_part(surnames[surname])}.{user_id}@{domains[domain]}"
+        users.write(
+            f"{user_id}\t{_copy_text(names[name])}\t{_copy_text(surnames[surname])}\t{email}\t{created}\n"
+        )
+
+    wallet_first, wallet_last = int(plan.wallet_offsets[first]), int(plan.wallet_offsets[last])
+    owners = np.repeat(np.arange(first, last), np.diff(plan.wallet_offsets[first:last + 1])) + plan.user_id_start
+    currencies = [plan.currencies[index] for index in plan.wallet_currencies[wallet_first:wallet_last].tolist()]
+    numbers = wallet_numbers(np.arange(wallet_first, wallet_last) + plan.number_start, currencies)
+    balances = np.round(rng.lognormal(np.log(200), 1.5, wallet_last - wallet_first), 2).tolist()
+    opened = _dates(plan.start, plan.wallet_days[wallet_first:wallet_last])
+
+    wallets = io.StringIO()
+    for index, number, currency, balance, created, owner in zip(
+            range(wallet_first, wallet_last), numbers, currencies, balances, opened, owners.tolist()
+    ):
+        wallets.write(
+            f"{plan.wallet_id_start + index}\t{number}\t{currency}\t{balance}\t{created}\t{created}\t{owner}\n"
+        )
+    return users.getvalue(), wallets.getvalue()
+
+
+def transfer_rows(plan: SeedPlan, chunk: int, count: int) -> str:
+    """COPY text for ``count`` TransferLog rows, generated from the chunk number alone."""
+    rng = np.random.default_rng([plan.seed, 1, chunk])
+    total = plan.activity[-1]
+    senders = np.searchsorted(plan.activity, rng.random(count) * total, side="right")
+    receivers = np.searchsorted(plan.activity, rng.random(count) * total, side="right")
+    receivers[receivers == senders] += 1
+    receivers %= plan.wallets
+
+    currencies_sent = plan.wallet_currencies[senders]
+    currencies_received = plan.wallet_currencies[receivers]
+    matrix = RateMatrix({code: SEED_RATES[code] for code in plan.currencies})
+    # RateMatrix sorts its currencies; map the plan's currency indices onto its rows.
+    rows = np.array([matrix.index_of(code) for code in plan.currencies])
+    money_sent = np.maximum(np.round(rng.lognormal(np.log(50), 1.2, count), 2), 0.01)
+    money_received = matrix.convert_indices(rows[currencies_sent], rows[currencies_received], money_sent)
+
+    # A transfer happens after both of its wallets were opened.
+    first_day = np.maximum(plan.wallet_days[senders], plan.wallet_days[receivers])
+    offsets = (first_day + rng.random(count) * (plan.days - first_day)) * MICROSECONDS_PER_DAY
+    paid_on = np.datetime64(plan.start, "us") + offsets.astype("timedelta64[us]")
+
+    # Version 4 UUIDs, PostgreSQL accepts them as 32 hex digits. The reserved range is mixed in so that seeding
+    # twice with the same seed doesn't repeat primary keys.
+    uid_rng = np.random.default_rng([plan.seed, 2, chunk, plan.number_start])
+    uids = np.frombuffer(uid_rng.bytes(16 * count), dtype=np.uint8).reshape(count, 16).copy()
+    uids[:, 6] = uids[:, 6] & 0x0F | 0x40
+    uids[:, 8] = uids[:, 8] & 0x3F | 0x80
+    hexed = uids.tobytes().hex()
+
+    codes_sent = [plan.currencies[index] for index in currencies_sent.tolist()]
+    codes_received = [plan.currencies[index] for index in currencies_received.tolist()]
+    out = io.StringIO()
+    for index, sender, receiver, sent, received, amount_sent, amount_received, paid in zip(
+            range(count),
+            wallet_numbers(senders + plan.number_start, codes_sent),
+            wallet_numbers(receivers + plan.number_start, codes_received),
+            codes_sent,
+            codes_received,
+            money_sent.tolist(),
+            money_received.tolist(),
+            np.datetime_as_string(paid_on).tolist(),
+    ):
+        out.write(
+            f"{hexed[index * 32:index * 32 + 32]}\t{sender}\t{receiver}\t{sent}\t{received}\t{amount_sent}\t"
+            f"{amount_received}\t{paid}\n"
+        )
+    return out.getvalue()
+
+
+def reserve(db: Session, sequence: str, count: int) -> int:
+    """Advances ``sequence`` past ``count`` values and returns the first one, racing any concurrent nextval()."""
+    return db.execute(
+        text("SELECT setval(:sequence, nextval(:sequence) + :count - 1) - :count + 1"),
+        {"sequence": sequence, "count": count}
+    ).scalar_one()
+
+
+def reserve_ranges(db: Session, plan: SeedPlan) -> SeedPlan:
+    user_id_start = reserve(db, db.scalar(text("SELECT pg_get_serial_sequence('users', 'id')")), max(plan.users, 1))
+    wallet_id_start = reserve(
+        db, db.scalar(text("SELECT pg_get_serial_sequence('wallets', 'id')")), max(plan.wallets, 1)
+    )
+    number_start = reserve(db, wallet_number_seq.name, max(plan.wallets, 1))
+    return plan._replace(user_id_start=user_id_start, wallet_id_start=wallet_id_start, number_start=number_start)
+
+
+def drop_transfer_log_indexes(db: Session) -> list[str]:
+    definitions = db.scalars(
+        text("SELECT indexdef FROM pg_indexes WHERE tablename = 'TransferLog' AND indexname = ANY(:names)"),
+        {"names": list(TRANSFER_LOG_INDEXES)}
+    ).all()
+    for name in TRANSFER_LOG_INDEXES:
+        db.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    # Indexes of a partitioned TransferLog are defined ON ONLY the parent, which would rebuild them without the
+    # partitions' indexes.
+    return [definition.replace(" ON ONLY ", " ON ", 1) for definition in definitions]
+
+
+_plan: Optional[SeedPlan] = None
+_fake: Optional[Faker] = None
+
+
+def _init_worker(plan: SeedPlan, locale: str):
+    global _plan, _fake
+    _plan, _fake = plan, Faker(locale)
+    # Connections inherited from the parent must not be shared with it.
+    engine.dispose(close=False)
+
+
+def _copy(*statements: tuple[str, str]):
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SET synchronous_commit TO off")
+        for statement, rows in statements:
+            cursor.copy_expert(statement, io.StringIO(rows))
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def _seed_users(first: int, last: int) -> dict[str, int]:
+    users, wallets = user_rows(_plan, _fake, first, last)
+    _copy((COPY_USERS, users), (COPY_WALLETS, wallets))
+    return {"users": last - first, "wallets": int(_plan.wallet_offsets[last] - _plan.wallet_offsets[first])}
+
+
+def _seed_transfers(chunk: int, count: int) -> dict[str, int]:
+    _copy((COPY_TRANSFER_LOG, transfer_rows(_plan, chunk, count)))
+    return {"TransferLog": count}
+
+
+def _run_task(task: tuple) -> dict[str, int]:
+    function, *args = task
+    return function(*args)
+
+
+def seed_data(
+        plan: SeedPlan, transfers: int, workers: int, chunk_size: int, locale: str, defer_indexes: bool
+) -> dict[str, int]:
+    tasks = [(_seed_users, first, min(first + chunk_size, plan.users)) for first in range(0, plan.users, chunk_size)]
+    tasks += [
+        (_seed_transfers, chunk, min(chunk_size, transfers - first))
+        for chunk, first in enumerate(range(0, transfers, chunk_size))
+    ]
+    db = Session()
+    try:
+        definitions = drop_transfer_log_indexes(db) if defer_indexes else []
+        if is_partitioned(db):
+            partitions = create_partitions(db, plan.start, plan.start + datetime.timedelta(days=plan.days))
+            logger.info("Created %d TransferLog partitions", len(partitions))
+        db.commit()
+        totals = {"users": 0, "wallets": 0, "TransferLog": 0}
+        with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(plan, locale)) as pool:
+            for done, rows in enumerate(pool.imap_unordered(_run_task, tasks), 1):
+                for table, count in rows.items():
+                    totals[table] += count
+                progress = ", ".join(f"{count} {table}" for table, count in totals.items())
+                logger.info("Chunk %d/%d: %s", done, len(tasks), progress)
+        for definition in definitions:
+            logger.info("Rebuilding %s", definition)
+            db.execute(text(definition))
+        db.execute(text('ANALYZE users, wallets, "TransferLog"'))
+        db.commit()
+        return totals
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Fill the database with synthetic users, wallets and transfer history for performance work. "
+                    "Rows are generated by worker processes and loaded with COPY; run it against a database the "
+                    "application isn't writing to."
+    )
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--transfers", type=int, default=1000000, help="TransferLog rows")
+    parser.add_argument(
+        "--wallets-per-user", type=lambda spec: parse_weights(spec, int), default=DEFAULT_WALLETS_PER_USER,
+        help="weights of wallet counts, e.g. 1=60,2=25,3=10,4=5; users get at most one wallet per currency"
+    )
+    parser.add_argument(
+        "--currencies", type=parse_weights, default=DEFAULT_CURRENCIES,
+        help=f"weights of wallet currencies out of {', '.join(SEED_RATES)}"
+    )
+    parser.add_argument(
+        "--activity-exponent", type=float, default=1.16,
+        help="Pareto shape of per-wallet transfer counts, lower is more skewed (1.16 is roughly 80/20)"
+    )
+    parser.add_argument("--start", type=datetime.date.fromisoformat,
+                        default=datetime.datetime.fromisoformat(EARLIEST_DATETIME).date())
+    parser.add_argument("--end", type=datetime.date.fromisoformat, default=datetime.date.today(),
+                        help="exclusive, no row is dated on or after it")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=100000, help="rows per COPY")
+    parser.add_argument("--locale", default="en_US", help="Faker locale of names")
+    parser.add_argument("--seed", type=int, help="seed of the generated data, random by default")
+    parser.add_argument(
+        "--defer-indexes", action="store_true",
+        help="drop the TransferLog sender and receiver indexes during the load and rebuild them afterwards"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if unknown := sorted(set(args.currencies) - set(SEED_RATES)):
+        parser.error(f"no seed rate for {', '.join(unknown)}")
+    if args.end <= args.start:
+        parser.error("--end must be after --start")
+    if min(args.wallets_per_user) < 0:
+        parser.error("--wallets-per-user counts can't be negative")
+    if args.activity_exponent <= 0:
+        parser.error("--activity-exponent must be positive")
+    seed = args.seed if args.seed is not None else secrets.randbits(32)
+
+    started = time.perf_counter()
+    plan = draw_plan(
+        args.users, args.wallets_per_user, args.currencies, args.activity_exponent, args.start, args.end, seed
+    )
+    if args.transfers and plan.wallets < 2:
+        parser.error("transfers need at least two wallets")
+    db = Session()
+    try:
+        plan = reserve_ranges(db, plan)
+        db.commit()
+    finally:
+        db.close()
+    logger.info(
+        "Seeding %d users, %d wallets and %d transfers with seed %d", plan.users, plan.wallets, args.transfers, seed
+    )
+    totals = seed_data(plan, args.transfers, args.workers, args.chunk_size, args.locale, args.defer_indexes)
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "Seeded %s in %.1fs (%.0f rows/s)", ", ".join(f"{count} {table}" for table, count in totals.items()),
+        elapsed, sum(totals.values()) / elapsed
+    )
+    logger.info(
+        "Statements read wallet_daily_stats, which COPY bypasses: rebuild it with "
+        "`python -m app.jobs.backfill_wallet_stats --from %s --to %s`",
+        args.start, args.end - datetime.timedelta(days=1)
+    )
+    if config.WALLET_BALANCE_STORE == "ledger":
+        logger.warning(
+            "Balances were written to wallets.balance, which the ledger store doesn't read: post opening entries "
+            "with `python -m app.jobs.balance_snapshots --open` under WALLET_BALANCE_STORE=column"
+        )
@@ -0,0 +1,38 @@
+import argparse
+import logging
+
+from app.database import Session, Wallet
+from app.database.balance_store import balance_store, ShardedBalanceStore
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+def shard_wallet(wallet_number: str, slots: int = config.WALLET_BALANCE_SLOTS) -> float:
+    db = Session()
+    try:
+        wallet_id = db.query(Wallet.id).filter(Wallet.number == wallet_number).scalar()
+        if wallet_id is None:
+            raise LookupError(f"Wallet '{wallet_number}' doesn't exist")
+        balance = balance_store.shard_wallet(db, wallet_id, slots)
+        db.commit()
+        return balance
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Split the balance of a hot receiver wallet over several rows so concurrent credits to it "
+                    "stop queueing on one row lock"
+    )
+    parser.add_argument("wallet_number")
+    parser.add_argument("--slots", type=int, default=config.WALLET_BALANCE_SLOTS,
+                        help="number of balance slots, 1 merges them back into wallets.balance")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if not isinstance(balance_store, ShardedBalanceStore):
+        parser.error("sharded wallets are only read correctly by the sharded balance store")
+    logger.info("Moved %.2f of %s into %d balance slot(s)", shard_wallet(args.wallet_number, args.slots),
+                args.wallet_number, max(args.slots, 1))
@@ -0,0 +1,74 @@
+import argparse
+import datetime
+import logging
+import time
+
+from app.database import Session
+from app.database.partitions import is_partitioned, maintain_partitions, partition_transfer_log
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+def maintain_transfer_log_partitions(
+        months_ahead: int = config.TRANSFER_LOG_PARTITIONS_AHEAD,
+        retention_months: int = config.TRANSFER_LOG_RETENTION_MONTHS,
+        drop: bool = config.TRANSFER_LOG_RETENTION_DROP
+) -> tuple[list[str], list[str]]:
+    # Creating, attaching and detaching partitions lock TransferLog against transfers until the commit, so it all
+    # happens in one short transaction; only moving rows out of the default partition takes time.
+    db = Session()
+    try:
+        created, expired = maintain_partitions(db, datetime.date.today(), months_ahead, retention_months, drop)
+        db.commit()
+        return created, expired
+    finally:
+        db.close()
+
+
+def migrate_transfer_log() -> bool:
+    db = Session()
+    try:
+        if is_partitioned(db):
+            return False
+        legacy = partition_transfer_log(db)
+        db.commit()
+        if legacy is not None:
+            logger.info("Kept the existing transfers as %s, from %s to %s", *legacy)
+        return True
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Create the monthly TransferLog partitions ahead of time and expire the ones older than "
+                    "TRANSFER_LOG_RETENTION_MONTHS. Expired partitions are detached and left as tables to archive, "
+                    "or dropped with TRANSFER_LOG_RETENTION_DROP. Statements keep their rollups either way."
+    )
+    parser.add_argument("--interval", type=float, default=0, help="seconds between runs, 0 runs once")
+    parser.add_argument("--ahead", type=int, default=config.TRANSFER_LOG_PARTITIONS_AHEAD,
+                        help="months to create partitions for after the current one")
+    parser.add_argument("--retention", type=int, default=config.TRANSFER_LOG_RETENTION_MONTHS,
+                        help="full months kept before the current one, 0 keeps every partition")
+    parser.add_argument(
+        "--migrate", action="store_true",
+        help="first partition a TransferLog created before partitioning, keeping its rows as one partition; "
+             "TransferLog is locked while its rows are checked against the partition bounds"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.ahead < 0 or args.retention < 0:
+        parser.error("--ahead and --retention must not be negative")
+    if args.migrate and not migrate_transfer_log():
+        logger.info("TransferLog is already partitioned")
+    while True:
+        started = time.perf_counter()
+        created, expired = maintain_transfer_log_partitions(args.ahead, args.retention)
+        logger.info("Created %d and %s %d TransferLog partitions in %.2fs: %s",
+                    len(created), "dropped" if config.TRANSFER_LOG_RETENTION_DROP else "detached", len(expired),
+                    time.perf_counter() - started, ", ".join(created + expired) or "none")
+        if not args.interval:
+            break
+        time.sleep(args.interval)
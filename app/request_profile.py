@@ -0,0 +1,68 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import Engine, event
+
+
+class RequestProfile:
+    __slots__ = ("started", "queries", "statements", "rows", "db_seconds", "currency_api_seconds")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.statements: list[str] = []
+        self.rows = 0
+        self.db_seconds = 0.0
+        self.currency_api_seconds = 0.0
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        return (
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.queries} queries, {self.rows} rows", '
+            f"currency;dur={self.currency_api_seconds * 1000:.1f}, app;dur={self.elapsed() * 1000:.1f}"
+        )
+
+
+# The profile is mutated, never replaced, so work done in the threadpool copy of a request's context (sync
+# routes) or in SQLAlchemy's greenlets (async routes) is added to the request. Threads a request hands work to,
+# like the transfer writer, have no profile and go unrecorded.
+request_profile: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+
+def current_profile() -> Optional[RequestProfile]:
+    return request_profile.get()
+
+
+@contextmanager
+def currency_api_call() -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile = request_profile.get()
+        if profile is not None:
+            profile.currency_api_seconds += time.perf_counter() - started
+
+
+def profile_queries(engine: Engine):
+    """Adds the statements executed on ``engine`` to the profile of the request executing them."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if request_profile.get() is not None:
+            conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        profile = request_profile.get()
+        if profile is None or not conn.info.get("query_started"):
+            return
+        profile.db_seconds += time.perf_counter() - conn.info["query_started"].pop()
+        profile.queries += 1
+        profile.statements.append(statement)
+        if cursor.rowcount > 0:
+            profile.rows += cursor.rowcount
\ No newline at end of file
@@ -0,0 +1,85 @@
+import inspect
+import json
+import unittest
+import uuid
+from unittest import mock
+
+from starlette.testclient import TestClient
+
+from app.api import async_router
+from app.database.idempotency import IDEMPOTENT_REPLAYED_HEADER, idempotency_store
+from config import config
+from main import create_app
+from .constants import TEST_USER_ID, TEST_WALLET_NUMBER_RECEIVER
+
+
+class TestAsyncRoutes(unittest.TestCase):
+    """Drives the app built with ASYNC_DB through the async handlers, on one event loop for the asyncpg pool."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.patches = [
+            mock.patch.object(config, "ASYNC_DB", True),
+            mock.patch.object(config, "EMAIL_CHECK_DELIVERABILITY", False),
+        ]
+        for patch in cls.patches:
+            patch.start()
+        cls.app = create_app()
+        cls.client = TestClient(cls.app).__enter__()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.__exit__(None, None, None)
+        for patch in reversed(cls.patches):
+            patch.stop()
+
+    def _create_wallet(self) -> tuple[int, str]:
+        email = f"async.routes.{uuid.uuid4().hex[:12]}@gmail.com"
+        response = self.client.post("/user/", json={"name": "Async", "surname": "Routes", "email": email})
+        assert response.status_code == 201, response.text
+        user_id = response.json()["id"]
+
+        response = self.client.post(f"/user/{user_id}/", json={"currency": "PLN"})
+        assert response.status_code == 201, response.text
+        return user_id, response.json()["number"]
+
+    def test_user_routes_are_served_by_async_handlers(self):
+        endpoints = [route.endpoint for route in self.app.routes if route.path.startswith("/user")]
+        assert endpoints == [route.endpoint for route in async_router.router.routes]
+        assert all(inspect.iscoroutinefunction(endpoint) for endpoint in endpoints)
+
+    def test_top_up_send_replay_and_export(self):
+        user_id, wallet_number = self._create_wallet()
+        wallet = f"/user/{user_id}/wallet/{wallet_number}"
+
+        response = self.client.post(f"{wallet}/top-up", json={"amount": 10})
+        assert response.status_code == 202, response.text
+        assert response.json() == 10.0
+
+        send = {"json": {"amount": 2.5, "receiver": TEST_WALLET_NUMBER_RECEIVER}, "headers": {"Idempotency-Key": "a"}}
+        response = self.client.post(f"{wallet}/send", **send)
+        assert response.status_code == 202, response.text
+        transfer = response.json()
+        assert transfer["sender"] == wallet_number and transfer["money_sent"] == 2.5
+
+        replay = self.client.post(f"{wallet}/send", **send)
+        assert replay.status_code == 202, replay.text
+        assert replay.json() == transfer
+        assert replay.headers[IDEMPOTENT_REPLAYED_HEADER] == "true"
+        with mock.patch.object(idempotency_store, "cached", return_value=None):
+            replay = self.client.post(f"{wallet}/send", **send)
+        assert replay.status_code == 202, replay.text
+        assert replay.json() == transfer
+        assert self.client.get(f"/user/{user_id}/wallets").json() == {wallet_number: 7.5}
+
+        response = self.client.get(f"{wallet}/logs/export")
+        assert response.status_code == 200, response.text
+        assert [json.loads(line) for line in response.text.splitlines()] == [transfer]
+
+    def test_missing_and_foreign_wallets(self):
+        user_id, wallet_number = self._create_wallet()
+        send = {"json": {"amount": 1, "receiver": wallet_number}}
+        assert self.client.post(f"/user/{user_id}/wallet/{TEST_WALLET_NUMBER_RECEIVER}/send", **send).status_code == 403
+        assert self.client.get(f"/user/{TEST_USER_ID}/wallet/{wallet_number}/logs/export").status_code == 403
+        assert self.client.post(f"/user/{user_id}/wallet/{wallet_number}/top-up", json={"amount": 0}).status_code == 417
+        assert self.client.get(f"/user/{user_id + 1000000}/").status_code == 404
\ No newline at end of file
@@ -0,0 +1,92 @@
+import unittest
+from typing import NamedTuple
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.database.balance_cache import BalanceCache
+from app.database.replicas import REPLICA_SESSION_KEY
+
+
+class Row(NamedTuple):
+    id: int
+    number: str
+    balance: float
+
+
+class TestBalanceCache(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        self.db = sessionmaker(bind=self.engine)()
+        self.cache = BalanceCache(size=2, ttl=60)
+        self.loads = 0
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+
+    def _load(self, *rows: Row):
+        def load():
+            self.loads += 1
+            return rows
+        return load
+
+    def test_second_read_is_served_from_memory(self):
+        load = self._load(Row(1, "DCT0000000001PLN", 10.0), Row(2, "DCT0000000002EUR", 2.5))
+        assert self.cache.balances(self.db, 1, load) == {"DCT0000000001PLN": 10.0, "DCT0000000002EUR": 2.5}
+        assert self.cache.balances(self.db, 1, load) == {"DCT0000000001PLN": 10.0, "DCT0000000002EUR": 2.5}
+        assert self.loads == 1
+
+    def test_replica_reads_are_not_stored(self):
+        replica_db = sessionmaker(bind=self.engine, info={REPLICA_SESSION_KEY: 0})()
+        try:
+            self.cache.balances(replica_db, 1, self._load(Row(1, "DCT0000000001PLN", 10.0)))
+            self.cache.balances(self.db, 1, self._load(Row(1, "DCT0000000001PLN", 12.0)))
+            assert self.cache.balances(replica_db, 1, self._load(Row(1, "DCT0000000001PLN", 10.0))) == {
+                "DCT0000000001PLN": 12.0
+            }
+            assert self.loads == 2
+        finally:
+            replica_db.close()
+
+    def test_least_recently_used_user_is_evicted(self):
+        for user_id in (1, 2, 1, 3):
+            self.cache.balances(self.db, user_id, self._load(Row(user_id, f"DCT000000000{user_id}PLN", 1.0)))
+        self.cache.balances(self.db, 2, self._load(Row(2, "DCT0000000002PLN", 1.0)))
+        assert self.loads == 4
+
+    def test_committed_write_invalidates_the_owner(self):
+        self.cache.balances(self.db, 1, self._load(Row(7, "DCT0000000007PLN", 10.0)))
+        self.db.execute(text("SELECT 1"))
+        self.cache.invalidate_on_commit(self.db, wallet_ids=[7])
+        self.db.commit()
+        assert self.cache.balances(self.db, 1, self._load(Row(7, "DCT0000000007PLN", 15.0))) == {
+            "DCT0000000007PLN": 15.0
+        }
+
+    def test_rolled_back_write_keeps_the_entry(self):
+        self.cache.balances(self.db, 1, self._load(Row(7, "DCT0000000007PLN", 10.0)))
+        self.db.execute(text("SELECT 1"))
+        self.cache.invalidate_on_commit(self.db, wallet_ids=[7])
+        self.db.rollback()
+        self.db.commit()
+        self.cache.balances(self.db, 1, self._load(Row(7, "DCT0000000007PLN", 15.0)))
+        assert self.loads == 1
+
+    def test_read_racing_a_commit_is_not_stored(self):
+        def load():
+            self.loads += 1
+            self.cache.invalidate(wallet_ids=[7])
+            return [Row(7, "DCT0000000007PLN", 10.0)]
+
+        self.cache.balances(self.db, 1, load)
+        self.cache.balances(self.db, 1, self._load(Row(7, "DCT0000000007PLN", 15.0)))
+        assert self.loads == 2
+
+    def test_uncommitted_balances_are_not_stored(self):
+        self.db.execute(text("SELECT 1"))
+        self.cache.invalidate_on_commit(self.db, user_ids=[1])
+        self.cache.balances(self.db, 1, self._load(Row(7, "DCT0000000007PLN", 15.0)))
+        self.db.rollback()
+        self.cache.balances(self.db, 1, self._load(Row(7, "DCT0000000007PLN", 10.0)))
+        assert self.loads == 2
@@ -0,0 +1,20 @@
+import unittest
+
+from app.database.balance_store import plan_slot_debits
+
+
+class TestBalanceStore(unittest.TestCase):
+    def test_debit_takes_one_funded_slot(self):
+        slots = ((0, 5.0), (1, 20.0), (2, 12.5))
+        for _ in range(20):
+            [(slot, taken)] = plan_slot_debits(slots, 12.5)
+            assert slot in (1, 2)
+            assert taken == 12.5
+
+    def test_debit_drains_fullest_slots_first(self):
+        assert plan_slot_debits(((0, 5.0), (1, 7.25), (2, 0.0), (3, 3.0)), 13.5) == [(1, 7.25), (0, 5.0), (3, 1.25)]
+
+    def test_debit_of_whole_balance(self):
+        slots = ((0, 0.1), (1, 0.2), (2, 0.3))
+        taken = plan_slot_debits(slots, 0.6)
+        assert dict(taken) == dict(slots)
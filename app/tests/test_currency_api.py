@@ -0,0 +1,212 @@
+import asyncio
+import threading
+import time
+import unittest
+from decimal import Decimal, ROUND_HALF_EVEN
+
+import numpy as np
+
+from app.currency_api import Controller, RateMatrix, RatesStore, RatesUnavailableError, Client, AsyncClient, \
+    CircuitBreaker, CurrencyApiError, CircuitOpenError
+from app.currency_api.fake_server import FakeRatesServer
+from app.request_profile import RequestProfile, request_profile
+
+TEST_RATES = {"USD": 1.0, "EUR": 0.9, "PLN": 4.0}
+
+
+class CountingFetch:
+    def __init__(self, rates: dict = TEST_RATES, delay: float = 0.0, fail: bool = False):
+        self.rates = rates
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    def __call__(self) -> dict:
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("upstream is down")
+        return dict(self.rates)
+
+
+class TestRatesStore(unittest.TestCase):
+    def test_rates_are_cached_within_ttl(self):
+        fetch = CountingFetch()
+        store = RatesStore(fetch_rates=fetch, ttl=60)
+        for _ in range(10):
+            assert store.get_rates() == TEST_RATES
+        assert fetch.calls == 1
+
+    def test_concurrent_misses_cause_single_fetch(self):
+        fetch = CountingFetch(delay=0.2)
+        store = RatesStore(fetch_rates=fetch, ttl=60)
+        threads = [threading.Thread(target=store.get_rates) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert fetch.calls == 1
+
+    def test_stale_rates_are_served_while_revalidating(self):
+        fetch = CountingFetch(delay=0.2)
+        store = RatesStore(fetch_rates=fetch, ttl=60)
+        store.get_rates()
+        store.invalidate()
+
+        started = time.monotonic()
+        assert store.get_rates() == TEST_RATES
+        assert time.monotonic() - started < 0.1
+        time.sleep(0.3)
+        assert fetch.calls == 2
+
+    def test_stale_rates_are_served_when_upstream_is_down(self):
+        fetch = CountingFetch()
+        store = RatesStore(fetch_rates=fetch, ttl=60, max_stale=0)
+        store.get_rates()
+        store.invalidate()
+        fetch.fail = True
+        assert store.get_rates() == TEST_RATES
+
+    def test_missing_rates_when_upstream_is_down(self):
+        store = RatesStore(fetch_rates=CountingFetch(fail=True), ttl=60)
+        with self.assertRaises(RatesUnavailableError):
+            store.get_rates()
+
+    def test_concurrent_async_misses_cause_single_fetch(self):
+        fetch = CountingFetch()
+
+        async def fetch_async() -> dict:
+            await asyncio.sleep(0.1)
+            return fetch()
+
+        async def get_rates() -> list[dict]:
+            return await asyncio.gather(*(store.get_rates_async() for _ in range(20)))
+
+        store = RatesStore(fetch_rates=CountingFetch(fail=True), ttl=60, fetch_rates_async=fetch_async)
+        assert asyncio.run(get_rates()) == [TEST_RATES] * 20
+        assert fetch.calls == 1
+
+    def test_only_the_upstream_call_is_profiled(self):
+        fetch = CountingFetch(delay=0.2)
+        store = RatesStore(fetch_rates=fetch, ttl=60, max_stale=0)
+        fetching = threading.Thread(target=store.get_rates)
+        fetching.start()
+        time.sleep(0.05)
+
+        profile = RequestProfile()
+        token = request_profile.set(profile)
+        try:
+            assert store.get_rates() == TEST_RATES
+        finally:
+            request_profile.reset(token)
+        fetching.join()
+        assert fetch.calls == 1
+        assert profile.currency_api_seconds == 0.0
+
+        store.invalidate()
+        token = request_profile.set(profile)
+        try:
+            assert store.get_rates() == TEST_RATES
+        finally:
+            request_profile.reset(token)
+        assert fetch.calls == 2
+        assert profile.currency_api_seconds >= 0.2
+
+
+class TestRateMatrix(unittest.TestCase):
+    def test_matrix_matches_cross_rates(self):
+        matrix = RateMatrix(TEST_RATES)
+        assert matrix.rate("USD", "PLN") == 4.0
+        assert matrix.rate("PLN", "EUR") == np.round(0.9 / 4.0, 2) == 0.22
+        assert matrix.rate("EUR", "EUR") == 1.0
+
+    def test_batch_conversion_matches_single_conversion(self):
+        c = Controller(rates=TEST_RATES)
+        senders = np.array(["PLN", "EUR", "USD", "PLN"])
+        receivers = np.array(["EUR", "PLN", "EUR", "PLN"])
+        amounts = np.array([10.0, 2.5, 100.0, 7.25])
+
+        converted = c.convert_money_batch(senders, receivers, amounts)
+        for sender, receiver, amount, money_received in zip(senders, receivers, amounts, converted):
+            assert c.convent_money_from_sender_to_receiver(sender, receiver, float(amount)) == money_received
+
+    def test_conversion_rounds_half_to_even_in_minor_units(self):
+        matrix = RateMatrix({"USD": 1.0, "EUR": 2.0, "PLN": 4.0, "GBP": 0.79})
+        assert matrix.convert("USD", "EUR", 0.0) == 0.0
+        assert matrix.convert("PLN", "USD", 1.06) == 0.26
+        assert matrix.convert("PLN", "USD", 1.02) == 0.26
+        assert matrix.convert("EUR", "USD", 0.05) == 0.02
+        assert matrix.convert("EUR", "USD", 0.07) == 0.04
+
+        rng = np.random.default_rng(0)
+        amounts = np.round(rng.uniform(0, 100000, 2000), 2)
+        senders = rng.choice(matrix.currencies, amounts.size)
+        receivers = rng.choice(matrix.currencies, amounts.size)
+        converted = matrix.convert_batch(senders, receivers, amounts).tolist()
+        for sender, receiver, amount, money_received in zip(senders, receivers, amounts.tolist(), converted):
+            exact = Decimal(str(amount)) * Decimal(str(matrix.rate(sender, receiver)))
+            assert money_received == float(exact.quantize(Decimal("0.01"), rounding=ROUND_HALF_EVEN))
+            assert matrix.convert(sender, receiver, amount) == money_received
+
+    def test_unknown_currency(self):
+        matrix = RateMatrix(TEST_RATES)
+        assert "UAH" not in matrix
+        with self.assertRaises(KeyError):
+            matrix.convert_batch(["PLN", "UAH"], ["EUR", "EUR"], np.array([1.0, 1.0]))
+
+
+class TestCurrencyApiClient(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeRatesServer(rates=TEST_RATES).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    @staticmethod
+    def make_client(client_class=Client, **kwargs):
+        kwargs.setdefault("backoff_base", 0.01)
+        kwargs.setdefault("circuit_breaker", CircuitBreaker(failure_threshold=5, reset_timeout=60))
+        return client_class("test-key", **kwargs)
+
+    def test_fetch_rates(self):
+        client = self.make_client()
+        assert client.fetch_latest_currency_rates(self.server.url) == TEST_RATES
+        client.get_latest_currency_rates(self.server.url)
+        assert self.server.requests_count == 1
+
+    def test_retries_on_upstream_errors(self):
+        self.server.fail_next(503, 502)
+        client = self.make_client(retries=3)
+        assert client.fetch_latest_currency_rates(self.server.url) == TEST_RATES
+        assert self.server.requests_count == 3
+
+    def test_read_timeout_is_bounded(self):
+        self.server.delay = 0.5
+        client = self.make_client(read_timeout=0.1, retries=1)
+        started = time.monotonic()
+        with self.assertRaises(CurrencyApiError):
+            client.fetch_latest_currency_rates(self.server.url)
+        assert time.monotonic() - started < 0.5
+
+    def test_circuit_breaker_fails_fast(self):
+        self.server.fail_next(*[500] * 10)
+        client = self.make_client(retries=1, circuit_breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+        with self.assertRaises(CurrencyApiError):
+            client.fetch_latest_currency_rates(self.server.url)
+        requests_count = self.server.requests_count
+        with self.assertRaises(CircuitOpenError):
+            client.fetch_latest_currency_rates(self.server.url)
+        assert self.server.requests_count == requests_count
+
+    def test_async_client(self):
+        self.server.fail_next(503)
+
+        async def fetch():
+            client = self.make_client(AsyncClient, retries=2)
+            try:
+                return await client.fetch_latest_currency_rates(self.server.url)
+            finally:
+                await client.close()
+
+        assert asyncio.run(fetch()) == TEST_RATES
+        assert self.server.requests_count == 2
@@ -0,0 +1,39 @@
+import unittest
+
+from fastapi import HTTPException
+
+from app.database.idempotency import IdempotencyStore, IdempotentRequest, StoredResponse
+
+
+def _request(key: str, fingerprint: str = "fingerprint") -> IdempotentRequest:
+    return IdempotentRequest(user_id=1, key=key, fingerprint=fingerprint, render=lambda result: result)
+
+
+class TestIdempotencyStore(unittest.TestCase):
+    def setUp(self):
+        self.store = IdempotencyStore(retention=60, cache_size=2)
+        self.stored = StoredResponse(202, b"100.0")
+
+    def test_remembered_response_is_replayed(self):
+        self.store.remember(_request("a"), self.stored)
+        replay = self.store.cached(_request("a"))
+        assert replay == StoredResponse(202, b"100.0", replayed=True)
+        assert replay.to_response().headers["Idempotent-Replayed"] == "true"
+
+    def test_key_reused_for_a_different_request_is_rejected(self):
+        self.store.remember(_request("a"), self.stored)
+        with self.assertRaises(HTTPException) as raised:
+            self.store.cached(_request("a", fingerprint="other"))
+        assert raised.exception.status_code == 422
+
+    def test_least_recently_used_key_is_evicted(self):
+        self.store.remember(_request("a"), self.stored)
+        self.store.remember(_request("b"), self.stored)
+        self.store.cached(_request("a"))
+        self.store.remember(_request("c"), self.stored)
+        assert self.store.cached(_request("b")) is None
+        assert self.store.cached(_request("a")) is not None
+
+    def test_expired_response_is_forgotten(self):
+        self.store.remember(_request("a"), self.stored, age=60)
+        assert self.store.cached(_request("a")) is None
@@ -0,0 +1,19 @@
+import unittest
+
+from app.database.ledger import to_minor_units, from_minor_units, ledger_entry, TRANSFER
+
+
+class TestLedger(unittest.TestCase):
+    def test_minor_units_round_trip(self):
+        for amount, expected in ((0.0, 0.0), (0.01, 0.01), (0.29, 0.29), (1.005, 1.01), (1234567.89, 1234567.89),
+                                 (-4.35, -4.35)):
+            assert from_minor_units(to_minor_units(amount)) == expected
+
+    def test_minor_units_are_exact(self):
+        assert to_minor_units(0.29) == 29
+        assert to_minor_units(19.99) == 1999
+        assert sum(to_minor_units(0.1) for _ in range(10)) == to_minor_units(1.0)
+
+    def test_transfer_legs_balance(self):
+        legs = [ledger_entry(1, -12.5, TRANSFER), ledger_entry(2, 12.5, TRANSFER)]
+        assert sum(leg["amount"] for leg in legs) == 0
@@ -1,6 +1,24 @@
 import unittest
 from .test_user import TestUser
 from .test_wallet import TestWallet
+from .test_currency_api import TestRatesStore, TestRateMatrix, TestCurrencyApiClient
+from .test_wallet_number_allocator import TestWalletNumberAllocator
+from .test_pool_metrics import TestPoolMetrics
+from .test_ledger import TestLedger
+from .test_balance_store import TestBalanceStore
+from .test_transfer_writer import TestTransferWriter, TestTransferWriterIdempotency
+from .test_idempotency import TestIdempotencyStore
+from .test_balance_cache import TestBalanceCache
+from .test_serialization import TestSerialization
+from .test_seed_data import TestSeedData
+from .test_profiling import TestProfiling
+from .test_query_budgets import TestQueryBudgets
+from .test_replicas import TestReplicaSet
+from .test_wallet_stats import TestWalletStats, TestWalletStatsRollups
+from .test_partitions import TestPartitionMonths, TestPartitionMaintenance
+from .test_transactions import TestRunInTransactionAsync
+from .test_validators import TestValidators
+from .test_async_routes import TestAsyncRoutes
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,56 @@
+import datetime
+import unittest
+import uuid
+
+from sqlalchemy import text
+
+from app.database import Session
+from app.database.partitions import (
+    DEFAULT_PARTITION, add_months, create_partitions, expire_partitions, is_partitioned, list_partitions,
+    month_start, partition_name, retained_since
+)
+
+MONTH = datetime.date(1999, 12, 1)
+
+
+class TestPartitionMonths(unittest.TestCase):
+    def test_months_roll_over_years(self):
+        assert month_start(datetime.date(2023, 4, 27)) == datetime.date(2023, 4, 1)
+        assert add_months(datetime.date(2023, 11, 1), 3) == datetime.date(2024, 2, 1)
+        assert add_months(datetime.date(2023, 1, 1), -1) == datetime.date(2022, 12, 1)
+        assert partition_name(datetime.date(2024, 2, 1)) == "TransferLog_2024_02"
+
+    def test_retention_keeps_full_months_before_the_current_one(self):
+        assert retained_since(datetime.date(2024, 2, 15), 12) == datetime.date(2023, 2, 1)
+        assert retained_since(datetime.date(2024, 2, 15), 0) is None
+
+
+class TestPartitionMaintenance(unittest.TestCase):
+    def setUp(self):
+        # Partitions are created and expired in a transaction rolled back after each test.
+        self.db = Session()
+        if not is_partitioned(self.db):
+            self.skipTest("TransferLog is not partitioned")
+
+    def tearDown(self):
+        self.db.rollback()
+        self.db.close()
+
+    def test_rows_of_the_default_partition_move_to_a_new_partition_and_expire_with_it(self):
+        self.db.execute(text(
+            'INSERT INTO "TransferLog" (transfer_uid, sender, receiver, currency_sent, currency_received, '
+            "money_sent, money_received, paid_on) VALUES (:transfer_uid, 'DCT0000000000PLN', "
+            "'DCT0000000000PLN', 'PLN', 'PLN', 1, 1, :paid_on)"
+        ), {"transfer_uid": uuid.uuid4(), "paid_on": datetime.datetime(1999, 12, 31, 23, 59)})
+
+        assert create_partitions(self.db, MONTH, add_months(MONTH, 1)) == [
+            partition_name(MONTH), partition_name(add_months(MONTH, 1))
+        ]
+        assert create_partitions(self.db, MONTH, MONTH) == []
+        located = text('SELECT tableoid::regclass::text FROM "TransferLog" WHERE paid_on < :end')
+        assert self.db.scalars(located, {"end": add_months(MONTH, 1)}).all() == [f'"{partition_name(MONTH)}"']
+
+        assert expire_partitions(self.db, add_months(MONTH, 1)) == [partition_name(MONTH)]
+        assert partition_name(MONTH) not in [partition.name for partition in list_partitions(self.db)]
+        assert list_partitions(self.db)[0].name == DEFAULT_PARTITION
+        assert self.db.scalars(located, {"end": add_months(MONTH, 1)}).all() == []
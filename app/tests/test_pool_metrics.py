@@ -0,0 +1,48 @@
+import unittest
+
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.database.pool_metrics import InstrumentedQueuePool, instrument_engine
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class TestPoolMetrics(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite://",
+            poolclass=InstrumentedQueuePool,
+            pool_logging_name="test_pool",
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=0.05
+        )
+        instrument_engine(self.engine, "test_pool")
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def test_checkouts_are_timed_and_counted(self):
+        checkouts = _sample("db_pool_checkout_seconds_count", pool="test_pool")
+        with self.engine.connect():
+            assert _sample("db_pool_checked_out", pool="test_pool") == 1
+            assert _sample("db_pool_size", pool="test_pool") == 1
+        assert _sample("db_pool_checkout_seconds_count", pool="test_pool") == checkouts + 1
+        assert _sample("db_pool_checked_out", pool="test_pool") == 0
+
+    def test_checkout_timeout_is_counted(self):
+        timeouts = _sample("db_pool_checkout_timeouts_total", pool="test_pool")
+        with self.engine.connect():
+            with self.assertRaises(PoolTimeoutError):
+                self.engine.connect()
+        assert _sample("db_pool_checkout_timeouts_total", pool="test_pool") == timeouts + 1
+
+    def test_invalidations_are_counted(self):
+        invalidations = _sample("db_pool_invalidations_total", pool="test_pool", kind="hard")
+        with self.engine.connect() as connection:
+            connection.invalidate()
+        assert _sample("db_pool_invalidations_total", pool="test_pool", kind="hard") == invalidations + 1
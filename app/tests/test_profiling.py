@@ -0,0 +1,79 @@
+import logging
+import unittest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+
+from app.api.profiling import ProfilingMiddleware, UNMATCHED_ROUTE, logger
+from app.request_profile import currency_api_call, profile_queries
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        profile_queries(self.engine)
+        app = FastAPI()
+
+        @app.get("/profiled/{item_id}")
+        def read_item(item_id: int):
+            with currency_api_call():
+                pass
+            with self.engine.connect() as connection:
+                connection.execute(text("SELECT 1 UNION ALL SELECT 2")).all()
+                connection.execute(text("SELECT :item_id"), {"item_id": item_id}).all()
+            return {"item_id": item_id}
+
+        @app.get("/profiled-async")
+        async def read_async():
+            return {}
+
+        budgets = {("GET", "/profiled/{item_id}"): 1, ("GET", "/profiled-async"): 0}
+        app.add_middleware(ProfilingMiddleware, server_timing=True, budgets=budgets)
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def test_statements_are_recorded_per_route_template(self):
+        labels = {"method": "GET", "route": "/profiled/{item_id}"}
+        requests = _sample("http_request_duration_seconds_count", **labels)
+        queries = _sample("http_request_db_queries_sum", **labels)
+
+        assert self.client.get("/profiled/1").status_code == 200
+        assert self.client.get("/profiled/2").status_code == 200
+        assert _sample("http_request_duration_seconds_count", **labels) == requests + 2
+        assert _sample("http_request_currency_api_seconds_count", **labels) == requests + 2
+        assert _sample("http_request_db_queries_sum", **labels) == queries + 4
+
+    def test_server_timing_header(self):
+        header = self.client.get("/profiled/1").headers["Server-Timing"]
+        assert header.startswith("db;dur=") and 'desc="2 queries' in header
+        assert "currency;dur=" in header and "app;dur=" in header
+        assert "db;dur=0.0" in self.client.get("/profiled-async").headers["Server-Timing"]
+
+    def test_unmatched_requests_share_a_label(self):
+        requests = _sample("http_request_duration_seconds_count", method="GET", route=UNMATCHED_ROUTE)
+        assert self.client.get("/missing/1").status_code == 404
+        assert self.client.get("/missing/2").status_code == 404
+        assert _sample("http_request_duration_seconds_count", method="GET", route=UNMATCHED_ROUTE) == requests + 2
+
+    def test_statements_outside_requests_are_not_recorded(self):
+        with self.engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        assert "query_started" not in self.engine.raw_connection().info
+
+    def test_requests_over_budget_are_logged_with_their_statements(self):
+        with self.assertLogs(logger, logging.WARNING) as logs:
+            self.client.get("/profiled/1")
+        assert "GET /profiled/{item_id} executed 2 SQL statements, over its budget of 1" in logs.output[0]
+        assert "1. SELECT 1 UNION ALL SELECT 2\n2. SELECT ?" in logs.output[0]
+
+        with self.assertNoLogs(logger, logging.WARNING):
+            self.client.get("/profiled-async")
+            self.client.get("/profiled/1", headers={"Idempotency-Key": "key"})
@@ -0,0 +1,84 @@
+import logging
+import unittest
+import uuid
+from unittest import mock
+
+from starlette.testclient import TestClient
+
+from app.api.constants import QUERY_BUDGETS
+from app.api.profiling import logger
+from config import config
+from main import app
+from .constants import TEST_DATA_TIME_FROM, TEST_USER_ID, TEST_WALLET_NUMBER, TEST_WALLET_NUMBER_RECEIVER
+
+WALLET = f"/user/{TEST_USER_ID}/wallet/{TEST_WALLET_NUMBER}"
+
+
+@unittest.skipUnless(config.PROFILING_ENABLED, "query budgets are checked by the profiling middleware")
+class TestQueryBudgets(unittest.TestCase):
+    def setUp(self):
+        self.overrides = dict(app.dependency_overrides)
+        app.dependency_overrides.clear()
+        # Entering the client keeps every request on one event loop, which the asyncpg pool needs with ASYNC_DB.
+        self.client = TestClient(app).__enter__()
+
+    def tearDown(self):
+        self.client.__exit__(None, None, None)
+        app.dependency_overrides.update(self.overrides)
+
+    def _request(self, method: str, url: str, **kwargs) -> dict:
+        with self.assertNoLogs(logger, logging.WARNING):
+            response = self.client.request(method, url, **kwargs)
+        assert response.status_code < 300, response.text
+        return response.json()
+
+    @mock.patch.object(config, "EMAIL_CHECK_DELIVERABILITY", False)
+    def test_routes_stay_within_their_budgets(self):
+        email = f"query.budget.{uuid.uuid4().hex[:12]}@gmail.com"
+        calls = [
+            ("POST", "/user/", "/user/", {"json": {"name": "Query", "surname": "Budget", "email": email}}),
+            ("GET", "/user/", "/user/", {"params": {"limit": 10, "fields": "id,email"}}),
+            ("GET", "/user/{user_id}/", f"/user/{TEST_USER_ID}/", {}),
+            ("GET", "/user/{user_id}/wallets", f"/user/{TEST_USER_ID}/wallets", {}),
+            ("GET", "/user/{user_id}/wallet/{wallet_number}/balance", f"{WALLET}/balance", {}),
+            (
+                "GET", "/user/{user_id}/wallet/{wallet_number}/balance", f"{WALLET}/balance",
+                {"params": {"at": TEST_DATA_TIME_FROM}}
+            ),
+            ("POST", "/user/{user_id}/wallet/{wallet_number}/top-up", f"{WALLET}/top-up", {"json": {"amount": 5}}),
+            (
+                "POST", "/user/{user_id}/wallet/{wallet_number}/top-up", f"{WALLET}/top-up",
+                {"json": {"amount": 5}, "headers": {"Idempotency-Key": uuid.uuid4().hex}}
+            ),
+            (
+                "POST", "/user/{user_id}/wallet/{wallet_number}/send", f"{WALLET}/send",
+                {"json": {"amount": 1, "receiver": TEST_WALLET_NUMBER_RECEIVER}}
+            ),
+            (
+                "POST", "/user/{user_id}/wallet/{wallet_number}/send", f"{WALLET}/send",
+                {"json": {"amount": 1, "receiver": TEST_WALLET_NUMBER_RECEIVER},
+                 "headers": {"Idempotency-Key": uuid.uuid4().hex}}
+            ),
+            (
+                "POST", "/user/{user_id}/wallet/{wallet_number}/send-batch", f"{WALLET}/send-batch",
+                {"json": {"transfers": [{"amount": 1, "receiver": TEST_WALLET_NUMBER_RECEIVER}] * 3}}
+            ),
+            ("GET", "/user/{user_id}/wallet/{wallet_number}/logs", f"{WALLET}/logs", {}),
+            (
+                "GET", "/user/{user_id}/wallet/{wallet_number}/logs/page", f"{WALLET}/logs/page",
+                {"params": {"limit": 2}}
+            ),
+            (
+                "GET", "/user/{user_id}/wallet/{wallet_number}/statement", f"{WALLET}/statement",
+                {"params": {"granularity": "week"}}
+            ),
+        ]
+        for method, route, url, kwargs in calls:
+            with self.subTest(method=method, url=url):
+                self._request(method, url, **kwargs)
+
+        user = self._request("POST", "/user/", json={"name": "Query", "surname": "Budget", "email": "new." + email})
+        self._request("POST", f"/user/{user['id']}/", json={"currency": "USD"})
+
+        driven = {(method, route) for method, route, _, _ in calls} | {("POST", "/user/{user_id}/")}
+        assert driven == set(QUERY_BUDGETS), set(QUERY_BUDGETS) - driven
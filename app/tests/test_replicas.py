@@ -0,0 +1,60 @@
+import unittest
+from unittest import mock
+
+from sqlalchemy import create_engine
+
+from app.database.replicas import ReplicaSet
+
+
+class TestReplicaSet(unittest.TestCase):
+    def setUp(self):
+        self.lags = {}
+        self.engines = [create_engine("sqlite://") for _ in range(3)]
+
+        def lag(engine):
+            value = self.lags[self.engines.index(engine)]
+            if isinstance(value, Exception):
+                raise value
+            return value
+
+        self.replicas = ReplicaSet(self.engines, max_lag=1.0, check_interval=60, sticky_seconds=10, lag=lag)
+
+    def tearDown(self):
+        for engine in self.engines:
+            engine.dispose()
+
+    def test_reads_go_round_robin_over_caught_up_replicas(self):
+        self.lags.update({0: 0.0, 1: 5.0, 2: 0.5})
+        self.replicas.check()
+        assert {self.replicas.choose() for _ in range(4)} == {0, 2}
+
+        self.lags[1] = 0.0
+        self.replicas.check()
+        assert {self.replicas.choose() for _ in range(3)} == {0, 1, 2}
+
+    def test_failed_checks_take_replicas_out(self):
+        self.lags.update({0: ConnectionError("down"), 1: 0.0, 2: 0.0})
+        with self.assertLogs("app.database.replicas", "WARNING"):
+            self.replicas.check()
+        assert {self.replicas.choose() for _ in range(4)} == {1, 2}
+
+        self.lags.update({1: ConnectionError("down"), 2: 2.0})
+        self.replicas.check()
+        assert self.replicas.choose() is None
+
+    def test_no_replicas_means_the_primary(self):
+        assert not ReplicaSet([])
+        assert ReplicaSet([]).choose() is None
+        assert self.replicas.choose() is None
+
+    def test_users_who_wrote_read_from_the_primary_until_the_pin_expires(self):
+        self.lags.update({0: 0.0, 1: 0.0, 2: 0.0})
+        self.replicas.check()
+        self.replicas.pin(7)
+        assert self.replicas.choose(7) is None
+        assert self.replicas.choose(8) is not None
+
+        with mock.patch("app.database.replicas.time.monotonic", return_value=10 ** 9):
+            assert self.replicas.choose(7) is not None
+            self.replicas.pin(8)
+        assert 7 not in self.replicas._pinned
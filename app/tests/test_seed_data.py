@@ -0,0 +1,67 @@
+import argparse
+import datetime
+import unittest
+
+import numpy as np
+from faker import Faker
+
+from app.database.wallet_number_allocator import encode_wallet_number
+from app.jobs.seed_data import draw_plan, parse_weights, transfer_rows, user_rows, wallet_numbers
+
+START = datetime.date(2023, 1, 1)
+END = datetime.date(2023, 7, 1)
+
+
+class TestSeedData(unittest.TestCase):
+    def setUp(self):
+        self.plan = draw_plan(500, {1: 1, 3: 1}, {"PLN": 3, "EUR": 1}, 1.16, START, END, seed=7)._replace(
+            user_id_start=1000, wallet_id_start=2000, number_start=3000
+        )
+
+    def test_wallet_numbers_match_the_allocator(self):
+        values = [0, 1, 999, 123456789, 999999999]
+        assert wallet_numbers(np.array(values), ["PLN"] * len(values)) == [
+            encode_wallet_number(value, "PLN") for value in values
+        ]
+
+    def test_users_and_their_wallets(self):
+        users, wallets = user_rows(self.plan, Faker(), 10, 20)
+        users = [line.split("\t") for line in users.splitlines()]
+        wallets = [line.split("\t") for line in wallets.splitlines()]
+        assert [int(user[0]) for user in users] == list(range(1010, 1020))
+        assert len({user[3] for user in users}) == 10
+        assert len(wallets) == self.plan.wallet_offsets[20] - self.plan.wallet_offsets[10]
+        assert {int(wallet[6]) for wallet in wallets} <= {int(user[0]) for user in users}
+        assert all(wallet[1].endswith(wallet[2]) for wallet in wallets)
+
+    def test_users_have_one_wallet_per_currency(self):
+        plan = draw_plan(
+            10000, parse_weights("1=60,2=25,3=10,4=5", int), parse_weights("PLN=40,EUR=25,USD=25,GBP=7,CHF=3,UAH=0"),
+            1.16, START, END, seed=1
+        )
+        owned = np.split(plan.wallet_currencies, plan.wallet_offsets[1:-1])
+        assert all(len(set(currencies.tolist())) == len(currencies) for currencies in owned)
+        assert plan.currencies.index("UAH") not in plan.wallet_currencies
+        assert np.bincount(plan.wallet_currencies).argmax() == plan.currencies.index("PLN")
+        # Three wallets were asked for, but there are only two currencies.
+        assert np.diff(self.plan.wallet_offsets).max() == 2
+
+    def test_transfers_are_reproducible_and_consistent(self):
+        rows = transfer_rows(self.plan, 3, 2000)
+        assert rows == transfer_rows(self.plan, 3, 2000)
+        transfers = [line.split("\t") for line in rows.splitlines()]
+        assert len(transfers) == 2000 and len({transfer[0] for transfer in transfers}) == 2000
+        assert all(transfer[1] != transfer[2] for transfer in transfers)
+        assert all(transfer[1][-3:] == transfer[3] and transfer[2][-3:] == transfer[4] for transfer in transfers)
+        paid_on = [datetime.datetime.fromisoformat(transfer[7]) for transfer in transfers]
+        assert START <= min(paid_on).date() and max(paid_on).date() < END
+
+    def test_transfer_counts_follow_a_power_law(self):
+        senders = [line.split("\t")[1] for line in transfer_rows(self.plan, 0, 20000).splitlines()]
+        counts = np.sort(np.unique(senders, return_counts=True)[1])[::-1]
+        assert counts[:len(counts) // 5].sum() > counts.sum() / 2
+
+    def test_weights(self):
+        assert parse_weights("1=60,2=40", int) == {1: 60.0, 2: 40.0}
+        with self.assertRaises(argparse.ArgumentTypeError):
+            parse_weights("PLN=0")
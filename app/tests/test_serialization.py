@@ -0,0 +1,65 @@
+import datetime
+import unittest
+import uuid
+from typing import NamedTuple
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.api.schemas import TransferLogDB
+from app.api.serialization import format_timestamps, json_response, logs_page_response, logs_response
+from app.database.controllers.log_controller import EPOCH
+
+
+class LogRow(NamedTuple):
+    transfer_uid: str
+    sender: str
+    receiver: str
+    currency_sent: str
+    currency_received: str
+    money_sent: float
+    money_received: float
+    paid_on: int
+
+
+def _microseconds(paid_on: datetime.datetime) -> int:
+    return (paid_on - EPOCH) // datetime.timedelta(microseconds=1)
+
+
+def _row(money_sent: float, paid_on: datetime.datetime) -> LogRow:
+    return LogRow(
+        str(uuid.uuid4()), "DCT0000000000PLN", "DCT1111111111EUR", "PLN", "EUR", money_sent, 0.22,
+        _microseconds(paid_on)
+    )
+
+
+def _response_model_body(rows: list[LogRow]) -> bytes:
+    return JSONResponse(jsonable_encoder([
+        TransferLogDB(**{**row._asdict(), "paid_on": EPOCH + datetime.timedelta(microseconds=row.paid_on)})
+        for row in rows
+    ])).body
+
+
+class TestSerialization(unittest.TestCase):
+    def test_timestamps_are_formatted_like_strftime(self):
+        paid_on = [datetime.datetime(2023, 6, 9, 23, 59, 59, 999999), datetime.datetime(2024, 2, 29, 0, 0, 1)]
+        assert format_timestamps([_microseconds(timestamp) for timestamp in paid_on]) == [
+            "2023-06-09 23:59:59", "2024-02-29 00:00:01"
+        ]
+        assert format_timestamps([]) == []
+
+    def test_logs_match_the_response_model(self):
+        paid_on = datetime.datetime(2023, 6, 9, 12, 30, 15, 123456)
+        rows = [_row(amount, paid_on) for amount in (1.0, 0.1, 12345.67, 0.0)]
+        assert logs_response(rows).body == _response_model_body(rows)
+        assert logs_response([]).body == b"[]"
+
+    def test_floats_orjson_writes_differently_fall_back_to_the_stdlib(self):
+        rows = [_row(amount, datetime.datetime(2023, 6, 9)) for amount in (1e-05, 1e16)]
+        assert b"1e-05" in logs_response(rows).body
+        assert logs_response(rows).body == _response_model_body(rows)
+
+    def test_page_and_plain_responses(self):
+        assert logs_page_response([], "cursor").body == b'{"logs":[],"next_cursor":"cursor"}'
+        balances = {"DCT0000000000PLN": 989.5, "DCT1111111111EUR": None}
+        assert json_response(balances, balances.values()).body == JSONResponse(balances).body
@@ -0,0 +1,52 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.database.database import url_object
+from app.database.transactions import SERIALIZATION_FAILURE, run_in_transaction_async
+
+
+class SerializationFailure(Exception):
+    pgcode = SERIALIZATION_FAILURE
+
+
+async def run_on_async_session(operation):
+    engine = create_async_engine(url_object.set(drivername="postgresql+asyncpg"), poolclass=NullPool)
+    try:
+        async with async_sessionmaker(engine)() as db:
+            return await run_in_transaction_async(db, operation, retries=2, backoff_base=0.01)
+    finally:
+        await engine.dispose()
+
+
+class TestRunInTransactionAsync(unittest.TestCase):
+    def test_retries_without_blocking_the_event_loop(self):
+        attempts = []
+
+        def operation(session):
+            attempts.append(session.execute(text("SELECT 1")).scalar())
+            if len(attempts) == 1:
+                raise DBAPIError("SELECT 1", {}, SerializationFailure())
+            return len(attempts)
+
+        with mock.patch("time.sleep", side_effect=AssertionError("time.sleep blocks the event loop")), \
+                mock.patch("asyncio.sleep", wraps=asyncio.sleep) as sleep:
+            assert asyncio.run(run_on_async_session(operation)) == 2
+        assert attempts == [1, 1]
+        sleep.assert_called_once()
+
+    def test_other_errors_are_not_retried(self):
+        attempts = []
+
+        def operation(session):
+            attempts.append(1)
+            raise DBAPIError("SELECT 1", {}, Exception())
+
+        with self.assertRaises(DBAPIError):
+            asyncio.run(run_on_async_session(operation))
+        assert attempts == [1]
@@ -0,0 +1,116 @@
+import unittest
+import uuid
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, delete, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.api.schemas import TransferMoney
+from app.currency_api import Controller
+from app.database import Session, WalletController
+from app.database.idempotency import IdempotentRequest, StoredResponse
+from app.database.models import IdempotencyKey
+from app.database.transfer_writer import GroupCommitWriter
+from .constants import TEST_INVALID_WALLET_NUMBER, TEST_USER_ID, TEST_WALLET_NUMBER
+
+
+class TestTransferWriter(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        self.commits = 0
+
+        @event.listens_for(self.engine, "commit")
+        def count_commit(connection):
+            self.commits += 1
+
+        self.writer = GroupCommitWriter(sessionmaker(bind=self.engine), max_size=10, max_delay=0.2)
+
+    def tearDown(self):
+        self.writer.close()
+        self.engine.dispose()
+
+    @staticmethod
+    def _transfer(result):
+        def operation(db, transfer_logs):
+            db.execute(text("SELECT 1"))
+            return result
+        return operation
+
+    @staticmethod
+    def _failing(exc):
+        def operation(db, transfer_logs):
+            db.execute(text("SELECT 1"))
+            raise exc
+        return operation
+
+    def test_concurrent_transfers_share_a_commit(self):
+        futures = [self.writer.submit(self._transfer(index)) for index in range(5)]
+        assert [future.result(timeout=5) for future in futures] == list(range(5))
+        assert self.commits == 1
+
+    def test_group_is_cut_at_max_size(self):
+        futures = [self.writer.submit(self._transfer(index)) for index in range(25)]
+        assert [future.result(timeout=5) for future in futures] == list(range(25))
+        assert self.commits == 3
+
+    def test_rejected_transfer_does_not_fail_its_group(self):
+        futures = [
+            self.writer.submit(self._transfer("sent")),
+            self.writer.submit(self._failing(HTTPException(status_code=404, detail="Wallet not found"))),
+            self.writer.submit(self._transfer("sent")),
+        ]
+        assert futures[0].result(timeout=5) == "sent"
+        assert futures[2].result(timeout=5) == "sent"
+        with self.assertRaises(HTTPException):
+            futures[1].result(timeout=5)
+        assert self.commits == 1
+
+    def test_failed_group_is_retried_one_by_one(self):
+        futures = [
+            self.writer.submit(self._transfer("sent")),
+            self.writer.submit(self._failing(RuntimeError("broken transfer"))),
+            self.writer.submit(self._transfer("sent")),
+        ]
+        assert futures[0].result(timeout=5) == "sent"
+        assert futures[2].result(timeout=5) == "sent"
+        with self.assertRaises(RuntimeError):
+            futures[1].result(timeout=5)
+        assert self.commits == 2
+
+    def test_close_commits_pending_transfers(self):
+        future = self.writer.submit(self._transfer("sent"))
+        self.writer.close()
+        assert future.done() and future.result() == "sent"
+        with self.assertRaises(RuntimeError):
+            self.writer.submit(self._transfer("sent"))
+
+
+class TestTransferWriterIdempotency(unittest.TestCase):
+    def setUp(self):
+        self.writer = GroupCommitWriter(Session, max_size=10, max_delay=0.05)
+        self.db = Session()
+        self.key = str(uuid.uuid4())
+
+    def tearDown(self):
+        self.writer.close()
+        self.db.execute(delete(IdempotencyKey).where(IdempotencyKey.key == self.key))
+        self.db.commit()
+        self.db.close()
+
+    def _submit(self):
+        request = IdempotentRequest(
+            user_id=TEST_USER_ID, key=self.key, fingerprint="fingerprint",
+            render=lambda result: StoredResponse(202, b"null")
+        )
+        transfer = TransferMoney(amount=1.0, receiver=TEST_INVALID_WALLET_NUMBER)
+        wc = WalletController(self.db, Controller(rates={"PLN": 4.0, "LLN": 1.0}))
+        return self.writer.submit(wc._transfer_operation(TEST_WALLET_NUMBER, transfer, request))
+
+    def test_rejected_keyed_transfer_can_be_retried(self):
+        for _ in range(2):
+            with self.assertRaises(HTTPException) as raised:
+                self._submit().result(timeout=5)
+            assert raised.exception.status_code == 404
+        assert self.db.scalar(
+            text("SELECT count(*) FROM idempotency_keys WHERE key = :key"), {"key": self.key}
+        ) == 0
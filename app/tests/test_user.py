@@ -18,6 +18,27 @@ class TestUser:
         response = client.get("/user/")
         assert response.status_code == 200
 
+    def test_read_users_pages(self):
+        response = client.get("/user/?limit=2")
+        assert response.status_code == 200, response.text
+        first_page = response.json()
+        assert len(first_page) <= 2, response.text
+
+        response = client.get(f"/user/?limit=2&after_id={first_page[-1]['id']}")
+        assert response.status_code == 200, response.text
+        for user in response.json():
+            assert user["id"] > first_page[-1]["id"], response.text
+
+    def test_read_users_with_filters_and_fields(self):
+        response = client.get("/user/?email_prefix=some.email&fields=id,email")
+        assert response.status_code == 200, response.text
+        for user in response.json():
+            assert set(user.keys()) == {"id", "email"}, response.text
+            assert user["email"].startswith("some.email"), response.text
+
+        response = client.get("/user/?fields=password")
+        assert response.status_code == 417, response.text
+
     def test_create_user(self, db: TestingSessionLocal = override_get_db()):
         fake = Faker()
         email = fake.user_name() + "@gmail.com"
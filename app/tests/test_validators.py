@@ -0,0 +1,78 @@
+import unittest
+
+from fastapi import HTTPException
+from sqlalchemy import event, func, select
+
+from app.api.schemas import TransferMoney
+from app.api.utils import validation_transfer, validation_user_id, validation_user_wallet, wallet_receiver_validation
+from app.database import User, get_request_cache
+from app.database.database import Session, engine
+from .constants import TEST_INVALID_WALLET_NUMBER, TEST_USER_ID, TEST_WALLET_NUMBER, TEST_WALLET_NUMBER_RECEIVER
+
+# One statement each for the user, the sender's wallet and the receiver's wallet.
+SEND_VALIDATION_STATEMENTS = 3
+
+
+class TestValidators(unittest.TestCase):
+    def setUp(self):
+        self.db = Session()
+        self.statements = []
+        event.listen(engine, "before_cursor_execute", self._count)
+        self.nonexistent_user_id = self.db.scalar(select(func.max(User.id))) + 1
+        self.statements.clear()
+
+    def tearDown(self):
+        event.remove(engine, "before_cursor_execute", self._count)
+        self.db.close()
+
+    def _count(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def _status(self, validation, *args) -> int:
+        with self.assertRaises(HTTPException) as raised:
+            validation(*args, self.db)
+        return raised.exception.status_code
+
+    def test_missing_user(self):
+        assert self._status(validation_user_id, self.nonexistent_user_id) == 404
+        assert self._status(validation_user_wallet, self.nonexistent_user_id, TEST_WALLET_NUMBER) == 404
+
+    def test_missing_wallet(self):
+        assert self._status(validation_user_wallet, TEST_USER_ID, TEST_INVALID_WALLET_NUMBER) == 404
+        assert self._status(wallet_receiver_validation, TEST_INVALID_WALLET_NUMBER) == 404
+
+    def test_foreign_wallet(self):
+        assert self._status(validation_user_wallet, TEST_USER_ID, TEST_WALLET_NUMBER_RECEIVER) == 403
+        wallet_receiver_validation(TEST_WALLET_NUMBER_RECEIVER, self.db)
+
+    def test_second_lookup_is_served_from_the_request_cache(self):
+        validation_user_wallet(TEST_USER_ID, TEST_WALLET_NUMBER, self.db)
+        assert len(self.statements) == 2
+        cache = get_request_cache(self.db)
+        assert cache.users[TEST_USER_ID].id == TEST_USER_ID
+        assert cache.wallets[TEST_WALLET_NUMBER].owner_id == TEST_USER_ID
+
+        validation_user_wallet(TEST_USER_ID, TEST_WALLET_NUMBER, self.db)
+        wallet_receiver_validation(TEST_WALLET_NUMBER, self.db)
+        assert len(self.statements) == 2
+
+    def test_misses_are_cached_too(self):
+        assert self._status(wallet_receiver_validation, TEST_INVALID_WALLET_NUMBER) == 404
+        assert self._status(wallet_receiver_validation, TEST_INVALID_WALLET_NUMBER) == 404
+        assert len(self.statements) == 1
+
+    def test_send_validation_statement_count(self):
+        transfer_money = TransferMoney(amount=1, receiver=TEST_WALLET_NUMBER_RECEIVER)
+        validation_transfer(TEST_USER_ID, TEST_WALLET_NUMBER, transfer_money, self.db)
+        assert len(self.statements) == SEND_VALIDATION_STATEMENTS, self.statements
+
+        validation_transfer(TEST_USER_ID, TEST_WALLET_NUMBER, transfer_money, self.db)
+        assert len(self.statements) == SEND_VALIDATION_STATEMENTS, self.statements
+
+    def test_request_cache_is_per_session(self):
+        other_db = Session()
+        try:
+            assert get_request_cache(other_db) is not get_request_cache(self.db)
+            assert get_request_cache(self.db) is get_request_cache(self.db)
+        finally:
+            other_db.close()
\ No newline at end of file
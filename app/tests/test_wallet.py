@@ -1,3 +1,4 @@
+import json
 import unittest
 from datetime import datetime
 
@@ -24,6 +25,26 @@ class TestWallet(unittest.TestCase):
         assert balance > 1.5, response.text
     # assert balance
 
+    def test_wallet_balance(self):
+        response = client.get(f"user/{TEST_USER_ID}/wallet/{TEST_WALLET_NUMBER}/balance")
+        assert response.status_code == 200, response.text
+        balance = response.json()
+
+        response = client.post(f"user/{TEST_USER_ID}/wallet/{TEST_WALLET_NUMBER}/top-up", json={"amount": 2.5})
+        assert response.status_code == 202, response.text
+        assert response.json() == round(balance + 2.5, 2), response.text
+
+        response = client.get(
+            f"user/{TEST_USER_ID}/wallet/{TEST_WALLET_NUMBER}/balance", params={"at": TEST_DATA_TIME_FROM}
+        )
+        assert response.status_code == 200, response.text
+        assert response.json() <= balance, response.text
+
+        response = client.get(
+            f"user/{TEST_USER_ID}/wallet/{TEST_WALLET_NUMBER}/balance", params={"at": TEST_INVALID_DATA_TIME}
+        )
+        assert response.status_code == 417, response.text
+
     def test_top_up_wallet_with_nonexistent_user_id(self):
         response = client.post(
             f"user/{nonexistent_user_id}/wallet/{TEST_WALLET_NUMBER}/top-up",
@@ -65,6 +86,29 @@ class TestWallet(unittest.TestCase):
         db.commit()
         assert db.query(TransferLog).filter_by(transfer_uid=transfer_uid).first() is None, response.text
 
+    def test_send_money_updates_balances(self, db: TestingSessionLocal = override_get_db()):
+        sender_balance = db.query(Wallet.balance).filter_by(number=TEST_WALLET_NUMBER).scalar()
+        receiver_balance = db.query(Wallet.balance).filter_by(number=TEST_WALLET_NUMBER_RECEIVER).scalar()
+        response = client.post(
+            f"user/{TEST_USER_ID}/wallet/{TEST_WALLET_NUMBER}/send",
+            json={
+                "amount": 1.0,
+                "receiver": f"{TEST_WALLET_NUMBER_RECEIVER}"
+            }
+        )
+        assert response.status_code == 202, response.text
+        data = response.json()
+        db.expire_all()
+        assert db.query(Wallet.balance).filter_by(number=TEST_WALLET_NUMBER).scalar() == round(
+            sender_balance - data["money_sent"], 2
+        ), response.text
+        assert db.query(Wallet.balance).filter_by(number=TEST_WALLET_NUMBER_RECEIVER).scalar() == round(
+            receiver_balance + data["money_received"], 2
+        ), response.text
+
+        db.query(TransferLog).filter_by(transfer_uid=data["transfer_uid"]).delete()
+        db.commit()
+
     def test_send_money_with_nonexistent_user_id(self):
         response = client.post(
             f"user/{nonexistent_user_id}/wallet/{TEST_WALLET_NUMBER}/send",
@@ -117,6 +161,33 @@ class TestWallet(unittest.TestCase):
         )
         assert response.status_code == 405, response.text
 
+    def test_send_money_batch(self, db: TestingSessionLocal = override_get_db()):
+        response = client.post(
+            f"user/{TEST_USER_ID}/wallet/{TEST_WALLET_NUMBER}/send-batch",
+            json={
+                "transfers": [
+                    {"amount": 1.0, "receiver": f"{TEST_WALLET_NUMBER_RECEIVER}"},
+                    {"amount": 1.0, "receiver": f"{TEST_INVALID_WALLET_NUMBER}"},
+                    {"amount": 1.01010, "receiver": f"{TEST_WALLET_NUMBER_RECEIVER}"},
+                ]
+            }
+        )
+        assert response.status_code == 202, response.text
+        data = response.json()
+        assert [result["status"] for result in data] == ["sent", "failed", "failed"], response.text
+        transfer = data[0]["transfer"]
+        assert transfer["sender"] == TEST_WALLET_NUMBER and transfer["receiver"] == TEST_WALLET_NUMBER_RECEIVER
+
+        db.query(TransferLog).filter_by(transfer_uid=transfer["transfer_uid"]).delete()
+        db.commit()
+
+    def test_send_money_batch_without_transfers(self):
+        response = client.post(
+            f"user/{TEST_USER_ID}/wallet/{TEST_WALLET_NUMBER}/send-batch",
+            json={"transfers": []}
+        )
+        assert response.status_code == 417, response.text
+
     def test_get_logs(self):
         response = client.get(
             f"user/{TEST_USER_ID}/wallet/{TEST_WALLET_NUMBER}/logs"
@@ -151,6 +222,44 @@ class TestWallet(unittest.TestCase):
         data = response.json()
         assert len(data) == 3, response.text
 
+    def test_logs_pages(self):
+        logs = client.get(f"user/{TEST_USER_ID}/wallet/{TEST_WALLET_NUMBER}/logs").json()
+        paged_logs = []
+        cursor = None
+        while True:
+            params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+            response = client.get(f"user/{TEST_USER_ID}/wallet/{TEST_WALLET_NUMBER}/logs/page", params=params)
+            assert response.status_code == 200, response.text
+            data = response.json()
+            assert len(data["logs"]) <= 2, response.text
+            paged_logs.extend(data["logs"])
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+        assert [log["transfer_uid"] for log in paged_logs] == [log["transfer_uid"] for log in logs]
+
+        response = client.get(
+            f"user/{TEST_USER_ID}/wallet/{TEST_WALLET_NUMBER}/logs/page?cursor=invalid_cursor"
+        )
+        assert response.status_code == 417, response.text
+
+    def test_export_logs(self):
+        logs = client.get(f"user/{TEST_USER_ID}/wallet/{TEST_WALLET_NUMBER}/logs").json()
+
+        response = client.get(f"user/{TEST_USER_ID}/wallet/{TEST_WALLET_NUMBER}/logs/export")
+        assert response.status_code == 200, response.text
+        exported_logs = [json.loads(line) for line in response.text.splitlines()]
+        assert exported_logs == logs, response.text
+
+        response = client.get(f"user/{TEST_USER_ID}/wallet/{TEST_WALLET_NUMBER}/logs/export?format=csv")
+        assert response.status_code == 200, response.text
+        lines = response.text.splitlines()
+        assert lines[0].split(",") == list(logs[0].keys()), response.text
+        assert len(lines) == len(logs) + 1, response.text
+
+        response = client.get(f"user/{TEST_USER_ID}/wallet/{TEST_WALLET_NUMBER}/logs/export?format=xml")
+        assert response.status_code == 417, response.text
+
     def test_logs_with_operation_types(self):
         response = client.get(
             f"user/{TEST_USER_ID}/wallet/{TEST_WALLET_NUMBER}/logs?operation_types=out"
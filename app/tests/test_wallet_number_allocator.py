@@ -0,0 +1,30 @@
+import unittest
+
+from app.api.constants import WALLET_PREFIX
+from app.database.wallet_number_allocator import encode_wallet_number, is_valid_wallet_number, \
+    WalletNumberSpaceExhausted, WALLET_NUMBER_SPACE
+
+
+class TestWalletNumberAllocator(unittest.TestCase):
+    def test_wallet_number_format(self):
+        wallet_number = encode_wallet_number(42, "PLN")
+        assert len(wallet_number) == 16
+        assert wallet_number.startswith(WALLET_PREFIX) and wallet_number.endswith("PLN")
+        assert wallet_number[3:13].isdigit()
+        assert is_valid_wallet_number(wallet_number)
+
+    def test_wallet_numbers_are_unique(self):
+        numbers = {encode_wallet_number(value, "EUR") for value in range(100000)}
+        assert len(numbers) == 100000
+        numbers = {encode_wallet_number(value, "EUR") for value in range(WALLET_NUMBER_SPACE - 1000, WALLET_NUMBER_SPACE)}
+        assert len(numbers) == 1000
+
+    def test_single_digit_typo_is_detected(self):
+        wallet_number = encode_wallet_number(7, "USD")
+        digit = int(wallet_number[5])
+        typo = wallet_number[:5] + str((digit + 1) % 10) + wallet_number[6:]
+        assert not is_valid_wallet_number(typo)
+
+    def test_wallet_number_space_is_bounded(self):
+        with self.assertRaises(WalletNumberSpaceExhausted):
+            encode_wallet_number(WALLET_NUMBER_SPACE, "USD")
@@ -0,0 +1,143 @@
+import datetime
+import threading
+import unittest
+import uuid
+from unittest import mock
+
+from sqlalchemy import delete, insert, select
+from starlette.testclient import TestClient
+
+from app.database import Session
+from app.database.models import TransferLog, WalletDailyStats
+from app.database.wallet_stats import TOP_UP_COUNTERPARTY, post_wallet_stats, rebuild_wallet_stats, top_up_stats, \
+    transfer_stats
+from app.jobs.backfill_wallet_stats import month_batches
+from config import config
+from main import app
+from .constants import TEST_USER_ID, TEST_WALLET_NUMBER, TEST_WALLET_NUMBER_RECEIVER
+
+DAY = datetime.date(2023, 4, 27)
+WALLET = f"/user/{TEST_USER_ID}/wallet/{TEST_WALLET_NUMBER}"
+
+
+def _log(sender: str, receiver: str, money_sent: float, money_received: float, paid_on: datetime.datetime) -> dict:
+    return {
+        "sender": sender,
+        "receiver": receiver,
+        "currency_sent": sender[-3:],
+        "currency_received": receiver[-3:],
+        "money_sent": money_sent,
+        "money_received": money_received,
+        "paid_on": paid_on,
+    }
+
+
+class TestWalletStats(unittest.TestCase):
+    def test_transfers_are_summed_per_wallet_day_and_counterparty(self):
+        noon = datetime.datetime.combine(DAY, datetime.time(12))
+        stats = transfer_stats([
+            _log("DCT0000000000PLN", "DCT1111111111EUR", 10.0, 2.2, noon),
+            _log("DCT0000000000PLN", "DCT1111111111EUR", 0.1, 0.02, noon),
+            _log("DCT0000000000PLN", "DCT0000000000PLN", 5.0, 5.0, noon + datetime.timedelta(days=1)),
+        ])
+        assert stats == {
+            ("DCT0000000000PLN", DAY, "EUR"): [0, 1010, 0, 2],
+            ("DCT1111111111EUR", DAY, "PLN"): [222, 0, 2, 0],
+            ("DCT0000000000PLN", DAY + datetime.timedelta(days=1), "PLN"): [500, 500, 1, 1],
+        }
+
+    def test_top_ups_have_no_counterparty(self):
+        assert top_up_stats("DCT0000000000PLN", 0.29, DAY) == {
+            ("DCT0000000000PLN", DAY, TOP_UP_COUNTERPARTY): [29, 0, 1, 0]
+        }
+
+    def test_backfill_batches_follow_calendar_months(self):
+        assert list(month_batches(datetime.date(2023, 1, 15), datetime.date(2023, 3, 2))) == [
+            (datetime.date(2023, 1, 15), datetime.date(2023, 1, 31)),
+            (datetime.date(2023, 2, 1), datetime.date(2023, 2, 28)),
+            (datetime.date(2023, 3, 1), datetime.date(2023, 3, 2)),
+        ]
+        assert list(month_batches(datetime.date(2023, 11, 5), datetime.date(2024, 2, 1), months=2)) == [
+            (datetime.date(2023, 11, 5), datetime.date(2023, 12, 31)),
+            (datetime.date(2024, 1, 1), datetime.date(2024, 2, 1)),
+        ]
+
+
+class TestWalletStatsRollups(unittest.TestCase):
+    def setUp(self):
+        self.overrides = dict(app.dependency_overrides)
+        app.dependency_overrides.clear()
+        self.client = TestClient(app).__enter__()
+
+    def tearDown(self):
+        self.client.__exit__(None, None, None)
+        app.dependency_overrides.update(self.overrides)
+
+    @staticmethod
+    def _rollups(day: datetime.date, db: Session = None) -> list[tuple]:
+        session = db if db is not None else Session()
+        try:
+            return sorted(tuple(row) for row in session.execute(
+                select(WalletDailyStats.__table__).where(WalletDailyStats.day == day)
+            ))
+        finally:
+            if db is None:
+                session.close()
+
+    @staticmethod
+    def _rebuild(day: datetime.date):
+        db = Session()
+        try:
+            rebuild_wallet_stats(db, day, day)
+            db.commit()
+        finally:
+            db.close()
+
+    @mock.patch.object(config, "EMAIL_CHECK_DELIVERABILITY", False)
+    def test_writes_keep_the_rollups_equal_to_a_rebuild(self):
+        before = self.client.get(f"{WALLET}/statement").json()["totals"]
+        assert self.client.post(f"{WALLET}/top-up", json={"amount": 7.25}).status_code == 202
+        transfer = {"amount": 1.5, "receiver": TEST_WALLET_NUMBER_RECEIVER}
+        assert self.client.post(f"{WALLET}/send", json=transfer).status_code == 202
+        assert self.client.post(f"{WALLET}/send-batch", json={"transfers": [transfer, transfer]}).status_code == 202
+
+        statement = self.client.get(f"{WALLET}/statement", params={"granularity": "month"}).json()
+        assert statement["currency"] == TEST_WALLET_NUMBER[-3:]
+        assert statement["totals"]["count_out"] == before["count_out"] + 3
+        assert statement["totals"]["money_out"] == round(before["money_out"] + 4.5, 2)
+        assert statement["periods"][-1]["top_ups"]["count_in"] >= 1
+
+        today = datetime.date.today()
+        incremental = self._rollups(today)
+        self._rebuild(today)
+        assert self._rollups(today) == incremental
+
+    def test_rebuild_waits_for_rollups_written_meanwhile(self):
+        day = datetime.date(2001, 1, 1)
+        noon = datetime.datetime.combine(day, datetime.time(12))
+        log = {"transfer_uid": uuid.uuid4(), **_log(TEST_WALLET_NUMBER, TEST_WALLET_NUMBER_RECEIVER, 1.5, 1.5, noon)}
+        writer = Session()
+        rebuild = threading.Thread(target=self._rebuild, args=(day,))
+        try:
+            writer.execute(insert(TransferLog), [log])
+            post_wallet_stats(writer, transfer_stats([log]))
+            written = self._rollups(day, writer)
+            rebuild.start()
+            rebuild.join(0.5)
+            assert rebuild.is_alive()
+            writer.commit()
+            rebuild.join()
+            assert self._rollups(day) == written
+        finally:
+            writer.rollback()
+            if rebuild.ident is not None:
+                rebuild.join()
+            writer.execute(delete(TransferLog).where(TransferLog.transfer_uid == log["transfer_uid"]))
+            writer.execute(delete(WalletDailyStats).where(WalletDailyStats.day == day))
+            writer.commit()
+            writer.close()
+
+    def test_invalid_statements(self):
+        for params in ({"granularity": "year"}, {"from": "27.04.2023"}, {"from": "2023-05-01", "to": "2023-04-01"}):
+            with self.subTest(params=params):
+                assert self.client.get(f"{WALLET}/statement", params=params).status_code == 417
@@ -0,0 +1,319 @@
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+import httpx
+import numpy as np
+
+from app.currency_api.fake_server import DEFAULT_RATES, FakeRatesServer
+
+ROOT = Path(__file__).resolve().parent.parent
+
+ENDPOINTS = {
+    "create_user": "POST /user/",
+    "create_wallet": "POST /user/{user_id}/",
+    "top_up": "POST /user/{user_id}/wallet/{wallet_number}/top-up",
+    "send": "POST /user/{user_id}/wallet/{wallet_number}/send",
+    "read_logs": "GET /user/{user_id}/wallet/{wallet_number}/logs",
+}
+DEFAULT_MIX = "create_user=1,create_wallet=1,top_up=3,send=4,read_logs=3"
+SETUP_CURRENCIES = ("PLN", "EUR")
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = {name: [] for name in ENDPOINTS}
+        self.status_codes: dict[str, dict[str, int]] = {name: {} for name in ENDPOINTS}
+        self.enabled = False
+
+    def record(self, name: str, started: float, status: str):
+        if self.enabled:
+            self.latencies[name].append((time.perf_counter() - started) * 1000)
+            self.status_codes[name][status] = self.status_codes[name].get(status, 0) + 1
+
+
+class Workload:
+    """Users and wallets created over HTTP; setup wallets are funded and send money to any wallet."""
+
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, run_id: str, logs_limit: int, amount: float):
+        self.client = client
+        self.recorder = recorder
+        self.run_id = run_id
+        self.logs_limit = logs_limit
+        self.amount = amount
+        self.created_users = 0
+        self.users: dict[int, set[str]] = {}
+        self.wallets: list[tuple[int, str]] = []
+        self.funded: list[tuple[int, str]] = []
+
+    async def _request(self, name: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError as exc:
+            self.recorder.record(name, started, type(exc).__name__)
+            return None
+        self.recorder.record(name, started, str(response.status_code))
+        return response
+
+    async def create_user(self) -> Optional[int]:
+        self.created_users += 1
+        response = await self._request("create_user", "POST", "/user/", json={
+            "name": "Load",
+            "surname": "Test",
+            "email": f"load.{self.run_id}.{self.created_users}@example.com",
+        })
+        if response is None or response.status_code != 201:
+            return None
+        user_id = response.json()["id"]
+        self.users[user_id] = set()
+        return user_id
+
+    async def create_wallet(self, user_id: Optional[int] = None, currency: Optional[str] = None) -> Optional[str]:
+        if user_id is None:
+            candidates = [user_id for user_id, currencies in self.users.items() if len(currencies) < len(DEFAULT_RATES)]
+            user_id = random.choice(candidates) if candidates else await self.create_user()
+            if user_id is None:
+                return None
+        if currency is None:
+            currency = random.choice([currency for currency in DEFAULT_RATES if currency not in self.users[user_id]])
+        self.users[user_id].add(currency)
+        response = await self._request("create_wallet", "POST", f"/user/{user_id}/", json={"currency": currency})
+        if response is None or response.status_code != 201:
+            return None
+        wallet_number = response.json()["number"]
+        self.wallets.append((user_id, wallet_number))
+        return wallet_number
+
+    async def top_up(self, wallet: Optional[tuple[int, str]] = None, amount: Optional[float] = None):
+        user_id, wallet_number = wallet or random.choice(self.wallets)
+        await self._request(
+            "top_up", "POST", f"/user/{user_id}/wallet/{wallet_number}/top-up", json={"amount": amount or self.amount}
+        )
+
+    async def send(self):
+        user_id, wallet_number = random.choice(self.funded)
+        receiver = random.choice(self.wallets)[1]
+        while receiver == wallet_number:
+            receiver = random.choice(self.wallets)[1]
+        await self._request("send", "POST", f"/user/{user_id}/wallet/{wallet_number}/send", json={
+            "amount": self.amount, "receiver": receiver
+        })
+
+    async def read_logs(self):
+        user_id, wallet_number = random.choice(self.funded)
+        await self._request(
+            "read_logs", "GET", f"/user/{user_id}/wallet/{wallet_number}/logs", params={"limit": self.logs_limit}
+        )
+
+    async def setup(self, users: int, balance: float):
+        for _ in range(users):
+            user_id = await self.create_user()
+            if user_id is None:
+                raise RuntimeError("could not create a user, is the app running and its database reachable?")
+            for currency in SETUP_CURRENCIES:
+                wallet_number = await self.create_wallet(user_id, currency)
+                if wallet_number is None:
+                    raise RuntimeError(f"could not create a {currency} wallet, are currency rates available?")
+                await self.top_up((user_id, wallet_number), balance)
+                self.funded.append((user_id, wallet_number))
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}, expected one of {', '.join(ENDPOINTS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+async def run_workers(workload: Workload, mix: dict[str, float], concurrency: int, duration: float):
+    scenarios = [getattr(workload, name) for name in mix]
+    weights = list(mix.values())
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            await random.choices(scenarios, weights)[0]()
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+
+
+def summarize(latencies: list[float], status_codes: dict[str, int], duration: float) -> dict:
+    failures = sum(count for status, count in status_codes.items() if not status.startswith("2"))
+    summary = {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / duration, 2),
+        "failures": failures,
+        "status_codes": dict(sorted(status_codes.items())),
+        "latency_ms": None,
+    }
+    if latencies:
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        summary["latency_ms"] = {
+            "p50": round(p50, 3),
+            "p95": round(p95, 3),
+            "p99": round(p99, 3),
+            "mean": round(float(np.mean(latencies)), 3),
+            "max": round(max(latencies), 3),
+        }
+    return summary
+
+
+def report(recorder: Recorder, duration: float) -> dict:
+    endpoints = {
+        name: {"route": ENDPOINTS[name], **summarize(recorder.latencies[name], recorder.status_codes[name], duration)}
+        for name in ENDPOINTS if recorder.latencies[name]
+    }
+    status_codes = {}
+    for codes in recorder.status_codes.values():
+        for status, count in codes.items():
+            status_codes[status] = status_codes.get(status, 0) + count
+    latencies = [latency for endpoint_latencies in recorder.latencies.values() for latency in endpoint_latencies]
+    return {"endpoints": endpoints, "total": summarize(latencies, status_codes, duration)}
+
+
+def print_report(results: dict, baseline: Optional[dict] = None):
+    print(f"{'endpoint':>14} {'requests':>9} {'rps':>8} {'fail':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+          + (f" {'rps vs base':>12} {'p99 vs base':>12}" if baseline else ""))
+    rows = [*results["endpoints"].items(), ("total", results["total"])]
+    previous_rows = {**baseline["endpoints"], "total": baseline["total"]} if baseline else {}
+    for name, summary in rows:
+        latency = summary["latency_ms"] or {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+        line = (f"{name:>14} {summary['requests']:>9} {summary['rps']:>8.1f} {summary['failures']:>6} "
+                f"{latency['p50']:>8.2f} {latency['p95']:>8.2f} {latency['p99']:>8.2f}")
+        previous = previous_rows.get(name)
+        if previous and previous["rps"] and previous["latency_ms"] and summary["latency_ms"]:
+            line += (f" {summary['rps'] / previous['rps'] - 1:>+12.1%}"
+                     f" {latency['p99'] / previous['latency_ms']['p99'] - 1:>+12.1%}")
+        print(line)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_app(rates_url: str, workers: int) -> tuple[subprocess.Popen, str]:
+    port = free_port()
+    env = {
+        **os.environ,
+        "CURRENCY_EXCHANGE_API_URL": rates_url,
+        "CURRENCY_EXCHANGE_API_KEY": "load-test",
+        "EMAIL_CHECK_DELIVERABILITY": "false",
+    }
+    process = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--log-level", "warning",
+    ], cwd=ROOT, env=env)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"the app exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{url}/metrics").status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("the app did not start within 30 seconds")
+
+
+async def load_test(args, url: str) -> dict:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=args.timeout) as client:
+        workload = Workload(client, recorder, uuid.uuid4().hex[:8], args.logs_limit, args.amount)
+        await workload.setup(args.users, args.balance)
+        if args.warmup:
+            await run_workers(workload, args.mix, args.concurrency, args.warmup)
+        recorder.enabled = True
+        started_at = datetime.datetime.now().isoformat(timespec="seconds")
+        started = time.perf_counter()
+        await run_workers(workload, args.mix, args.concurrency, args.duration)
+        elapsed = time.perf_counter() - started
+    return {
+        "run_id": workload.run_id,
+        "commit": git_commit(),
+        "started_at": started_at,
+        "url": url,
+        "duration_seconds": round(elapsed, 3),
+        "concurrency": args.concurrency,
+        "mix": args.mix,
+        **report(recorder, elapsed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Drive the app over HTTP with a weighted mix of scenarios and report per-endpoint requests per "
+                    "second and latency percentiles. Setup users, wallets and top-ups are created through the API "
+                    "and stay in the database; their emails are load.<run_id>.<n>@example.com."
+    )
+    parser.add_argument("--url", default="http://localhost:8000", help="app to test, ignored with --serve")
+    parser.add_argument("--serve", action="store_true",
+                        help="start the app with uvicorn against the configured database and fake currency rates")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers with --serve")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"scenario weights, default {DEFAULT_MIX}")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds of unmeasured load before measuring")
+    parser.add_argument("--users", type=int, default=50, help="users with funded PLN and EUR wallets to set up")
+    parser.add_argument("--balance", type=float, default=1000000.0, help="top-up of each setup wallet")
+    parser.add_argument("--amount", type=float, default=1.0, help="amount of each top-up and send")
+    parser.add_argument("--logs-limit", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds before a request counts as failed")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--output", type=Path, help="results file, default load_test_<commit>_<time>.json")
+    parser.add_argument("--baseline", type=Path, help="results of an earlier run to compare with")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    process = None
+    rates_server = None
+    url = args.url
+    if args.serve:
+        rates_server = FakeRatesServer().start()
+        process, url = start_app(rates_server.url, args.workers)
+    try:
+        results = asyncio.run(load_test(args, url))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        if rates_server is not None:
+            rates_server.stop()
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    print_report(results, baseline)
+    output = args.output or Path(f"load_test_{results['commit'] or 'unknown'}_{time.strftime('%Y%m%d%H%M%S')}.json")
+    output.write_text(json.dumps(results, indent=2))
+    print(f"results saved to {output}")
+
+
+if __name__ == '__main__':
+    main()
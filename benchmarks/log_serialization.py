@@ -0,0 +1,108 @@
+import argparse
+import datetime
+import statistics
+import time
+import uuid
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, insert
+
+from app.api.constants import EARLIEST_DATETIME
+from app.api.schemas import TransferLogDB
+from app.api.serialization import logs_response
+from app.database import LogController, Session
+from app.database.models import TransferLog
+
+BENCH_WALLET = "LOG0000000000PLN"
+COUNTERPARTY = "LOG1111111111EUR"
+
+
+def create_logs(db: Session, rows: int):
+    paid_on = datetime.datetime.now()
+    db.execute(insert(TransferLog), [
+        {
+            "transfer_uid": uuid.uuid4(),
+            "sender": BENCH_WALLET if index % 2 else COUNTERPARTY,
+            "receiver": COUNTERPARTY if index % 2 else BENCH_WALLET,
+            "currency_sent": "PLN" if index % 2 else "EUR",
+            "currency_received": "EUR" if index % 2 else "PLN",
+            "money_sent": round(1 + index % 997 * 0.37, 2),
+            "money_received": round(0.22 + index % 991 * 0.08, 2),
+            "paid_on": paid_on - datetime.timedelta(seconds=index * 7.3),
+        }
+        for index in range(rows)
+    ])
+    db.commit()
+
+
+def cleanup(db: Session):
+    db.rollback()
+    db.execute(delete(TransferLog).where(TransferLog.sender.in_([BENCH_WALLET, COUNTERPARTY])))
+    db.commit()
+
+
+def orm_path(db: Session) -> tuple[float, float, bytes]:
+    """ORM objects validated into TransferLogDB and encoded the way FastAPI handles a response_model."""
+    started = time.perf_counter()
+    logs = list(db.scalars(LogController(db)._get_logs_statement(["out", "in"], BENCH_WALLET, EARLIEST_DATETIME, None)))
+    fetched = time.perf_counter()
+    body = JSONResponse(jsonable_encoder([TransferLogDB.from_orm(log) for log in logs])).body
+    return fetched - started, time.perf_counter() - fetched, body
+
+
+def rows_path(db: Session) -> tuple[float, float, bytes]:
+    """Core rows with timestamps formatted in bulk and orjson encoding, as GET .../logs now does."""
+    started = time.perf_counter()
+    rows = LogController(db).get_logs_using_operation_types(["out", "in"], BENCH_WALLET, EARLIEST_DATETIME, None)
+    fetched = time.perf_counter()
+    body = logs_response(rows).body
+    return fetched - started, time.perf_counter() - fetched, body
+
+
+def measure(path, repeat: int) -> tuple[list[float], list[float], bytes]:
+    fetch, serialize = [], []
+    body = b""
+    for _ in range(repeat):
+        db = Session()
+        try:
+            fetch_seconds, serialize_seconds, body = path(db)
+        finally:
+            db.close()
+        fetch.append(fetch_seconds * 1000)
+        serialize.append(serialize_seconds * 1000)
+    return fetch, serialize, body
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the ORM and response_model path of GET .../logs with the Core rows and orjson path. "
+                    "Inserts the logs into the configured database and removes them afterwards."
+    )
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    db = Session()
+    cleanup(db)
+    create_logs(db, args.rows)
+    try:
+        print(f"{'path':>6} {'fetch ms':>9} {'encode ms':>10} {'total ms':>9}")
+        bodies = {}
+        totals = {}
+        for name, path in (("orm", orm_path), ("rows", rows_path)):
+            path(db)
+            fetch, serialize, bodies[name] = measure(path, args.repeat)
+            totals[name] = statistics.median([f + s for f, s in zip(fetch, serialize)])
+            print(
+                f"{name:>6} {statistics.median(fetch):>9.1f} {statistics.median(serialize):>10.1f} "
+                f"{totals[name]:>9.1f}"
+            )
+        print(f"speedup {totals['orm'] / totals['rows']:.2f}x, identical bodies: {bodies['orm'] == bodies['rows']}")
+    finally:
+        cleanup(db)
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
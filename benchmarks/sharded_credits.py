@@ -0,0 +1,131 @@
+import argparse
+import statistics
+import threading
+import time
+
+from sqlalchemy import event, text
+
+from app.api.schemas import TransferMoney
+from app.currency_api import Controller
+from app.database import Session, WalletController
+from app.database.balance_store import balance_store, ShardedBalanceStore
+from app.database.database import engine
+
+BENCH_EMAIL = "sharded.credits.benchmark@example.com"
+MERCHANT_NUMBER = "SHD0000000000PLN"
+SENDER_PREFIX = "SHS"
+RATES = {"PLN": 1.0}
+
+
+def create_wallets(db: Session, senders: int) -> tuple[int, list[str]]:
+    user_id = db.execute(text(
+        "INSERT INTO users (name, surname, email) VALUES ('Bench', 'Mark', :email) "
+        "ON CONFLICT (email) DO UPDATE SET name = EXCLUDED.name RETURNING id"
+    ), {"email": BENCH_EMAIL}).scalar_one()
+    merchant_id = db.execute(text(
+        "INSERT INTO wallets (number, currency, balance, owner_id) VALUES (:number, 'PLN', 0, :user_id) RETURNING id"
+    ), {"number": MERCHANT_NUMBER, "user_id": user_id}).scalar_one()
+    sender_numbers = [f"{SENDER_PREFIX}{index:010d}PLN" for index in range(senders)]
+    db.execute(text(
+        "INSERT INTO wallets (number, currency, balance, owner_id) VALUES (:number, 'PLN', 1000000000, :user_id)"
+    ), [{"number": number, "user_id": user_id} for number in sender_numbers])
+    db.commit()
+    return merchant_id, sender_numbers
+
+
+def merchant_balance(db: Session, merchant_id: int) -> float:
+    balance = balance_store.get_balances(db, [merchant_id])[merchant_id]
+    db.commit()
+    return balance
+
+
+def run_credits(sender_numbers: list[str], amount: float, duration: float) -> list[float]:
+    latencies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(len(sender_numbers))
+
+    def send(sender_number: str):
+        db = Session()
+        wc = WalletController(db, Controller(rates=RATES))
+        transfer = TransferMoney(amount=amount, receiver=MERCHANT_NUMBER)
+        sent = []
+        try:
+            barrier.wait()
+            deadline = time.perf_counter() + duration
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                wc.transfer_money_between_wallets(sender_number, transfer)
+                sent.append((time.perf_counter() - started) * 1000)
+        finally:
+            db.close()
+        with lock:
+            latencies.extend(sent)
+
+    threads = [threading.Thread(target=send, args=(number,)) for number in sender_numbers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def emulate_round_trip(rtt_ms: float):
+    # On a single host a statement returns in microseconds, so the row lock is only held for CPU time and
+    # the benchmark measures the CPU. Sleeping per statement stands in for the network between app and database.
+    @event.listens_for(engine, "before_cursor_execute")
+    def sleep_round_trip(*args):
+        time.sleep(rtt_ms / 1000)
+
+
+def cleanup(db: Session):
+    db.rollback()
+    db.execute(text('DELETE FROM "TransferLog" WHERE receiver = :number'), {"number": MERCHANT_NUMBER})
+    db.execute(text("DELETE FROM users WHERE email = :email"), {"email": BENCH_EMAIL})
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure the credit rate to a single hot wallet as its balance is split over more slots. "
+                    "Creates a merchant wallet and one sender wallet per thread in the configured database "
+                    "and removes them afterwards. Requires WALLET_BALANCE_STORE=sharded."
+    )
+    parser.add_argument("--slots", default="1,2,4,8,16,32", help="1 keeps the balance in the wallets row")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per slot count")
+    parser.add_argument("--amount", type=float, default=0.01)
+    parser.add_argument("--rtt-ms", type=float, default=0.0,
+                        help="app to database round trip to emulate per statement, for a database on the same host")
+    args = parser.parse_args()
+    if not isinstance(balance_store, ShardedBalanceStore):
+        parser.error("set WALLET_BALANCE_STORE=sharded")
+    if args.rtt_ms:
+        emulate_round_trip(args.rtt_ms)
+
+    db = Session()
+    cleanup(db)
+    merchant_id, sender_numbers = create_wallets(db, args.threads)
+
+    print(f"{'slots':>6} {'credits/s':>10} {'speedup':>8} {'p50 ms':>8} {'p95 ms':>8} {'balance':>8}")
+    try:
+        baseline = None
+        for slots in [int(slots) for slots in args.slots.split(",")]:
+            balance_store.shard_wallet(db, merchant_id, slots)
+            db.commit()
+            before = merchant_balance(db, merchant_id)
+            latencies = sorted(run_credits(sender_numbers, args.amount, args.duration))
+            credited = round(merchant_balance(db, merchant_id) - before, 2)
+            rate = len(latencies) / args.duration
+            baseline = baseline or rate
+            print(
+                f"{slots:>6} {rate:>10.0f} {rate / baseline:>7.2f}x {statistics.median(latencies):>8.2f} "
+                f"{latencies[int(len(latencies) * 0.95) - 1]:>8.2f} "
+                f"{'ok' if credited == round(len(latencies) * args.amount, 2) else 'LOST':>8}"
+            )
+    finally:
+        cleanup(db)
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
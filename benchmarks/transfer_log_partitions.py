@@ -0,0 +1,176 @@
+import argparse
+import datetime
+import random
+import statistics
+import time
+import uuid
+
+from sqlalchemy import text
+
+from app.database import Session
+from app.database.database import engine
+from app.database.partitions import add_months
+
+PLAIN = "bench_transfer_log_plain"
+PARTITIONED = "bench_transfer_log_partitioned"
+START = datetime.date(2021, 1, 1)
+LOAD_BATCH = 5000000
+PAGE_SIZE = 50
+LAST_UID = uuid.UUID(int=2 ** 128 - 1)
+
+# Shaped like the queries of LogController._get_logs_statement: one branch per direction, newest first.
+WALLET_LOGS = (
+    "SELECT * FROM ("
+    "(SELECT * FROM {table} WHERE sender = :wallet AND {window} ORDER BY paid_on DESC, transfer_uid DESC LIMIT :limit)"
+    " UNION ALL "
+    "(SELECT * FROM {table} WHERE receiver = :wallet AND sender <> :wallet AND {window} "
+    "ORDER BY paid_on DESC, transfer_uid DESC LIMIT :limit)"
+    ") logs ORDER BY paid_on DESC, transfer_uid DESC LIMIT :limit"
+)
+QUERIES = {
+    "wallet month": WALLET_LOGS.format(table="{table}", window="paid_on >= :start AND paid_on < :end"),
+    "wallet page": WALLET_LOGS.format(
+        table="{table}", window=f"paid_on <= :end AND (paid_on, transfer_uid) < (:end, '{LAST_UID}')"
+    ),
+    "month totals": "SELECT count(*), sum(money_sent) FROM {table} WHERE paid_on >= :start AND paid_on < :end",
+}
+
+
+def wallet_number(index: int) -> str:
+    return f"DCT{index:010d}PLN"
+
+
+def create_tables(db: Session, months: int):
+    db.execute(text(f'CREATE TABLE {PLAIN} (LIKE "TransferLog" INCLUDING DEFAULTS)'))
+    db.execute(text(
+        f'CREATE TABLE {PARTITIONED} (LIKE "TransferLog" INCLUDING DEFAULTS) PARTITION BY RANGE (paid_on)'
+    ))
+    for month in (add_months(START, index) for index in range(months)):
+        db.execute(text(
+            f"CREATE TABLE {PARTITIONED}_{month:%Y_%m} PARTITION OF {PARTITIONED} "
+            f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+        ))
+    db.commit()
+
+
+def load(db: Session, rows: int, months: int, wallets: int):
+    days = (add_months(START, months) - START).days
+    for first in range(0, rows, LOAD_BATCH):
+        started = time.perf_counter()
+        last = min(first + LOAD_BATCH, rows)
+        db.execute(text(
+            f"INSERT INTO {PLAIN} SELECT md5(index::text)::uuid, "
+            "'DCT' || lpad((random() * :wallets)::int::text, 10, '0') || 'PLN', "
+            "'DCT' || lpad((random() * :wallets)::int::text, 10, '0') || 'PLN', "
+            "'PLN', 'PLN', amount, amount, :start + random() * :days * interval '1 day' "
+            "FROM (SELECT index, round((random() * 100)::numeric, 2) AS amount "
+            "FROM generate_series(:first, :last - 1) AS index) generated"
+        ), {"wallets": wallets - 1, "start": START, "days": days, "first": first, "last": last})
+        db.commit()
+        print(f"loaded {last}/{rows} rows in {time.perf_counter() - started:.1f}s", flush=True)
+    started = time.perf_counter()
+    db.execute(text(f"INSERT INTO {PARTITIONED} SELECT * FROM {PLAIN}"))
+    db.commit()
+    print(f"copied {rows} rows into the partitions in {time.perf_counter() - started:.1f}s", flush=True)
+
+
+def create_indexes(db: Session):
+    # The same keys as TransferLog, built after loading.
+    for table in (PLAIN, PARTITIONED):
+        started = time.perf_counter()
+        db.execute(text(f"ALTER TABLE {table} ADD PRIMARY KEY (transfer_uid, paid_on)"))
+        db.execute(text(f"CREATE INDEX ON {table} (sender, paid_on, transfer_uid)"))
+        db.execute(text(f"CREATE INDEX ON {table} (receiver, paid_on, transfer_uid)"))
+        db.commit()
+        print(f"indexed {table} in {time.perf_counter() - started:.1f}s", flush=True)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text(f"VACUUM ANALYZE {PLAIN}, {PARTITIONED}"))
+
+
+def time_query(db: Session, statement: str, parameters: list[dict]) -> float:
+    latencies = []
+    for values in parameters:
+        started = time.perf_counter()
+        db.execute(text(statement), values).all()
+        latencies.append((time.perf_counter() - started) * 1000)
+    db.commit()
+    return statistics.median(latencies)
+
+
+def time_expiry(db: Session) -> tuple[float, float]:
+    """Removes the oldest month from both tables: a DELETE from the plain one, a DETACH and DROP of a partition."""
+    end = add_months(START, 1)
+    started = time.perf_counter()
+    db.execute(text(f"DELETE FROM {PLAIN} WHERE paid_on < :end"), {"end": end})
+    db.commit()
+    plain = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    db.execute(text(f"ALTER TABLE {PARTITIONED} DETACH PARTITION {PARTITIONED}_{START:%Y_%m}"))
+    db.execute(text(f"DROP TABLE {PARTITIONED}_{START:%Y_%m}"))
+    db.commit()
+    return plain, (time.perf_counter() - started) * 1000
+
+
+def cleanup(db: Session):
+    db.rollback()
+    db.execute(text(f"DROP TABLE IF EXISTS {PLAIN}, {PARTITIONED}"))
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare TransferLog queries on an unpartitioned and a monthly partitioned copy of a synthetic "
+                    "history. Creates both tables in the configured database next to TransferLog and drops them "
+                    "afterwards; at the default size expect hours of loading and twice 25GB of disk."
+    )
+    parser.add_argument("--rows", type=int, default=100000000)
+    parser.add_argument("--months", type=int, default=24, help="months of history, one partition each")
+    parser.add_argument("--wallets", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=50, help="runs of each query, over random wallets and months")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep", action="store_true",
+                        help="keep the tables for another run, which then skips loading and the expiry")
+    args = parser.parse_args()
+
+    db = Session()
+    reuse = db.scalar(text("SELECT to_regclass(:table) IS NOT NULL"), {"table": PARTITIONED})
+    db.commit()
+    if not reuse:
+        create_tables(db, args.months)
+        try:
+            load(db, args.rows, args.months, args.wallets)
+            create_indexes(db)
+        except BaseException:
+            cleanup(db)
+            raise
+
+    rng = random.Random(args.seed)
+    parameters = []
+    for _ in range(args.repeat):
+        month = add_months(START, rng.randrange(args.months))
+        parameters.append({
+            "wallet": wallet_number(rng.randrange(args.wallets)),
+            "start": month,
+            "end": add_months(month, 1),
+            "limit": PAGE_SIZE,
+        })
+
+    print(f"{'query':<14} {'plain ms':>10} {'partitioned ms':>15} {'speedup':>8}")
+    try:
+        for name, statement in QUERIES.items():
+            time_query(db, statement.format(table=PLAIN), parameters[:3])
+            time_query(db, statement.format(table=PARTITIONED), parameters[:3])
+            plain = time_query(db, statement.format(table=PLAIN), parameters)
+            partitioned = time_query(db, statement.format(table=PARTITIONED), parameters)
+            print(f"{name:<14} {plain:>10.2f} {partitioned:>15.2f} {plain / partitioned:>7.2f}x")
+        if not args.keep:
+            plain, partitioned = time_expiry(db)
+            print(f"{'expire month':<14} {plain:>10.2f} {partitioned:>15.2f} {plain / partitioned:>7.2f}x")
+    finally:
+        if not args.keep:
+            cleanup(db)
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
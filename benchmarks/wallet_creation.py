@@ -0,0 +1,110 @@
+import argparse
+import random
+import statistics
+import time
+
+from sqlalchemy import text
+
+from app.api.constants import WALLET_PREFIX
+from app.database import Session, Wallet
+from app.database.wallet_number_allocator import create_wallet_number_allocator
+
+BENCH_EMAIL = "wallet.creation.benchmark@example.com"
+FILLER_PREFIX = "BEN"
+
+
+def legacy_create_wallet_number(currency: str, db: Session) -> str:
+    numbers = db.query(Wallet.number).all()
+    wallet_number = WALLET_PREFIX + "".join([str(random.randint(0, 9)) for _ in range(10)]) + currency
+    while True:
+        try:
+            numbers.index(wallet_number)
+        except ValueError:
+            return wallet_number
+        else:
+            wallet_number = WALLET_PREFIX + "".join([str(random.randint(0, 9)) for _ in range(10)]) + currency
+
+
+def create_bench_user(db: Session) -> int:
+    user_id = db.execute(text(
+        "INSERT INTO users (name, surname, email) VALUES ('Bench', 'Mark', :email) "
+        "ON CONFLICT (email) DO UPDATE SET name = EXCLUDED.name RETURNING id"
+    ), {"email": BENCH_EMAIL}).scalar_one()
+    db.commit()
+    return user_id
+
+
+def grow_filler_wallets(db: Session, user_id: int, size: int):
+    db.execute(text(
+        "INSERT INTO wallets (number, currency, owner_id) "
+        "SELECT :prefix || lpad(i::text, 10, '0') || 'XXX', 'XXX', :user_id "
+        "FROM generate_series((SELECT count(*) FROM wallets WHERE number LIKE :pattern), :size - 1) AS i"
+    ), {"prefix": FILLER_PREFIX, "pattern": FILLER_PREFIX + "%", "user_id": user_id, "size": size})
+    db.commit()
+    db.execute(text("ANALYZE wallets"))
+    db.commit()
+
+
+def measure(db: Session, user_id: int, samples: int, create) -> list[float]:
+    latencies = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        create()
+        latencies.append((time.perf_counter() - started) * 1000)
+    db.execute(text("DELETE FROM wallets WHERE owner_id = :user_id AND currency = 'BCH'"), {"user_id": user_id})
+    db.commit()
+    return latencies
+
+
+def cleanup(db: Session):
+    db.rollback()
+    db.execute(text("DELETE FROM users WHERE email = :email"), {"email": BENCH_EMAIL})
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure wallet creation latency as the wallets table grows. "
+                    "Inserts filler wallets into the configured database and removes them afterwards."
+    )
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000,10000000")
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--allocator", choices=["sequence", "block"], default="sequence")
+    parser.add_argument("--legacy-max-size", type=int, default=100000,
+                        help="largest table size to measure the previous full-scan allocator at")
+    args = parser.parse_args()
+
+    db = Session()
+    allocator = create_wallet_number_allocator(args.allocator)
+    user_id = create_bench_user(db)
+
+    def create_wallet():
+        wallet = Wallet(currency="BCH", number=allocator.allocate(db, "BCH"), owner_id=user_id)
+        db.add(wallet)
+        db.commit()
+
+    def create_legacy_wallet():
+        wallet = Wallet(currency="BCH", number=legacy_create_wallet_number("BCH", db), owner_id=user_id)
+        db.add(wallet)
+        db.commit()
+
+    print(f"{'wallets':>10} {'allocator':>10} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8}")
+    try:
+        for size in [int(size) for size in args.sizes.split(",")]:
+            grow_filler_wallets(db, user_id, size)
+            runs = [(args.allocator, create_wallet)]
+            if size <= args.legacy_max_size:
+                runs.append(("legacy", create_legacy_wallet))
+            for name, create in runs:
+                latencies = sorted(measure(db, user_id, args.samples, create))
+                print(
+                    f"{size:>10} {name:>10} {statistics.median(latencies):>8.2f} "
+                    f"{latencies[int(len(latencies) * 0.95) - 1]:>8.2f} {statistics.mean(latencies):>8.2f}"
+                )
+    finally:
+        cleanup(db)
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
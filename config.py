@@ -17,9 +17,57 @@ class Settings(BaseSettings):
     DB_HOST: str = os.environ.get("HOST", "localhost")
     DB_PORT: int = os.environ.get("DB_PORT", 5432)
     DB_NAME: str = os.environ.get("DB_NAME", "online_wallet")
+    DB_POOL_SIZE: int = os.environ.get("DB_POOL_SIZE", 10)
+    DB_MAX_OVERFLOW: int = os.environ.get("DB_MAX_OVERFLOW", 10)
+    DB_POOL_TIMEOUT: float = os.environ.get("DB_POOL_TIMEOUT", 10.0)
+    DB_POOL_RECYCLE: int = os.environ.get("DB_POOL_RECYCLE", 1800)
+    DB_POOL_PRE_PING: bool = os.environ.get("DB_POOL_PRE_PING", True)
+    DB_POOL_USE_LIFO: bool = os.environ.get("DB_POOL_USE_LIFO", True)
+    DB_REPLICA_URLS: str = os.environ.get("DB_REPLICA_URLS", "")
+    DB_REPLICA_MAX_LAG: float = os.environ.get("DB_REPLICA_MAX_LAG", 5.0)
+    DB_REPLICA_CHECK_INTERVAL: float = os.environ.get("DB_REPLICA_CHECK_INTERVAL", 2.0)
+    DB_REPLICA_STICKY_SECONDS: float = os.environ.get("DB_REPLICA_STICKY_SECONDS", 10.0)
+    DB_REPLICA_CONNECT_TIMEOUT: int = os.environ.get("DB_REPLICA_CONNECT_TIMEOUT", 2)
+    ASYNC_DB: bool = os.environ.get("ASYNC_DB", False)
+    DB_TRANSACTION_RETRIES: int = os.environ.get("DB_TRANSACTION_RETRIES", 5)
+    DB_TRANSACTION_BACKOFF_BASE: float = os.environ.get("DB_TRANSACTION_BACKOFF_BASE", 0.01)
+
+    TRANSFER_BATCH_MAX_SIZE: int = os.environ.get("TRANSFER_BATCH_MAX_SIZE", 10000)
+    TRANSFER_GROUP_COMMIT: bool = os.environ.get("TRANSFER_GROUP_COMMIT", False)
+    TRANSFER_GROUP_COMMIT_MAX_SIZE: int = os.environ.get("TRANSFER_GROUP_COMMIT_MAX_SIZE", 64)
+    TRANSFER_GROUP_COMMIT_MAX_DELAY: float = os.environ.get("TRANSFER_GROUP_COMMIT_MAX_DELAY", 0.002)
+    WALLET_NUMBER_ALLOCATOR: str = os.environ.get("WALLET_NUMBER_ALLOCATOR", "sequence")
+    WALLET_NUMBER_BLOCK_SIZE: int = os.environ.get("WALLET_NUMBER_BLOCK_SIZE", 100)
+    WALLET_BALANCE_STORE: str = os.environ.get("WALLET_BALANCE_STORE", "column")
+    WALLET_BALANCE_SLOTS: int = os.environ.get("WALLET_BALANCE_SLOTS", 16)
+    LEDGER_SNAPSHOT_LAG: int = os.environ.get("LEDGER_SNAPSHOT_LAG", 60)
+    LEDGER_SNAPSHOT_BATCH_SIZE: int = os.environ.get("LEDGER_SNAPSHOT_BATCH_SIZE", 10000)
+    IDEMPOTENCY_KEY_RETENTION: int = os.environ.get("IDEMPOTENCY_KEY_RETENTION", 86400)
+    IDEMPOTENCY_CACHE_SIZE: int = os.environ.get("IDEMPOTENCY_CACHE_SIZE", 10000)
+    BALANCE_CACHE_SIZE: int = os.environ.get("BALANCE_CACHE_SIZE", 10000)
+    BALANCE_CACHE_TTL: float = os.environ.get("BALANCE_CACHE_TTL", 5.0)
+    LOGS_EXPORT_CHUNK_SIZE: int = os.environ.get("LOGS_EXPORT_CHUNK_SIZE", 1000)
+    TRANSFER_LOG_PARTITIONS_AHEAD: int = os.environ.get("TRANSFER_LOG_PARTITIONS_AHEAD", 3)
+    TRANSFER_LOG_RETENTION_MONTHS: int = os.environ.get("TRANSFER_LOG_RETENTION_MONTHS", 0)
+    TRANSFER_LOG_RETENTION_DROP: bool = os.environ.get("TRANSFER_LOG_RETENTION_DROP", False)
+    PROFILING_ENABLED: bool = os.environ.get("PROFILING_ENABLED", True)
+    PROFILING_SERVER_TIMING: bool = os.environ.get("PROFILING_SERVER_TIMING", False)
+
+    EMAIL_CHECK_DELIVERABILITY: bool = os.environ.get("EMAIL_CHECK_DELIVERABILITY", True)
 
     CURRENCY_EXCHANGE_API_URL: str = os.environ.get("CURRENCY_EXCHANGE_API_URL", "")
     CURRENCY_EXCHANGE_API_KEY: str = os.environ.get("CURRENCY_EXCHANGE_API_KEY", "")
+    CURRENCY_RATES_TTL: int = os.environ.get("CURRENCY_RATES_TTL", 3600)
+    CURRENCY_RATES_REFRESH_AHEAD: int = os.environ.get("CURRENCY_RATES_REFRESH_AHEAD", 300)
+    CURRENCY_RATES_MAX_STALE: int = os.environ.get("CURRENCY_RATES_MAX_STALE", 86400)
+    CURRENCY_API_CONNECT_TIMEOUT: float = os.environ.get("CURRENCY_API_CONNECT_TIMEOUT", 3.0)
+    CURRENCY_API_READ_TIMEOUT: float = os.environ.get("CURRENCY_API_READ_TIMEOUT", 5.0)
+    CURRENCY_API_RETRIES: int = os.environ.get("CURRENCY_API_RETRIES", 3)
+    CURRENCY_API_BACKOFF_BASE: float = os.environ.get("CURRENCY_API_BACKOFF_BASE", 0.2)
+    CURRENCY_API_BACKOFF_MAX: float = os.environ.get("CURRENCY_API_BACKOFF_MAX", 5.0)
+    CURRENCY_API_POOL_SIZE: int = os.environ.get("CURRENCY_API_POOL_SIZE", 10)
+    CURRENCY_API_BREAKER_THRESHOLD: int = os.environ.get("CURRENCY_API_BREAKER_THRESHOLD", 5)
+    CURRENCY_API_BREAKER_RESET_TIMEOUT: float = os.environ.get("CURRENCY_API_BREAKER_RESET_TIMEOUT", 30.0)
 
     class Config:
         env_file = ".env"
@@ -7,11 +7,19 @@ CREATE TABLE IF NOT EXISTS "users" (
     );
 
 
+CREATE INDEX IF NOT EXISTS users_email_pattern_idx ON "users" (email varchar_pattern_ops);
+CREATE INDEX IF NOT EXISTS users_surname_pattern_idx ON "users" (surname varchar_pattern_ops);
+
+
+CREATE SEQUENCE IF NOT EXISTS wallet_number_seq START 0 MINVALUE 0 MAXVALUE 999999999;
+
+
 CREATE TABLE IF NOT EXISTS "wallets" (
     "id" SERIAL PRIMARY KEY,
     "number" VARCHAR(16) NOT NULL UNIQUE,
     "currency" VARCHAR(3) NOT NULL,
     "balance" FLOAT DEFAULT 0.0,
+    "balance_slots" INT,
     "created_at" DATE DEFAULT CURRENT_DATE,
     "updated_at" DATE DEFAULT CURRENT_DATE,
     "is_active" BOOLEAN DEFAULT TRUE,
@@ -23,13 +31,97 @@ ON DELETE CASCADE
 );
 
 
+CREATE TABLE IF NOT EXISTS "ledger_entries" (
+    "id" BIGSERIAL PRIMARY KEY,
+    "wallet_id" INT NOT NULL,
+    "amount" BIGINT NOT NULL,
+    "entry_type" VARCHAR(16) NOT NULL,
+    "transfer_uid" UUID,
+    "created_at" TIMESTAMP NOT NULL DEFAULT clock_timestamp(),
+    CONSTRAINT fk_wallet
+FOREIGN KEY (wallet_id)
+REFERENCES wallets(id)
+ON DELETE CASCADE
+);
+
+
+CREATE INDEX IF NOT EXISTS ledger_entries_wallet_created_at_idx ON "ledger_entries" (wallet_id, created_at) INCLUDE (amount);
+
+
+CREATE TABLE IF NOT EXISTS "balance_snapshots" (
+    "wallet_id" INT NOT NULL,
+    "taken_at" TIMESTAMP NOT NULL,
+    "balance" BIGINT NOT NULL,
+    PRIMARY KEY (wallet_id, taken_at),
+    CONSTRAINT fk_wallet
+FOREIGN KEY (wallet_id)
+REFERENCES wallets(id)
+ON DELETE CASCADE
+);
+
+
+CREATE TABLE IF NOT EXISTS "wallet_balance_slots" (
+    "wallet_id" INT NOT NULL,
+    "slot" INT NOT NULL,
+    "balance" FLOAT NOT NULL DEFAULT 0.0,
+    PRIMARY KEY (wallet_id, slot),
+    CONSTRAINT fk_wallet
+FOREIGN KEY (wallet_id)
+REFERENCES wallets(id)
+ON DELETE CASCADE
+);
+
+
+CREATE TABLE IF NOT EXISTS "idempotency_keys" (
+    "user_id" INT NOT NULL,
+    "key" VARCHAR(255) NOT NULL,
+    "fingerprint" VARCHAR(64) NOT NULL,
+    "status_code" SMALLINT,
+    "response" BYTEA,
+    "created_at" TIMESTAMP NOT NULL DEFAULT now(),
+    PRIMARY KEY (user_id, key),
+    CONSTRAINT fk_user
+FOREIGN KEY (user_id)
+REFERENCES users(id)
+ON DELETE CASCADE
+);
+
+
+CREATE INDEX IF NOT EXISTS idempotency_keys_created_at_idx ON "idempotency_keys" (created_at);
+
+
+CREATE TABLE IF NOT EXISTS "wallet_daily_stats" (
+    "wallet_number" VARCHAR(16) NOT NULL,
+    "day" DATE NOT NULL,
+    "counterparty_currency" VARCHAR(3) NOT NULL,
+    "money_in" BIGINT NOT NULL DEFAULT 0,
+    "money_out" BIGINT NOT NULL DEFAULT 0,
+    "count_in" INT NOT NULL DEFAULT 0,
+    "count_out" INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (wallet_number, day, counterparty_currency),
+    CONSTRAINT fk_wallet
+FOREIGN KEY (wallet_number)
+REFERENCES wallets(number)
+ON DELETE CASCADE
+);
+
+
 CREATE TABLE IF NOT EXISTS "TransferLog"(
-    "transfer_uid" UUID PRIMARY KEY,
+    "transfer_uid" UUID NOT NULL,
     "sender" VARCHAR(16) NOT NULL,
     "receiver" VARCHAR(16) NOT NULL,
     "currency_sent" VARCHAR(3) NOT NULL,
     "currency_received" VARCHAR(3) NOT NULL,
     "money_sent" FLOAT(2) NOT NULL,
     "money_received" FLOAT NOT NULL,
-    "paid_on" TIMESTAMP DEFAULT now()
-);
+    "paid_on" TIMESTAMP NOT NULL DEFAULT now(),
+    PRIMARY KEY ("transfer_uid", "paid_on")
+) PARTITION BY RANGE ("paid_on");
+
+-- Monthly partitions are created ahead by app.jobs.transfer_log_partitions; the default one only catches
+-- transfers made before it first runs and is emptied by it.
+CREATE TABLE IF NOT EXISTS "TransferLog_default" PARTITION OF "TransferLog" DEFAULT;
+
+
+CREATE INDEX IF NOT EXISTS transfer_log_sender_paid_on_idx ON "TransferLog" (sender, paid_on, transfer_uid);
+CREATE INDEX IF NOT EXISTS transfer_log_receiver_paid_on_idx ON "TransferLog" (receiver, paid_on, transfer_uid);
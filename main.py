@@ -1,12 +1,59 @@
 import uvicorn
 from fastapi import FastAPI
 
-from app.api import router
+from app.api import router, async_router, metrics_router
+from app.api.profiling import ProfilingMiddleware
+from app.currency_api import rates_store
+from app.currency_api.rates_store import close_async_client
+from app.database.async_database import async_engine, async_replica_engines
+from app.database.database import replicas
+from app.database.transfer_writer import transfer_writer
 from config import config
 
-app = FastAPI()
 
-app.include_router(router.router)
+def start_rates_refresh():
+    rates_store.start_background_refresh()
+
+
+async def stop_rates_refresh():
+    rates_store.stop_background_refresh()
+    await close_async_client()
+
+
+def start_replica_health_checks():
+    replicas.start_health_checks()
+
+
+def stop_replica_health_checks():
+    replicas.stop_health_checks()
+
+
+def flush_transfer_writer():
+    transfer_writer.close()
+
+
+async def dispose_async_engine():
+    await async_engine.dispose()
+    for replica_engine in async_replica_engines:
+        await replica_engine.dispose()
+
+
+def create_app() -> FastAPI:
+    """Builds the app, serving the routes of router.py or, with ASYNC_DB, those of async_router.py."""
+    app = FastAPI()
+    app.include_router(async_router.router if config.ASYNC_DB else router.router)
+    app.include_router(metrics_router.router)
+    if config.PROFILING_ENABLED:
+        app.add_middleware(ProfilingMiddleware)
+    for handler in (start_rates_refresh, start_replica_health_checks):
+        app.add_event_handler("startup", handler)
+    for handler in (stop_rates_refresh, stop_replica_health_checks, flush_transfer_writer, dispose_async_engine):
+        app.add_event_handler("shutdown", handler)
+    return app
+
+
+app = create_app()
+
 
 if __name__ == '__main__':
     uvicorn.run("main:app", port=config.PORT, host=config.HOST, reload=True)
\ No newline at end of file